@@ -1,21 +1,43 @@
 from dotenv import load_dotenv
 load_dotenv()  # Must run before any os.environ.get() calls
 
-from flask import Flask, jsonify, render_template, request
-from flask_socketio import SocketIO, emit, join_room, leave_room
+from flask import Flask, Response, g, jsonify, render_template, request, url_for
+from flask_socketio import SocketIO
 from flask_cors import CORS
 from main import Player, GameRoom
+from sessions import SessionRegistry, TokenStore
+from audience import Audience
+from cluster import WORKER_COUNT, WORKER_INDEX, owns_room, fetch_from_owner
+from timers import Scheduler
+from snapshots import SnapshotStore
+from codec import JSON, BINARY_CODECS, negotiate, encode, codec_room
+from metrics import Registry
+from logs import setup_logging
+from ratelimit import RateLimiter, parse_limits
+from sequencing import RoomSequencer
+from assets import AssetStore, CACHE_FOREVER, unbuilt
+from eventbuffer import EventBuffer
+import functools
+import json
+import logging
 import random
 import string
 import os
-import secrets
-from gevent import monkey, sleep
+from gevent import monkey
 import time
-import threading
 monkey.patch_all()
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+# Serve the page's scripts and styles under content-hashed names, precompressed and
+# cached forever (ASSET_PIPELINE=false serves them plainly from /static, with
+# Tailwind and Socket.IO from their CDNs). Unset, it is on once build_assets.py has run.
+_unbuilt_assets = unbuilt(app.static_folder)
+ASSET_PIPELINE = os.environ.get('ASSET_PIPELINE', 'false' if _unbuilt_assets else 'true').lower() == 'true'
+if ASSET_PIPELINE and _unbuilt_assets:
+    raise RuntimeError(f"{', '.join(_unbuilt_assets)} not built: run `python build_assets.py` "
+                       "before starting, or set ASSET_PIPELINE=false to load them from CDNs")
+assets = AssetStore(app.static_folder) if ASSET_PIPELINE else None
 
 # Configure CORS to only allow specific domains
 # Add extra origins via ALLOWED_ORIGINS env var (comma-separated)
@@ -40,42 +62,429 @@ socketio = SocketIO(app,
                    ping_interval=10,
                    logger=_debug_logging,
                    engineio_logger=_debug_logging,
+                   # Set when running several workers (see cluster.py) so emits reach every process
+                   message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
                    path='/socket.io')
 
+# Leveled logs written from a background thread (LOG_LEVEL, LOG_FORMAT, LOG_BURST, LOG_BURST_WINDOW)
+log_handler, log_limiter = setup_logging('DEBUG' if _debug_logging else None)
+log = logging.getLogger('app')
+if _unbuilt_assets and not ASSET_PIPELINE and 'ASSET_PIPELINE' not in os.environ:
+    log.warning("%s not built, loading Tailwind and Socket.IO from CDNs: run `python build_assets.py` "
+                "to serve hashed, precompressed assets", ', '.join(_unbuilt_assets))
+
+# Roles that get their own overlay on round snapshots
+ROLES = ('guesser', 'truth-teller', 'liar')
+
+# Seconds the round result stays on screen before the next round is sent
+ROUND_RESULT_DELAY = float(os.environ.get('ROUND_RESULT_DELAY', 4))
+# Seconds a guesser has before their turn is ended for them (0 disables)
+TURN_TIMEOUT = int(os.environ.get('TURN_TIMEOUT', 0))
+
+# Timed phase transitions, keyed by (kind, room_code)
+scheduler = Scheduler(socketio.start_background_task, socketio.sleep)
+# Round each paused room was due to announce when the pause began; sent on resume
+held_rounds = {}
+
+# Seconds an empty room is kept for reconnects before it is deleted
+EMPTY_WAITING_ROOM_TTL = 15
+EMPTY_GAME_ROOM_TTL = 300
+# Seconds a disconnected player keeps their seat in a waiting room
+DISCONNECTED_PLAYER_TTL = 600
+# Seconds a dropped connection has to come back before the room is told the player
+# left (and the game maybe paused). 0 tells the room at once.
+DISCONNECT_GRACE = float(os.environ.get('DISCONNECT_GRACE', 5))
+# Seconds between reaper sweeps
+REAP_INTERVAL = 5
+
+# What the reaper has reclaimed: totals since start plus the last sweep
+reaper_stats = {
+    'sweeps': 0,
+    'rooms': 0,
+    'players': 0,
+    'tokens': 0,
+    'last_sweep': {'rooms': 0, 'players': 0, 'tokens': 0, 'duration_ms': 0.0},
+}
+
+# SQLite file rooms and tokens are snapshotted to so games survive a restart (unset or '' disables)
+SNAPSHOT_DB = os.environ.get('SNAPSHOT_DB', '')
+if SNAPSHOT_DB and WORKER_COUNT > 1:
+    SNAPSHOT_DB += f'.{WORKER_INDEX}'  # one file per worker, as each owns its own rooms
+# Seconds between snapshot flushes; every change in between is written in one batch
+SNAPSHOT_INTERVAL = float(os.environ.get('SNAPSHOT_INTERVAL', 1))
+# Most rooms written per flush, bounding how long a flush holds up the event loop
+SNAPSHOT_BATCH_LIMIT = int(os.environ.get('SNAPSHOT_BATCH_LIMIT', 200))
+snapshot_store = SnapshotStore(SNAPSHOT_DB) if SNAPSHOT_DB else None
+# Rooms deleted since the last flush
+deleted_room_codes = set()
+
 # Store active game rooms
 game_rooms = {}
-# Store player session mappings: SID -> {player_id, room_code, name}
-player_sessions = {}
-# Store persistent session tokens: token -> {player_id, room_code, name}
-player_tokens = {}
+# Store player session mappings: SID -> {player_id, room_code, name}, indexed by player and room
+player_sessions = SessionRegistry()
+# Store persistent session tokens: token -> {player_id, room_code, name}, with TTL and LRU limits
+player_tokens = TokenStore(ttl=int(os.environ.get('SESSION_TOKEN_TTL', 24 * 3600)),
+                           max_tokens=int(os.environ.get('SESSION_TOKEN_LIMIT', 100000)))
+# Payload codec negotiated by each connected SID; binary clients sit in "<room>#<codec>" rooms
+client_codecs = {}
+# Spectators of each room and their truth-teller votes. Spectators sit in the
+# room's Socket.IO room, so every public event reaches them in the same emit.
+audience = Audience()
+# Recent events sent to each room, numbered, so a rejoining client gets only what it missed
+event_buffer = EventBuffer(int(os.environ.get('EVENT_BUFFER_SIZE', 64)))
+# Seconds between audience updates (spectator count and vote tallies) sent to a room
+AUDIENCE_UPDATE_INTERVAL = float(os.environ.get('AUDIENCE_UPDATE_INTERVAL', 1))
+# Seconds emits are held so a burst for the same target goes out as one "batch" frame.
+# 0 still batches what one handler sends; a negative value sends every emit at once.
+EMIT_BATCH_INTERVAL = float(os.environ.get('EMIT_BATCH_INTERVAL', 0))
+# Emits waiting to be sent, per game room: [[target, [(event, data), ...]], ...] in send order
+outbox = {}
+_outbox_flusher = [None]
+# A lock per room so its events run one at a time, and the action IDs each room has seen
+sequencer = RoomSequencer()
+
+# Token buckets per Socket.IO event as (events per second, burst), checked for every SID
+# and, with IP_RATE_MULTIPLIER times the budget, for every client address.
+# Override entries with RATE_LIMITS="make_guess=2/5,skip_question=0.2/2".
+EVENT_RATE_LIMITS = {
+    'connect': (2, 10),  # per address only, since each connection has a new SID
+    'create_room': (0.2, 3),
+    'join_game': (0.5, 5),
+    'join': (0.5, 5),
+    'rejoin_game': (0.5, 5),
+    'spectate': (0.5, 5),
+    'start_game': (0.2, 2),
+    'restart_game': (0.1, 2),
+    'skip_question': (0.2, 3),
+    'make_guess': (3, 6),
+    'end_turn': (1, 3),
+    'request_state': (1, 5),
+    'request_roster': (1, 5),
+    'audience_vote': (2, 5),
+}
+EVENT_RATE_LIMITS.update(parse_limits(os.environ.get('RATE_LIMITS', '')))
+# Several players can share an address (a household, a classroom), so addresses get a bigger budget
+IP_RATE_MULTIPLIER = float(os.environ.get('IP_RATE_MULTIPLIER', 10))
+# Disconnect a client after this many rejected events in a row (0 never disconnects)
+RATE_LIMIT_DISCONNECT_AFTER = int(os.environ.get('RATE_LIMIT_DISCONNECT_AFTER', 0))
+# Proxies in front of the app that append to X-Forwarded-For (cluster.py's router is one)
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+sid_limiter = RateLimiter(EVENT_RATE_LIMITS)
+address_limiter = RateLimiter({event: (rate * IP_RATE_MULTIPLIER, burst * IP_RATE_MULTIPLIER)
+                               for event, (rate, burst) in EVENT_RATE_LIMITS.items()})
+# Rejected events in a row per SID, reset by the next accepted one
+rate_limit_strikes = {}
+
+# Metrics served in Prometheus text format at /metrics. Each worker keeps its own.
+metrics = Registry()
+# Serve /metrics to any address rather than only to local scrapers
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() == 'true'
+# Measure the size of one JSON payload in this many (msgpack payloads are always measured)
+JSON_SIZE_SAMPLE_EVERY = int(os.environ.get('JSON_SIZE_SAMPLE_EVERY', 20))
+event_seconds = metrics.histogram('socketio_event_duration_seconds', 'Time spent in Socket.IO event handlers',
+                                  labels=('event',))
+event_errors = metrics.counter('socketio_event_errors_total', 'Socket.IO event handlers that raised', ('event',))
+duplicate_actions = metrics.counter('fishy_duplicate_actions_total', 'Actions dropped as repeats of an action ID',
+                                   ('event',))
+rejoin_catch_ups = metrics.counter('fishy_rejoins_total', 'Token rejoins by how the client caught up '
+                                   '(replayed missed events, or a full snapshot)', ('catch_up',))
+disconnect_flaps = metrics.counter('fishy_disconnect_flaps_suppressed_total',
+                                   'Dropped connections back within DISCONNECT_GRACE, never announced to the room')
+batched_events = metrics.counter('socketio_batched_events_total', 'Events sent inside a batch frame')
+events_rejected = metrics.counter('socketio_events_rejected_total', 'Socket.IO events refused by the rate limits',
+                                  ('event', 'scope'))
+request_seconds = metrics.histogram('http_request_duration_seconds', 'Time spent serving HTTP routes',
+                                    labels=('route', 'method'))
+request_statuses = metrics.counter('http_responses_total', 'HTTP responses by route and status',
+                                   ('route', 'status'))
+emit_fanout = metrics.histogram('socketio_emit_recipients', 'SIDs on this worker reached by one emit',
+                                (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096), ('event', 'codec'))
+emit_bytes = metrics.histogram('socketio_emit_payload_bytes', 'Encoded payload size of an emit (JSON is sampled)',
+                               (64, 256, 1024, 4096, 16384, 65536, 262144), ('event', 'codec'))
+_json_emits = [0]
+
+def _count_by(values):
+    counts = {}
+    for value in values:
+        counts[(value,)] = counts.get((value,), 0) + 1
+    return counts
+
+def _players_by_state():
+    connected = sum(room.connected_count for room in game_rooms.values())
+    return {('connected',): connected,
+            ('disconnected',): sum(len(room.players) for room in game_rooms.values()) - connected}
+
+metrics.gauge('fishy_rooms', 'Game rooms on this worker by status',
+              lambda: _count_by(room.game_state['status'] for room in game_rooms.values()), ('status',))
+metrics.gauge('fishy_players', 'Seated players by connection state', _players_by_state, ('state',))
+metrics.gauge('socketio_connected_sids', 'Connected Socket.IO clients', lambda: len(client_codecs))
+metrics.gauge('fishy_player_sessions', 'SIDs bound to a seat', lambda: len(player_sessions))
+metrics.gauge('fishy_spectators', 'SIDs watching a room', lambda: len(audience))
+metrics.gauge('fishy_session_tokens', 'Rejoin tokens held in player_tokens', lambda: len(player_tokens))
+metrics.gauge('fishy_session_token_bytes', 'Rough memory held by player_tokens',
+              lambda: player_tokens.stats()['approx_bytes'])
+metrics.gauge('fishy_session_token_evictions_total', 'Rejoin tokens dropped by reason (expired, lru, player_cap...)',
+              lambda: {(reason,): count for reason, count in player_tokens.evictions.items()}, ('reason',),
+              kind='counter')
+metrics.gauge('fishy_pending_timers', 'Scheduled timers by kind (cleanup, rounds, snapshots...)',
+              lambda: {(kind,): count for kind, count in scheduler.pending_counts().items()}, ('kind',))
+metrics.gauge('fishy_reaped_total', 'Rooms, players and tokens reclaimed by the reaper',
+              lambda: {(kind,): reaper_stats[kind] for kind in ('rooms', 'players', 'tokens')}, ('kind',),
+              kind='counter')
+metrics.gauge('fishy_rate_limit_buckets', 'Token buckets held for SIDs and addresses',
+              lambda: len(sid_limiter) + len(address_limiter))
+metrics.gauge('fishy_log_records_dropped_total', 'Log records dropped because the log queue was full',
+              lambda: log_handler.dropped, kind='counter')
+metrics.gauge('fishy_log_records_suppressed_total', 'Log records held back by the rate limit',
+              lambda: log_limiter.suppressed, kind='counter')
+metrics.gauge('fishy_snapshot_bytes_written_total', 'Bytes written to the snapshot store',
+              lambda: snapshot_store.stats['bytes_written'] if snapshot_store else 0, kind='counter')
+metrics.gauge('fishy_snapshot_last_flush_seconds', 'Duration of the last snapshot flush',
+              lambda: snapshot_store.stats['last_flush_ms'] / 1000 if snapshot_store else 0)
+
+def on_event(event):
+    """Register a Socket.IO handler like socketio.on(), applying the rate limits
+    and timing every call"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def timed_handler(*args):
+            if not admit(event):
+                return False if event == 'connect' else None  # False refuses the connection
+            started = time.perf_counter()
+            try:
+                return handler(*args)
+            except Exception:
+                event_errors.inc(event)
+                raise
+            finally:
+                event_seconds.observe(time.perf_counter() - started, event)
+        return socketio.on(event)(timed_handler)
+    return decorator
+
+def room_serialized(room_of=lambda data, *args: data.get('room_code')):
+    """Run a handler holding the lock of the room `room_of(*args)` names, so one room's
+    events never interleave when a handler yields. Actions whose `action_id` the
+    room has already seen are dropped, so client retries cannot apply twice."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def serialized_handler(*args):
+            room_code = room_of(*args)
+            if room_code not in game_rooms:
+                return handler(*args)  # nothing to protect; the handler reports the missing room
+            with sequencer.lock(room_code):
+                data = args[0] if args else None
+                if isinstance(data, dict) and sequencer.seen(room_code, data.get('action_id')):
+                    duplicate_actions.inc(request.event['message'])
+                    return None
+                return handler(*args)
+        return serialized_handler
+    return decorator
+
+def _session_room():
+    session = player_sessions.get(request.sid)
+    return session['room_code'] if session else None
+
+def _token_room(data):
+    session = player_tokens.get(data.get('token')) if data.get('token') else None
+    return session['room_code'] if session else None
+
+def admit(event):
+    """Spend the current client's tokens for an event. Returns False if it is over a limit."""
+    sid = request.sid
+    if event == 'connect' or sid_limiter.allow(event, sid):
+        if address_limiter.allow(event, client_address()):
+            if sid in rate_limit_strikes:
+                del rate_limit_strikes[sid]
+            return True
+        scope = 'address'
+    else:
+        scope = 'sid'
+    events_rejected.inc(event, scope)
+    if event == 'connect':
+        log.info("Connection refused, too many from %s", client_address())
+        return False
+
+    strikes = rate_limit_strikes[sid] = rate_limit_strikes.get(sid, 0) + 1
+    if strikes == 1:
+        send_event('error', {'message': 'Too many requests, please slow down'})
+    if RATE_LIMIT_DISCONNECT_AFTER and strikes >= RATE_LIMIT_DISCONNECT_AFTER:
+        log.warning("Disconnecting after %d rejected events", strikes)
+        flush_emits(_room_of_target(sid))  # deliver the error first
+        socketio.server.disconnect(sid)
+    return False
+
+def client_address():
+    """The client's IP, taken from X-Forwarded-For when behind TRUSTED_PROXY_HOPS proxies"""
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [a.strip() for a in request.headers.get('X-Forwarded-For', '').split(',') if a.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.remote_addr
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_seconds.observe(time.perf_counter() - g.request_started, route, request.method)
+    request_statuses.inc(route, str(response.status_code))
+    return response
+
+def send_event(event, data=None, to=None):
+    """Queue an event for a SID or room (default: the current client). Events
+    queued back to back for the same target within EMIT_BATCH_INTERVAL go out
+    as one "batch" frame of [event, data] pairs."""
+    if to is None:
+        to = request.sid
+    if to in game_rooms:
+        data = event_buffer.record(to, event, data)
+    elif ':' in to and to.split(':', 1)[0] in game_rooms:
+        event_buffer.gap(to.split(':', 1)[0])  # a role room: not every member got it
+    if EMIT_BATCH_INTERVAL < 0:
+        _send_now(event, data, to)
+        return
+    queue = outbox.setdefault(_room_of_target(to), [])
+    if queue and queue[-1][0] == to:
+        queue[-1][1].append((event, data))
+    else:
+        queue.append([to, [(event, data)]])
+    if _outbox_flusher[0] is None:
+        _outbox_flusher[0] = socketio.start_background_task(_flush_outbox_loop)
+
+def flush_emits(room):
+    """Send everything queued for a game room (or a roomless SID) now"""
+    queue = outbox.pop(room, None)
+    if not queue:
+        return
+    for target, events in queue:
+        if len(events) == 1:
+            _send_now(events[0][0], events[0][1], target)
+        else:
+            batched_events.inc(amount=len(events))
+            _send_now('batch', [[event, data] for event, data in events], target)
+
+def _flush_outbox_loop():
+    while outbox:
+        socketio.sleep(EMIT_BATCH_INTERVAL)
+        for room in list(outbox):
+            flush_emits(room)
+    _outbox_flusher[0] = None
+
+def _room_of_target(to):
+    """The game room a SID or Socket.IO room belongs to. Emits are queued per game
+    room, since only emits within one room can reach the same client."""
+    if to in client_codecs:
+        session = player_sessions.get(to)
+        return session['room_code'] if session else audience.room_of(to) or to
+    return to.split(':', 1)[0]
+
+def _send_now(event, data, to):
+    """Emit to a SID or room, encoding the payload once per codec in use rather
+    than once per recipient"""
+    codec = client_codecs.get(to)
+    if codec is not None:
+        _emit(event, codec, data, to, 1)
+        return
+
+    _emit(event, JSON, data, to, room_size(to))
+    for codec in BINARY_CODECS:
+        target = codec_room(to, codec)
+        recipients = room_size(target)
+        if recipients:
+            _emit(event, codec, data, target, recipients)
+
+def _emit(event, codec, data, to, recipients):
+    payload = _payload(codec, data)
+    socketio.emit(event, *payload, to=to)
+    emit_fanout.observe(recipients, event, codec)
+    if codec != JSON:
+        emit_bytes.observe(len(payload[0]) if payload else 0, event, codec)
+    else:
+        _json_emits[0] += 1
+        if _json_emits[0] % JSON_SIZE_SAMPLE_EVERY == 0:
+            # Same separators python-socketio uses when it encodes the packet
+            emit_bytes.observe(len(json.dumps(data, separators=(',', ':'))) if payload else 0, event, codec)
+
+def _payload(codec, data):
+    return () if data is None else (encode(codec, data),)
+
+def room_size(room):
+    """Number of SIDs on this process in a Socket.IO room"""
+    return len(socketio.server.manager.rooms.get('/', {}).get(room) or ())
+
+def enter_room(sid, room):
+    """Add a SID to a room, in the variant matching its codec. Emits already queued
+    are sent first, so they reach the members they were meant for."""
+    flush_emits(sid)
+    flush_emits(_room_of_target(room))
+    socketio.server.enter_room(sid, codec_room(room, client_codecs.get(sid, JSON)), namespace='/')
+
+def exit_room(sid, room):
+    flush_emits(sid)
+    flush_emits(_room_of_target(room))
+    socketio.server.leave_room(sid, codec_room(room, client_codecs.get(sid, JSON)), namespace='/')
 
 def generate_room_code():
-    """Generate a unique 6-letter room code, excluding confusing letters (O, I)"""
+    """Generate a unique 6-letter room code, excluding confusing letters (O, I).
+    In multi-worker mode only codes that shard to this worker are used."""
     # Define allowed characters (uppercase letters excluding O and I)
     allowed_chars = ''.join(c for c in string.ascii_uppercase if c not in 'OI')
 
     while True:
         code = ''.join(random.choices(allowed_chars, k=6))
-        if code not in game_rooms:
+        if code not in game_rooms and owns_room(code):
             return code
 
 @app.route('/')
 def index():
     """Serve the game interface"""
-    return render_template('index.html')
+    return render_template('index.html', sharded=WORKER_COUNT > 1)
+
+@app.context_processor
+def asset_helpers():
+    def has_asset(name):
+        """Whether a generated asset (see build_assets.py) has been built"""
+        return assets is not None and name in assets
+
+    def asset_url(name):
+        """URL of a static file: its hashed name when the asset pipeline serves it"""
+        if has_asset(name):
+            return url_for('hashed_asset', filename=assets.urls[name])
+        return url_for('static', filename=name)
+    return {'has_asset': has_asset, 'asset_url': asset_url}
+
+@app.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    """Serve a content-hashed asset in the best encoding the browser accepts"""
+    found = assets.get(filename, request.headers.get('Accept-Encoding', '')) if assets else None
+    if found is None:
+        return jsonify({'error': 'Not found'}), 404
+    mimetype, encoding, body = found
+    response = Response(body, mimetype=mimetype)
+    response.headers['Cache-Control'] = CACHE_FOREVER
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def open_room():
+    """Create an empty room that this worker owns and return its code"""
+    room_code = generate_room_code()
+    game_rooms[room_code] = GameRoom(room_code)
+    return room_code
 
 @app.route('/create_room', methods=['POST'])
 def create_room():
-    """Create a new game room"""
+    """Create a new game room. Kept for older clients; the page creates rooms
+    with the acknowledged create_room Socket.IO event."""
     data = request.get_json()
     host_name = data.get('name')
     if not host_name:
         return jsonify({'error': 'Name is required'}), 400
 
-    room_code = generate_room_code()
-    game_room = GameRoom(room_code)
-    game_rooms[room_code] = game_room
-
+    room_code = open_room()
     return jsonify({
         'room_code': room_code,
         'message': f'Room created successfully. Share code {room_code} with other players.'
@@ -83,7 +492,8 @@ def create_room():
 
 @app.route('/join_room/<room_code>', methods=['POST'])
 def join_game_room(room_code):
-    """Join an existing game room"""
+    """Check that a room can be joined. Kept for older clients; the page joins
+    with the acknowledged join Socket.IO event, which checks the same."""
     data = request.get_json()
     player_name = data.get('name')
 
@@ -91,6 +501,9 @@ def join_game_room(room_code):
         return jsonify({'error': 'Name is required'}), 400
 
     if room_code not in game_rooms:
+        if not owns_room(room_code):
+            payload, status = fetch_from_owner(room_code, 'POST', request.path, data)
+            return jsonify(payload), status
         return jsonify({'error': 'Room not found'}), 404
 
     game_room = game_rooms[room_code]
@@ -102,325 +515,400 @@ def join_game_room(room_code):
         'room_code': room_code
     })
 
-@socketio.on('connect')
-def handle_connect():
-    """Handle client connection"""
-    print(f"Client connected: {request.sid}")
-    emit('connected', {'message': 'Connected to server'})
-
-@socketio.on('disconnect')
+@on_event('connect')
+def handle_connect(auth=None):
+    """Handle client connection and pick the payload codec it asked for"""
+    offered = auth.get('codecs') if isinstance(auth, dict) else None
+    client_codecs[request.sid] = negotiate(offered if isinstance(offered, list) else None)
+    log.info("Client connected (%s)", client_codecs[request.sid])
+    socketio.emit('connected', {'message': 'Connected to server', 'codec': client_codecs[request.sid]},
+                  to=request.sid)
+
+@on_event('disconnect')
+@room_serialized(_session_room)
 def handle_disconnect():
-    """Handle client disconnection"""
-    print(f"Client disconnected: {request.sid}")
-    if request.sid in player_sessions:
-        player_id = player_sessions[request.sid]['player_id']
-        room_code = player_sessions[request.sid]['room_code']
-        player_name = player_sessions[request.sid]['name']
+    """Handle client disconnection. The player's seat stays theirs; the room hears
+    about it once DISCONNECT_GRACE has passed without them coming back."""
+    log.info("Client disconnected")
+    rate_limit_strikes.pop(request.sid, None)
+    session = player_sessions.get(request.sid)
+    if session is not None:
+        room_code = session['room_code']
+        player_sessions.remove(request.sid)
+        if room_code in game_rooms:
+            exit_room(request.sid, room_code)
+            if DISCONNECT_GRACE > 0:
+                # Hold the broadcasts and any pause, so a dropped connection that
+                # comes straight back never reaches the room
+                scheduler.schedule(('disconnect', room_code, session['player_id']), DISCONNECT_GRACE,
+                                   finish_disconnect, room_code, session['player_id'])
+            else:
+                finish_disconnect(room_code, session['player_id'])
+    stop_spectating(request.sid)
+    client_codecs.pop(request.sid, None)
+
+@room_serialized(lambda room_code, player_id: room_code)
+def finish_disconnect(room_code, player_id):
+    """Mark a player who has not come back as disconnected and tell the room,
+    pausing the game if too few players remain"""
+    game_room = game_rooms.get(room_code)
+    if game_room is None or player_id not in game_room.players:
+        return
+    if player_sessions.get_sid(room_code, player_id) is not None:
+        return  # back on a new connection
+    player_name = game_room.players[player_id].name
 
-        print(f"Disconnected player info - ID: {player_id}, Name: {player_name}, Room: {room_code}")
+    # Mark player as disconnected instead of removing immediately
+    game_room.set_player_connected(player_id, False)
 
-        if room_code in game_rooms:
-            game_room = game_rooms[room_code]
-
-            # Mark player as disconnected instead of removing immediately
-            if player_id in game_room.players:
-                game_room.players[player_id].is_disconnected = True
-                game_room.players[player_id].disconnect_time = time.time()
-
-            leave_room(room_code)
-
-            # Notify other players about disconnection
-            emit('player_disconnected', {
-                'player_id': player_id,
-                'player_name': player_name,
-                'message': f"{player_name} has disconnected"
-            }, to=room_code)
-
-            # Check if we should pause/end the game due to disconnections
-            connected_players = [p for p in game_room.players.values() if not getattr(p, 'is_disconnected', False)]
-            print(f"Connected players after disconnect: {len(connected_players)}")
-
-            if len(connected_players) < 3 and game_room.game_state['status'] == 'playing':
-                # Pause the game if too few players remain
-                game_room.game_state['status'] = 'paused'
-                emit('game_paused', {
-                    'message': f"Game paused - need at least 3 players. Waiting for {player_name} to reconnect..."
-                }, to=room_code)
-            elif len(connected_players) == 0:
-                # Waiting rooms clean up quickly; active/paused games wait longer for reconnects
-                delay = 15 if game_room.game_state['status'] == 'waiting' else 300
-                schedule_room_cleanup(room_code, delay)
-
-        del player_sessions[request.sid]
-
-def schedule_room_cleanup(room_code, delay_seconds):
-    """Schedule a room for cleanup after a delay"""
-    def cleanup_room():
-        time.sleep(delay_seconds)
-        if room_code in game_rooms:
-            game_room = game_rooms[room_code]
-            connected_players = [p for p in game_room.players.values() if not getattr(p, 'is_disconnected', False)]
+    # Notify other players about disconnection
+    send_roster_delta(room_code)
+    send_event('player_disconnected', {
+        'player_id': player_id,
+        'player_name': player_name,
+        'message': f"{player_name} has disconnected"
+    }, to=room_code)
 
-            # Only cleanup if still no connected players
-            if len(connected_players) == 0:
-                print(f"Cleaning up empty room: {room_code}")
-                del game_rooms[room_code]
+    # Check if we should pause/end the game due to disconnections
+    log.info("Player %s disconnected, %d still connected", player_name, game_room.connected_count,
+             extra={'room': room_code, 'player': player_id})
 
-    cleanup_thread = threading.Thread(target=cleanup_room)
-    cleanup_thread.daemon = True
-    cleanup_thread.start()
+    if game_room.connected_count < 3 and game_room.game_state['status'] == 'playing':
+        # Pause the game if too few players remain
+        game_room.set_status('paused')
+        send_event('game_paused', {
+            'message': f"Game paused - need at least 3 players. Waiting for {player_name} to reconnect..."
+        }, to=room_code)
 
-@socketio.on('join_game')
+    if game_room.connected_count == 0:
+        # The reaper deletes the room if nobody is back in time
+        game_room.empty_since = time.time()
+
+def returned_within_grace(room_code, player_id):
+    """Cancel a player's held disconnect. Returns True if one was pending, meaning
+    the room never heard they were gone."""
+    if scheduler.cancel(('disconnect', room_code, player_id)):
+        disconnect_flaps.inc()
+        return True
+    return False
+
+def delete_room(room_code):
+    """Remove a room along with its sessions, tokens and timers. Returns the number of tokens dropped."""
+    game_rooms.pop(room_code, None)
+    deleted_room_codes.add(room_code)
+    player_sessions.remove_room(room_code)
+    audience.remove_room(room_code)
+    scheduler.cancel(('new_round', room_code))
+    scheduler.cancel(('turn_timeout', room_code))
+    scheduler.cancel(('audience', room_code))
+    held_rounds.pop(room_code, None)
+    outbox.pop(room_code, None)
+    sequencer.forget(room_code)
+    event_buffer.forget(room_code)
+    return player_tokens.invalidate_room(room_code)
+
+def reap():
+    """Periodic sweep that expires empty rooms, stale disconnected players and dead tokens"""
+    started = time.perf_counter()
+    now = time.time()
+    rooms = players = tokens = 0
+
+    for room_code, game_room in list(game_rooms.items()):
+        with sequencer.lock(room_code):
+            if game_rooms.get(room_code) is not game_room:
+                continue  # deleted while we waited for the lock
+            if game_room.empty_since is not None:
+                ttl = EMPTY_WAITING_ROOM_TTL if game_room.game_state['status'] == 'waiting' else EMPTY_GAME_ROOM_TTL
+                if now - game_room.empty_since >= ttl:
+                    tokens += delete_room(room_code)
+                    rooms += 1
+                    continue
+
+            # Only waiting rooms drop players; mid-game seats stay open for rejoining
+            if game_room.game_state['status'] == 'waiting':
+                for player in list(game_room.players.values()):
+                    if player.is_disconnected and now - player.disconnect_time >= DISCONNECTED_PLAYER_TTL:
+                        game_room.remove_player(player.id)
+                        tokens += player_tokens.invalidate_player(room_code, player.id)
+                        players += 1
+                send_roster_delta(room_code)
+
+    tokens += player_tokens.expire()
+    sid_limiter.evict_idle()
+    address_limiter.evict_idle()
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    reaper_stats['sweeps'] += 1
+    reaper_stats['rooms'] += rooms
+    reaper_stats['players'] += players
+    reaper_stats['tokens'] += tokens
+    reaper_stats['last_sweep'] = {'rooms': rooms, 'players': players, 'tokens': tokens,
+                                  'duration_ms': round(duration_ms, 3)}
+    if rooms or players or tokens:
+        log.info("Reaper reclaimed %d rooms, %d players, %d tokens in %.1fms", rooms, players, tokens, duration_ms)
+
+    scheduler.schedule(('reaper',), REAP_INTERVAL, reap)
+
+def flush_snapshots():
+    """Write every room and token changed since the last flush in one transaction"""
+    scheduler.schedule(('snapshot',), SNAPSHOT_INTERVAL, flush_snapshots)
+
+    rooms = []
+    for game_room in game_rooms.values():
+        if game_room.dirty:
+            rooms.append(game_room.to_snapshot())
+            game_room.dirty = False
+            if len(rooms) >= SNAPSHOT_BATCH_LIMIT:
+                break
+    # Move written rooms to the back so rooms left dirty go first next time
+    for data in rooms:
+        game_rooms[data['room_code']] = game_rooms.pop(data['room_code'])
+    tokens, dropped_tokens = player_tokens.drain_changes()
+    if rooms or deleted_room_codes or tokens or dropped_tokens:
+        snapshot_store.write(rooms, deleted_room_codes, tokens, dropped_tokens)
+        deleted_room_codes.clear()
+
+def restore_snapshots():
+    """Bring back the rooms and tokens saved before the last shutdown or crash.
+    Everyone starts out disconnected, so games in progress wait paused for rejoins."""
+    for data in snapshot_store.load_rooms():
+        game_room = GameRoom.from_snapshot(data)
+        for player in game_room.players.values():
+            if not player.is_disconnected:
+                game_room.set_player_connected(player.id, False)
+        if game_room.game_state['status'] == 'playing':
+            game_room.set_status('paused')
+        game_room.drain_roster_delta()  # nobody is connected yet; rejoining players get the full roster
+        game_rooms[game_room.room_code] = game_room
+    for token, session, last_used in snapshot_store.load_tokens():
+        player_tokens.restore(token, session, last_used)
+    if game_rooms:
+        log.info("Restored %d rooms and %d tokens from %s", len(game_rooms), len(player_tokens), SNAPSHOT_DB)
+
+if snapshot_store:
+    restore_snapshots()
+    scheduler.schedule(('snapshot',), SNAPSHOT_INTERVAL, flush_snapshots)
+
+scheduler.schedule(('reaper',), REAP_INTERVAL, reap)
+
+@on_event('join_game')
+@room_serialized()
 def handle_join_game(data):
-    """Handle player joining a game"""
-    room_code = data.get('room_code')
-    player_name = data.get('name')
-
-    if room_code not in game_rooms:
-        emit('error', {'message': 'Room not found'})
+    """Handle player joining a game. The reply arrives as separate events; see
+    handle_join for the acknowledged version."""
+    reply = seat_player(data.get('room_code'), data.get('name'))
+    if 'error' in reply:
+        send_event('error', {'message': reply['error']})
         return
+    send_event('session_token', {'token': reply['token'], 'room_code': reply['room_code']})
+    send_event('roster', reply['roster'])
+    # A game in progress shows the game interface, anything else the waiting room
+    send_event('game_started' if reply['state']['status'] in ['playing', 'paused'] else 'game_state',
+               reply['state'])
+
+@on_event('join')
+@room_serialized()
+def handle_join(data):
+    """Join a game in one round trip: the acknowledgement carries the room code,
+    session token, roster and state, or {'error': message}"""
+    return seat_player(data.get('room_code'), data.get('name'))
+
+@on_event('create_room')
+def handle_create_room(data):
+    """Create a room and seat its host in one round trip; replies like handle_join"""
+    if not data.get('name'):
+        return {'error': 'Name is required'}
+    room_code = open_room()
+    with sequencer.lock(room_code):
+        return seat_player(room_code, data['name'])
+
+def seat_player(room_code, player_name):
+    """Seat the current client in a room as a new player, or as the disconnected
+    player with the same name. Tells the room, and returns what the client needs:
+    {'room_code', 'player_id', 'token', 'roster', 'state'} or {'error': message}."""
+    if room_code not in game_rooms:
+        return {'error': 'Room not found'}
+    if not player_name:
+        return {'error': 'Name is required'}
 
     game_room = game_rooms[room_code]
 
-    # Debug: Print current players and their status
-    print(f"Join attempt: {player_name} -> {room_code}")
-    print(f"Current players in room:")
-    for pid, player in game_room.players.items():
-        disconnected = getattr(player, 'is_disconnected', False)
-        print(f"  {player.name} (ID: {pid}) - Disconnected: {disconnected}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Join attempt by %s; seated: %s", player_name,
+                  ', '.join(f"{p.name} ({p.id}{', away' if p.is_disconnected else ''})"
+                            for p in game_room.players.values()), extra={'room': room_code})
 
     # Check if this is a reconnecting player (more flexible matching)
     reconnecting_player = None
     for player in game_room.players.values():
-        print(f"Checking player: '{player.name}' vs '{player_name}' (case-insensitive: {player.name.lower() == player_name.lower()})")
-        print(f"  Player disconnected status: {getattr(player, 'is_disconnected', False)}")
-
         if player.name.lower() == player_name.lower():  # Case-insensitive matching
-            if getattr(player, 'is_disconnected', False):
+            # A player without a connection is still inside their disconnect grace window
+            if player.is_disconnected or player_sessions.get_sid(room_code, player.id) is None:
                 reconnecting_player = player
-                print(f"✓ Found disconnected player to reconnect: {player.name}")
                 break
             else:
                 # Player with same name is already connected
-                print(f"✗ Player with same name is already connected: {player.name}")
-                emit('error', {'message': f'Player "{player_name}" is already connected to this game'})
-                return
+                log.info("Join refused, %s is already connected", player_name, extra={'room': room_code})
+                return {'error': f'Player "{player_name}" is already connected to this game'}
 
+    quiet = False
     if reconnecting_player:
         # Handle reconnection
         player_id = reconnecting_player.id
-        reconnecting_player.is_disconnected = False
-        reconnecting_player.disconnect_time = None
+        quiet = returned_within_grace(room_code, player_id)
+        if not quiet:
+            game_room.set_player_connected(player_id, True)
+    else:
+        # Handle new player joining
+        if game_room.game_state['status'] not in ['waiting']:
+            # Show available disconnected players for debugging
+            disconnected_players = [p.name for p in game_room.players.values() if p.is_disconnected]
+            if disconnected_players:
+                return {'error': f'Game in progress. Disconnected players available for reconnection: {", ".join(disconnected_players)}'}
+            return {'error': 'Game already in progress and no disconnected players available'}
 
-        print(f"Reconnecting player {player_name} with ID {player_id}")
+        # Create new player (ids are never reused, even after a player is reaped)
+        player_id = max(game_room.players, default=0) + 1
+        game_room.add_player(Player(player_id, player_name))
+        log.info("Player %s joined", player_name, extra={'room': room_code, 'player': player_id})
 
-        # Store session info
-        player_sessions[request.sid] = {
-            'player_id': player_id,
-            'room_code': room_code,
-            'name': player_name
-        }
+    # Store session info
+    stop_spectating(request.sid)  # a spectator taking a seat
+    player_sessions.add(request.sid, player_id, room_code, player_name)
+    game_room.empty_since = None
+
+    # Issue a persistent session token so the client can rejoin after reconnects
+    token = player_tokens.issue(player_id, room_code, player_name)
 
-        # Issue a persistent session token so the client can rejoin after reconnects
-        token = secrets.token_hex(16)
-        player_tokens[token] = {'player_id': player_id, 'room_code': room_code, 'name': player_name}
-        emit('session_token', {'token': token})
+    # Join socket room
+    enter_room(request.sid, room_code)
+    sync_role_room(room_code, player_id, game_room.players[player_id].role)
 
-        # Join socket room
-        join_room(room_code)
+    # Tell the room about the player; the client ignores deltas its roster already covers
+    send_roster_delta(room_code)
 
+    if reconnecting_player and not quiet:
         # Notify all players about reconnection
-        emit('player_reconnected', {
+        send_event('player_reconnected', {
             'player_id': player_id,
             'player_name': player_name,
             'message': f'{player_name} has reconnected'
-        }, room=room_code)
+        }, to=room_code)
 
         # Check if game can resume
-        connected_players = [p for p in game_room.players.values() if not getattr(p, 'is_disconnected', False)]
-        print(f"Connected players after reconnection: {len(connected_players)}")
-
-        if len(connected_players) >= 3 and game_room.game_state['status'] == 'paused':
-            game_room.game_state['status'] = 'playing'
-            emit('game_resumed', {
-                'message': 'Game resumed - enough players reconnected!'
-            }, room=room_code)
-
-        # Send current game state to reconnected player
-        state = game_room.get_player_state(player_id)
-        state['player_id'] = player_id
-        state['current_round'] = game_room.game_state['current_round']
-
-        print(f"Game status: {game_room.game_state['status']}")
-
-        # Send appropriate event based on game status
-        if game_room.game_state['status'] in ['playing', 'paused']:
-            emit('game_started', state)  # This will show the game interface
-            print(f"Sent game_started event to reconnected player")
-        else:
-            emit('game_state', state)  # This will show waiting room
-            print(f"Sent game_state event to reconnected player")
+        log.info("Player %s reconnected, %d connected", player_name, game_room.connected_count,
+                 extra={'room': room_code, 'player': player_id})
 
-    else:
-        # Handle new player joining
-        print(f"No disconnected player found, treating as new player")
+        if game_room.connected_count >= 3 and game_room.game_state['status'] == 'paused':
+            resume_game(room_code, 'Game resumed - enough players reconnected!')
 
-        if game_room.game_state['status'] not in ['waiting']:
-            # Show available disconnected players for debugging
-            disconnected_players = [p.name for p in game_room.players.values() if getattr(p, 'is_disconnected', False)]
-            if disconnected_players:
-                emit('error', {'message': f'Game in progress. Disconnected players available for reconnection: {", ".join(disconnected_players)}'})
-            else:
-                emit('error', {'message': 'Game already in progress and no disconnected players available'})
-            return
-
-        # Create new player
-        player_id = len(game_room.players) + 1
-        player = Player(player_id, player_name)
-        game_room.add_player(player)
-
-        print(f"Created new player {player_name} with ID {player_id}")
+    # Current game state from the player's point of view
+    state = game_room.get_player_state(player_id)
+    state['player_id'] = player_id
+    state['current_round'] = game_room.game_state['current_round']
 
-        # Store session info
-        player_sessions[request.sid] = {
-            'player_id': player_id,
-            'room_code': room_code,
-            'name': player_name
-        }
-
-        # Issue a persistent session token so the client can rejoin after reconnects
-        token = secrets.token_hex(16)
-        player_tokens[token] = {'player_id': player_id, 'room_code': room_code, 'name': player_name}
-        emit('session_token', {'token': token})
-
-        # Join socket room
-        join_room(room_code)
-
-        # Send list of existing players to the new player
-        for existing_player in game_room.players.values():
-            if existing_player.id != player_id:  # Don't send the new player to themselves
-                emit('player_joined', {
-                    'player': existing_player.to_dict(),
-                    'message': f'{existing_player.name} is in the room'
-                })
-
-        # Notify all players in room about the new player
-        emit('player_joined', {
-            'player': player.to_dict(),
-            'message': f'{player_name} has joined the game'
-        }, room=room_code)
-
-        # Send current game state to new player
-        state = game_room.get_player_state(player_id)
-        state['player_id'] = player_id  # Add player's own ID to state
-        emit('game_state', state)
-
-@socketio.on('start_game')
+    return {
+        'room_code': room_code,
+        'player_id': player_id,
+        'token': token,
+        'roster': game_room.get_roster(),
+        'state': state,
+        'seq': event_buffer.last_seq(room_code),
+    }
+
+@on_event('start_game')
+@room_serialized()
 def handle_start_game(data):
     """Handle game start request"""
-    print(f"Received start_game event with data: {data}")
     room_code = data.get('room_code')
 
     if room_code not in game_rooms:
-        print(f"Room {room_code} not found")
-        emit('error', {'message': 'Room not found'})
+        send_event('error', {'message': 'Room not found'})
+        return
+
+    if request.sid in audience:
+        send_event('error', {'message': 'Spectators cannot start the game'})
         return
 
     game_room = game_rooms[room_code]
-    print(f"Number of players in room: {len(game_room.players)}")
 
     if len(game_room.players) < 3:
-        print(f"Not enough players to start game: {len(game_room.players)}")
-        emit('error', {'message': 'Need at least 3 players to start'})
+        send_event('error', {'message': 'Need at least 3 players to start'})
         return
 
-    print("Starting game...")
     # Start the game
     game_room.start_game()
 
     # Send initial game state to all players
-    for player_id in game_room.players:
-        state = game_room.get_player_state(player_id)
-        state['player_id'] = player_id  # Add player's own ID to state
-        player_sid = get_player_sid(player_id, room_code)
-        print(f"Sending game_started event to player {player_id} (SID: {player_sid})")
-        emit('game_started', state, to=player_sid)
+    broadcast_round_state(room_code, 'game_started')
 
-    print("Game started successfully")
+    schedule_turn_timeout(room_code)
+    log.info("Game started with %d players", len(game_room.players), extra={'room': room_code})
 
-@socketio.on('make_guess')
+@on_event('make_guess')
+@room_serialized()
 def handle_guess(data):
     """Handle a player making a guess"""
     room_code = data.get('room_code')
     guessed_player_id = data.get('guessed_player_id')
 
     if room_code not in game_rooms:
-        emit('error', {'message': 'Room not found'})
+        send_event('error', {'message': 'Room not found'})
         return
 
     if request.sid not in player_sessions:
-        emit('error', {'message': 'Session not found. Please rejoin.'})
+        send_event('error', {'message': 'Session not found. Please rejoin.'})
         return
 
     game_room = game_rooms[room_code]
     guesser_id = player_sessions[request.sid]['player_id']
 
     if guessed_player_id not in game_room.players:
-        emit('error', {'message': 'Invalid player selected'})
+        send_event('error', {'message': 'Invalid player selected'})
+        return
+
+    if round_transition_pending(room_code):
+        send_event('error', {'message': 'The round is already over'})
         return
 
     # Process the guess
     result = game_room.process_guess(guesser_id, guessed_player_id)
 
     if 'error' in result:
-        emit('error', {'message': result['error']})
+        send_event('error', {'message': result['error']})
         return
 
     # Broadcast result to all players first
-    emit('guess_result', result, to=room_code)
+    send_event('guess_result', result, to=room_code)
 
     # If truth-teller was guessed or all liars found, handle round end
     if result.get('round_ended', False):
         if game_room.game_state['status'] == 'finished':
             # Game is over
+            scheduler.cancel(('turn_timeout', room_code))
             final_results = game_room.get_final_results()
-            emit('game_over', final_results, to=room_code)
+            send_event('game_over', final_results, to=room_code)
         else:
-            # Wait for 4 seconds so players can read the round result
-            sleep(4)
-
-            # end_round() already calls start_new_round(), so we don't need to call it again
-            # The round was already ended in process_guess -> end_round()
-
-            # Get the current guesser after the new round started
-            current_guesser = next(p for p in game_room.players.values() if p.is_guesser())
-
-            # Send new round state to all players
-            for player_id in game_room.players:
-                state = game_room.get_player_state(player_id)
-                state['player_id'] = player_id
-                state['current_round'] = game_room.game_state['current_round']
-                state['next_guesser'] = current_guesser.name
-                emit('new_round', state, to=get_player_sid(player_id, room_code))
+            # end_round() already started the next round; announce it once players have read the result
+            schedule_new_round(room_code)
     else:
-        # Just update game state for all players
-        for player_id in game_room.players:
-            state = game_room.get_player_state(player_id)
-            state['player_id'] = player_id
-            state['current_round'] = game_room.game_state['current_round']
-            emit('game_state_update', state, to=get_player_sid(player_id, room_code))
-
-@socketio.on('end_turn')
+        # Send only what changed; clients that missed a version ask for a snapshot
+        delta = game_room.drain_delta()
+        if delta is not None:
+            send_event('state_delta', delta, to=room_code)
+
+@on_event('end_turn')
+@room_serialized()
 def handle_end_turn(data):
     """Handle the guesser choosing to end their turn early"""
     room_code = data.get('room_code')
 
     if room_code not in game_rooms:
-        emit('error', {'message': 'Room not found'})
+        send_event('error', {'message': 'Room not found'})
         return
 
     if request.sid not in player_sessions:
-        emit('error', {'message': 'Session not found. Please rejoin.'})
+        send_event('error', {'message': 'Session not found. Please rejoin.'})
         return
 
     game_room = game_rooms[room_code]
@@ -428,39 +916,123 @@ def handle_end_turn(data):
     guesser = game_room.players.get(guesser_id)
 
     if not guesser or not guesser.is_guesser():
-        emit('error', {'message': 'Only the current guesser can end the turn'})
+        send_event('error', {'message': 'Only the current guesser can end the turn'})
         return
 
     if game_room.game_state['status'] != 'playing':
-        emit('error', {'message': 'Game is not in progress'})
+        send_event('error', {'message': 'Game is not in progress'})
         return
 
+    if round_transition_pending(room_code):
+        send_event('error', {'message': 'The round is already over'})
+        return
+
+    end_turn_early(room_code)
+
+def end_turn_early(room_code):
+    """End the current guesser's turn, keeping their points, and move to the next round"""
+    game_room = game_rooms[room_code]
+    guesser = game_room.guesser
     guesser_name = guesser.name
     points_kept = guesser.temp_points  # capture before end_turn_early resets it
 
     result = game_room.end_turn_early()
 
     # Notify everyone about the early end
-    emit('turn_ended_early', {
+    send_event('turn_ended_early', {
         'guesser_name': guesser_name,
         'points_kept': points_kept,
     }, to=room_code)
 
     if result is not None:
         # Someone hit 20 points — game over
-        emit('game_over', result, to=room_code)
+        scheduler.cancel(('turn_timeout', room_code))
+        send_event('game_over', result, to=room_code)
     else:
-        sleep(4)
-        current_guesser = next(p for p in game_room.players.values() if p.is_guesser())
-        for player_id in game_room.players:
-            state = game_room.get_player_state(player_id)
-            state['player_id'] = player_id
-            state['current_round'] = game_room.game_state['current_round']
-            state['next_guesser'] = current_guesser.name
-            emit('new_round', state, to=get_player_sid(player_id, room_code))
+        schedule_new_round(room_code)
+
+def round_transition_pending(room_code):
+    """Whether a finished round's result is still on screen before the next round is sent"""
+    return scheduler.pending(('new_round', room_code))
+
+def schedule_new_round(room_code):
+    """Announce the round that has already started after the result display delay"""
+    scheduler.cancel(('turn_timeout', room_code))
+    round_number = game_rooms[room_code].game_state['current_round']
+    scheduler.schedule(('new_round', room_code), ROUND_RESULT_DELAY, send_new_round, room_code, round_number)
+
+@room_serialized(lambda room_code, round_number: room_code)
+def send_new_round(room_code, round_number):
+    """Send the new round's state to every player. Stale or repeated calls do nothing;
+    in a paused game the round is held until it resumes."""
+    game_room = game_rooms.get(room_code)
+    if game_room is None or game_room.game_state['current_round'] != round_number:
+        return
+    if game_room.game_state['status'] == 'paused':
+        held_rounds[room_code] = round_number
+        return
+    if game_room.game_state['status'] != 'playing':
+        return
+
+    current_guesser = game_room.guesser
+    broadcast_round_state(room_code, 'new_round', next_guesser=current_guesser.name)
+    schedule_turn_timeout(room_code)
+
+def resume_game(room_code, message):
+    """Unpause a game, announcing the round a pause held back or restarting the turn clock"""
+    game_rooms[room_code].set_status('playing')
+    send_event('game_resumed', {'message': message}, to=room_code)
+    round_number = held_rounds.pop(room_code, None)
+    if round_number is not None:
+        send_new_round(room_code, round_number)
+    elif not round_transition_pending(room_code):
+        schedule_turn_timeout(room_code)
+
+def schedule_turn_timeout(room_code):
+    """Start the guesser's turn clock, if turn timeouts are enabled"""
+    if TURN_TIMEOUT > 0:
+        round_number = game_rooms[room_code].game_state['current_round']
+        scheduler.schedule(('turn_timeout', room_code), TURN_TIMEOUT, handle_turn_timeout, room_code, round_number)
+
+@room_serialized(lambda room_code, round_number: room_code)
+def handle_turn_timeout(room_code, round_number):
+    """End the guesser's turn for them when their time runs out"""
+    game_room = game_rooms.get(room_code)
+    if (game_room is None or game_room.game_state['status'] != 'playing'
+            or game_room.game_state['current_round'] != round_number
+            or round_transition_pending(room_code)):
+        return
+    end_turn_early(room_code)
 
 
-@socketio.on('skip_question')
+@on_event('request_state')
+def handle_request_state(data):
+    """Send a full state snapshot to a client that detected a gap in state_delta versions"""
+    session = player_sessions.get(request.sid)
+    if session is None:
+        spectated = audience.room_of(request.sid)
+        if spectated in game_rooms:
+            send_event('game_state_update', game_rooms[spectated].get_public_state())
+        return
+    if session['room_code'] not in game_rooms:
+        return
+
+    game_room = game_rooms[session['room_code']]
+    if session['player_id'] not in game_room.players:
+        return
+    state = game_room.get_player_state(session['player_id'])
+    state['player_id'] = session['player_id']
+    send_event('game_state_update', state)
+
+@on_event('request_roster')
+def handle_request_roster(data):
+    """Send the full roster to a player who detected a gap in roster_delta versions"""
+    session = player_sessions.get(request.sid)
+    if session is not None and session['room_code'] in game_rooms:
+        send_event('roster', game_rooms[session['room_code']].get_roster())
+
+@on_event('skip_question')
+@room_serialized()
 def handle_skip_question(data):
     """Handle skipping the current question"""
     room_code = data.get('room_code')
@@ -468,67 +1040,86 @@ def handle_skip_question(data):
         return
 
     game_room = game_rooms[room_code]
-    result = game_room.skip_question()
-    emit('question_skipped', result, to=room_code)
+    if request.sid in audience or round_transition_pending(room_code):
+        return
+
+    game_room.skip_question()
+    # The room (spectators included) only learns that it happened; the new
+    # question and answer go out per role, as in broadcast_round_state
+    send_event('question_skipped', {}, to=room_code)
+    for role in ROLES:
+        send_event('question_overlay', game_room.get_role_overlay(role), to=role_room(room_code, role))
 
-@socketio.on('rejoin_game')
+@on_event('rejoin_game')
+@room_serialized(_token_room)
 def handle_rejoin_game(data):
     """Handle a client rejoining using a persistent session token"""
     token = data.get('token')
-    if not token or token not in player_tokens:
-        emit('rejoin_failed', {'message': 'Session expired. Please rejoin manually.'})
+    session = player_tokens.get(token) if token else None
+    if session is None:
+        send_event('rejoin_failed', {'message': 'Session expired. Please rejoin manually.'})
         return
 
-    session = player_tokens[token]
     player_id = session['player_id']
     room_code = session['room_code']
     player_name = session['name']
 
     if room_code not in game_rooms:
-        del player_tokens[token]
-        emit('rejoin_failed', {'message': 'Room no longer exists.'})
+        player_tokens.revoke(token)
+        send_event('rejoin_failed', {'message': 'Room no longer exists.'})
         return
 
     game_room = game_rooms[room_code]
     if player_id not in game_room.players:
-        del player_tokens[token]
-        emit('rejoin_failed', {'message': 'Player not found in room.'})
+        player_tokens.revoke(token)
+        send_event('rejoin_failed', {'message': 'Player not found in room.'})
         return
 
     player = game_room.players[player_id]
 
-    # Remove any stale SID mapping for this player
-    for sid in list(player_sessions.keys()):
-        if player_sessions[sid]['player_id'] == player_id and player_sessions[sid]['room_code'] == room_code:
-            del player_sessions[sid]
-            break
-
-    # Register the new SID
-    player_sessions[request.sid] = {'player_id': player_id, 'room_code': room_code, 'name': player_name}
+    # Register the new SID, replacing any stale SID mapping for this player
+    stop_spectating(request.sid)  # a spectator taking a seat
+    player_sessions.add(request.sid, player_id, room_code, player_name)
+    game_room.empty_since = None
 
     # Refresh the token so the client has a valid one going forward
-    new_token = secrets.token_hex(16)
-    player_tokens[new_token] = session
-    del player_tokens[token]
-    emit('session_token', {'token': new_token})
-
-    # Mark player as reconnected
-    player.is_disconnected = False
-    player.disconnect_time = None
+    player_tokens.revoke(token)
+    new_token = player_tokens.issue(player_id, room_code, player_name)
+    send_event('session_token', {'token': new_token, 'room_code': room_code})
+
+    # Back within the disconnect grace window, or before their old connection was
+    # seen to drop: the room never heard they left, so it hears nothing now
+    quiet = returned_within_grace(room_code, player_id) or not player.is_disconnected
+    if not quiet:
+        # Mark player as reconnected
+        game_room.set_player_connected(player_id, True)
+
+    enter_room(request.sid, room_code)
+    sync_role_room(room_code, player_id, game_room.players[player_id].role)
+
+    # A client that says which event it saw last gets the ones it missed, if the
+    # room still has them all, in place of a roster and state snapshot
+    missed = event_buffer.since(room_code, data.get('last_seq'))
+    rejoin_catch_ups.inc('snapshot' if missed is None else 'replay')
+    if missed is not None:
+        send_event('missed_events', {'events': missed})
+        send_roster_delta(room_code)
+    else:
+        send_roster(room_code)
 
-    join_room(room_code)
+    if not quiet:
+        send_event('player_reconnected', {
+            'player_id': player_id,
+            'player_name': player_name,
+            'message': f'{player_name} has reconnected'
+        }, to=room_code)
 
-    emit('player_reconnected', {
-        'player_id': player_id,
-        'player_name': player_name,
-        'message': f'{player_name} has reconnected'
-    }, room=room_code)
+        # Resume game if enough players are back
+        if game_room.connected_count >= 3 and game_room.game_state['status'] == 'paused':
+            resume_game(room_code, 'Game resumed!')
 
-    # Resume game if enough players are back
-    connected_players = [p for p in game_room.players.values() if not getattr(p, 'is_disconnected', False)]
-    if len(connected_players) >= 3 and game_room.game_state['status'] == 'paused':
-        game_room.game_state['status'] = 'playing'
-        emit('game_resumed', {'message': 'Game resumed!'}, room=room_code)
+    if missed is not None:
+        return  # the replayed events brought the client up to date
 
     # Send the current state back to the rejoining player
     state = game_room.get_player_state(player_id)
@@ -536,54 +1127,145 @@ def handle_rejoin_game(data):
     state['current_round'] = game_room.game_state['current_round']
 
     if game_room.game_state['status'] in ['playing', 'paused']:
-        emit('game_started', state)
+        send_event('game_started', state)
     else:
-        # Still in waiting room — send current player list
-        emit('rejoined_waiting', {
+        # Still in waiting room; the roster sent above fills in the player list
+        send_event('rejoined_waiting', {
             'player_id': player_id,
-            'room_code': room_code,
-            'players': [p.to_dict() for p in game_room.players.values()]
+            'room_code': room_code
         })
 
 
-@socketio.on('restart_game')
+@on_event('restart_game')
+@room_serialized()
 def handle_restart_game(data):
     """Handle restarting the game in the same room"""
     room_code = data.get('room_code')
     if room_code not in game_rooms:
         return
 
+    if request.sid in audience:
+        return
+
     game_room = game_rooms[room_code]
 
+    # Drop any round transition or turn clock left over from the last game
+    scheduler.cancel(('new_round', room_code))
+    scheduler.cancel(('turn_timeout', room_code))
+    held_rounds.pop(room_code, None)
+
     # Notify all players that game is restarting
-    emit('game_restarting', to=room_code)
+    send_event('game_restarting', to=room_code)
 
     # Reset room state but keep players
     game_room.reset_for_restart()
 
-    # Notify all players that game has restarted
-    for player_id in game_room.players:
-        player = game_room.players[player_id]
-        emit('player_rejoined', {
-            'player': {
-                'id': player_id,
-                'name': player.name
-            }
-        }, to=room_code)
+    # Notify all players that game has restarted, with everyone still seated
+    send_event('game_restarted', to=room_code)
+    send_event('roster', game_room.get_roster(), to=room_code)
 
-    emit('game_restarted', to=room_code)
+@on_event('spectate')
+def handle_spectate(data):
+    """Watch a room read-only. Spectators get the room's public events and nothing role-specific."""
+    room_code = data.get('room_code')
+    if room_code not in game_rooms:
+        send_event('error', {'message': 'Room not found'})
+        return
+    if request.sid in player_sessions:
+        send_event('error', {'message': 'Players cannot spectate'})
+        return
+
+    stop_spectating(request.sid)
+    audience.add(request.sid, room_code)
+    enter_room(request.sid, room_code)
+    send_event('spectating', {
+        'room_code': room_code,
+        'state': game_rooms[room_code].get_public_state(),
+        'audience': audience.summary(room_code),
+    })
+    schedule_audience_update(room_code)
+
+@on_event('audience_vote')
+def handle_audience_vote(data):
+    """Record a spectator's guess at this round's truth-teller"""
+    room_code = audience.room_of(request.sid)
+    game_room = game_rooms.get(room_code)
+    if game_room is None:
+        send_event('error', {'message': 'Only spectators can vote'})
+        return
 
-def get_player_sid(player_id, room_code):
-    """Get socket ID for a player"""
-    for sid, data in player_sessions.items():
-        if data['player_id'] == player_id and data['room_code'] == room_code:
-            return sid
-    return None
+    player_id = data.get('player_id')
+    if (game_room.game_state['status'] != 'playing' or player_id not in game_room.players
+            or player_id == game_room.game_state['current_guesser']):
+        return
+    if audience.vote(request.sid, game_room.game_state['current_round'], player_id):
+        schedule_audience_update(room_code)
+
+def stop_spectating(sid):
+    """Take a SID out of the audience it was in, if any"""
+    room_code = audience.remove(sid)
+    if room_code is not None:
+        exit_room(sid, room_code)
+        schedule_audience_update(room_code)
+
+def schedule_audience_update(room_code):
+    """Publish the room's audience summary once the current batch window closes.
+    However many spectators join, leave or vote meanwhile, the room gets one emit."""
+    if not scheduler.pending(('audience', room_code)):
+        scheduler.schedule(('audience', room_code), AUDIENCE_UPDATE_INTERVAL, send_audience_update, room_code)
+
+def send_audience_update(room_code):
+    update = audience.drain(room_code)
+    if update is not None and room_code in game_rooms:
+        send_event('audience_update', update, to=room_code)
+
+def send_roster_delta(room_code):
+    """Send the room's roster changes since the last delta, if any"""
+    delta = game_rooms[room_code].drain_roster_delta()
+    if delta is not None:
+        send_event('roster_delta', delta, to=room_code)
+
+def send_roster(room_code):
+    """Send the requesting player the full roster, after the room gets any pending
+    delta. The player ignores deltas the roster already covers."""
+    send_roster_delta(room_code)
+    send_event('roster', game_rooms[room_code].get_roster())
+
+def role_room(room_code, role):
+    """Socket.IO room holding every player in `room_code` who currently has `role`"""
+    return f"{room_code}:{role}"
+
+def sync_role_room(room_code, player_id, role):
+    """Move a player's socket into the room for their current role"""
+    sid = player_sessions.get_sid(room_code, player_id)
+    if sid is None:
+        return
+    session = player_sessions[sid]
+    target = role_room(room_code, role)
+    if session.get('role_room') != target:
+        if session.get('role_room'):
+            exit_room(sid, session['role_room'])
+        enter_room(sid, target)
+        session['role_room'] = target
+
+def broadcast_round_state(room_code, event, **extra):
+    """Send a full round snapshot: the shared state once to the whole room, then
+    one small overlay per role. Clients merge the two and handle it as `event`."""
+    game_room = game_rooms[room_code]
+    for player in game_room.players.values():
+        sync_role_room(room_code, player.id, player.role)
+
+    send_event('state_base', dict(extra, event=event, state=game_room.get_public_state()), to=room_code)
+    for role in ROLES:
+        send_event('state_overlay', game_room.get_role_overlay(role), to=role_room(room_code, role))
 
 @app.route('/room_status/<room_code>', methods=['GET'])
 def get_room_status(room_code):
     """Get the status of a room and list of players"""
     if room_code not in game_rooms:
+        if not owns_room(room_code):
+            payload, status = fetch_from_owner(room_code, 'GET', request.path)
+            return jsonify(payload), status
         return jsonify({'error': 'Room not found'}), 404
 
     game_room = game_rooms[room_code]
@@ -594,8 +1276,8 @@ def get_room_status(room_code):
             'name': player.name,
             'id': player.id,
             'points': player.points,
-            'is_disconnected': getattr(player, 'is_disconnected', False),
-            'disconnect_time': getattr(player, 'disconnect_time', None)
+            'is_disconnected': player.is_disconnected,
+            'disconnect_time': player.disconnect_time
         })
 
     return jsonify({
@@ -603,11 +1285,18 @@ def get_room_status(room_code):
         'status': game_room.game_state['status'],
         'current_round': game_room.game_state['current_round'],
         'total_players': len(game_room.players),
-        'connected_players': len([p for p in game_room.players.values() if not getattr(p, 'is_disconnected', False)]),
-        'disconnected_players': [p.name for p in game_room.players.values() if getattr(p, 'is_disconnected', False)],
+        'connected_players': game_room.connected_count,
+        'disconnected_players': [p.name for p in game_room.players.values() if p.is_disconnected],
         'players': players_info
     })
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Serve this worker's metrics in Prometheus text format, to local scrapers unless METRICS_PUBLIC is set"""
+    if not METRICS_PUBLIC and client_address() not in ('127.0.0.1', '::1'):
+        return jsonify({'error': 'Forbidden'}), 403
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5003))
     debug = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
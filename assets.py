@@ -0,0 +1,97 @@
+"""Static assets served under content-hashed names.
+
+At startup each file in ASSETS that exists is read once and named after its
+content hash (js/game.js becomes js/game.3f2a9c1b0d4e.js). It is compressed
+once with brotli and once with gzip. The app serves whichever variant the
+browser accepts with far-future cache headers, so a browser keeps each file
+until its content, and with it its name, changes. The GENERATED files (compiled Tailwind CSS,
+vendored Socket.IO client) come from `python build_assets.py`, which every
+deploy must run: the app will not start without them.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+import brotli
+
+# Files under static/ served through the store, when present
+ASSETS = (
+    'css/tailwind.min.css',
+    'vendor/socket.io.min.js',
+    'js/msgpack.js',
+    'js/game.js',
+)
+# Files build_assets.py writes
+GENERATED = ('css/tailwind.min.css', 'vendor/socket.io.min.js')
+# Compressed variants, in order of preference
+ENCODINGS = ('br', 'gzip')
+CACHE_FOREVER = 'public, max-age=31536000, immutable'
+
+
+def hashed_name(name, content):
+    """`name` with a hash of `content` before its extension"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def unbuilt(root):
+    """GENERATED files missing under `root`"""
+    return [name for name in GENERATED if not os.path.exists(os.path.join(root, name))]
+
+
+def accepted_encodings(header):
+    """Content codings an Accept-Encoding header allows (those without q=0)"""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        try:
+            weight = float(params[2:]) if params.startswith('q=') else 1
+        except ValueError:
+            weight = 1
+        if coding.strip() and weight > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class AssetStore:
+    """Asset bodies in memory by hashed name, each with its compressed variants"""
+
+    def __init__(self, root, names=ASSETS):
+        self.urls = {}   # name -> hashed name
+        self.files = {}  # hashed name -> (mimetype, {encoding or None: body})
+        for name in names:
+            path = os.path.join(root, name)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                content = f.read()
+            variants = {None: content}
+            for encoding in ENCODINGS:
+                compressed = self._compress(encoding, content)
+                if len(compressed) < len(content):
+                    variants[encoding] = compressed
+            hashed = hashed_name(name, content)
+            self.urls[name] = hashed
+            self.files[hashed] = (mimetypes.guess_type(name)[0] or 'application/octet-stream', variants)
+
+    @staticmethod
+    def _compress(encoding, content):
+        if encoding == 'br':
+            return brotli.compress(content, quality=11)
+        return gzip.compress(content, compresslevel=9, mtime=0)
+
+    def __contains__(self, name):
+        return name in self.urls
+
+    def get(self, hashed, accept_encoding=''):
+        """The best variant of a hashed file for an Accept-Encoding header, as
+        (mimetype, encoding or None, body), or None for an unknown name"""
+        found = self.files.get(hashed)
+        if found is None:
+            return None
+        mimetype, variants = found
+        accepted = accepted_encodings(accept_encoding)
+        encoding = next((e for e in ENCODINGS if e in accepted and e in variants), None)
+        return mimetype, encoding, variants[encoding]
@@ -0,0 +1,103 @@
+from collections import Counter
+
+
+class Audience:
+    """Spectators watching each room, and their votes on who the truth-teller is.
+
+    Joining, leaving and voting only update counters here. Callers publish
+    summary() to the room on a timer, so a room with hundreds of spectators
+    costs one emit per batch rather than one per vote.
+    """
+
+    def __init__(self):
+        self._by_sid = {}   # sid -> room_code
+        self._rooms = {}    # room_code -> {sids, round, votes: {sid: player_id}, tally, changed}
+
+    def __contains__(self, sid):
+        return sid in self._by_sid
+
+    def __len__(self):
+        return len(self._by_sid)
+
+    def room_of(self, sid):
+        return self._by_sid.get(sid)
+
+    def count(self, room_code):
+        room = self._rooms.get(room_code)
+        return len(room['sids']) if room else 0
+
+    def add(self, sid, room_code):
+        """Start watching a room, leaving any room the SID was watching before"""
+        self.remove(sid)
+        room = self._rooms.get(room_code)
+        if room is None:
+            room = self._rooms[room_code] = {'sids': set(), 'round': 0, 'votes': {}, 'tally': Counter(),
+                                             'changed': False}
+        room['sids'].add(sid)
+        room['changed'] = True
+        self._by_sid[sid] = room_code
+
+    def remove(self, sid):
+        """Stop watching, withdrawing any vote. Returns the room code, or None if the SID was not watching."""
+        room_code = self._by_sid.pop(sid, None)
+        if room_code is None:
+            return None
+        room = self._rooms[room_code]
+        room['sids'].discard(sid)
+        self._withdraw_vote(room, sid)
+        room['changed'] = True  # kept, even if empty, until drain() has published the change
+        return room_code
+
+    def remove_room(self, room_code):
+        """Forget a room's spectators. Returns their SIDs."""
+        room = self._rooms.pop(room_code, None)
+        if room is None:
+            return set()
+        for sid in room['sids']:
+            del self._by_sid[sid]
+        return room['sids']
+
+    def vote(self, sid, round_number, player_id):
+        """Record a spectator's pick for this round, replacing their earlier one.
+        A vote for a later round starts a fresh tally. Returns False if the vote was ignored."""
+        room_code = self._by_sid.get(sid)
+        if room_code is None:
+            return False
+        room = self._rooms[room_code]
+        if round_number < room['round']:
+            return False
+        if round_number > room['round']:
+            room['round'] = round_number
+            room['votes'] = {}
+            room['tally'] = Counter()
+        self._withdraw_vote(room, sid)
+        room['votes'][sid] = player_id
+        room['tally'][player_id] += 1
+        room['changed'] = True
+        return True
+
+    def summary(self, room_code):
+        """Spectator count and this round's votes as {'spectators', 'round', 'votes': {player_id: count}}"""
+        room = self._rooms.get(room_code)
+        if room is None:
+            return {'spectators': 0, 'round': 0, 'votes': {}}
+        return {'spectators': len(room['sids']), 'round': room['round'], 'votes': dict(room['tally'])}
+
+    def drain(self, room_code):
+        """Get summary() if anything changed since the last drain, else None"""
+        room = self._rooms.get(room_code)
+        if room is None or not room['changed']:
+            return None
+        room['changed'] = False
+        summary = self.summary(room_code)
+        if not room['sids']:
+            del self._rooms[room_code]
+        return summary
+
+    @staticmethod
+    def _withdraw_vote(room, sid):
+        player_id = room['votes'].pop(sid, None)
+        if player_id is not None:
+            room['tally'][player_id] -= 1
+            if not room['tally'][player_id]:
+                del room['tally'][player_id]
@@ -0,0 +1,84 @@
+"""Server cost of one public event as a room's audience grows.
+
+Spectators share the room's Socket.IO room, so an event is encoded once per
+codec and each socket only gets the ready-made packet queued. This times
+send_event() to the room against the per-viewer loop it replaces, with the
+socket writes themselves stubbed out, for audiences of 10 to 2000.
+
+    python benchmarks/audience_bench.py [--events 200]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SNAPSHOT_DB', '')  # keep the benchmark from writing snapshots
+os.environ.setdefault('ASSET_PIPELINE', 'false')  # runs without the built page assets
+os.environ.setdefault('EMIT_BATCH_INTERVAL', '-1')  # time the emits themselves, not queueing them
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app  # noqa: E402
+from main import Player  # noqa: E402
+
+AUDIENCE_SIZES = (10, 100, 500, 2000)
+
+
+def build_room(spectators):
+    room_code = f'BENCH{spectators}'
+    game_room = app.GameRoom(room_code, seed=spectators)
+    for player_id in range(1, 7):
+        game_room.add_player(Player(player_id, f'Player {player_id}'))
+    game_room.start_game()
+    app.game_rooms[room_code] = game_room
+
+    manager = app.socketio.server.manager
+    sids = []
+    for index in range(spectators):
+        sid = manager.connect(f'eio-{room_code}-{index}', '/')
+        # Every other spectator takes msgpack, so both codecs are in use
+        app.client_codecs[sid] = app.BINARY_CODECS[0] if index % 2 and app.BINARY_CODECS else app.JSON
+        app.audience.add(sid, room_code)
+        app.enter_room(sid, room_code)
+        sids.append(sid)
+    return room_code, game_room, sids
+
+
+def per_event_us(send, events):
+    started = time.perf_counter()
+    for _ in range(events):
+        send()
+    return (time.perf_counter() - started) / events * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200)
+    args = parser.parse_args()
+
+    packets = [0]
+
+    def count_packet(eio_sid, pkt):
+        packets[0] += 1
+    app.socketio.server._send_eio_packet = count_packet
+
+    print(f"{'spectators':>10} {'room emit us':>13} {'us/viewer':>10} {'per-viewer loop us':>19} {'packets/event':>14}")
+    for spectators in AUDIENCE_SIZES:
+        room_code, game_room, sids = build_room(spectators)
+        payload = {'event': 'new_round', 'state': game_room.get_public_state()}
+
+        packets[0] = 0
+        shared = per_event_us(lambda: app.send_event('state_base', payload, to=room_code), args.events)
+        per_event_packets = packets[0] / args.events
+
+        def per_viewer():
+            for sid in sids:
+                app.send_event('state_base', payload, to=sid)
+        looped = per_event_us(per_viewer, max(1, args.events // 10))
+        print(f"{spectators:>10} {shared:>13.1f} {shared / spectators:>10.2f} {looped:>19.1f} {per_event_packets:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Time from pressing Create or Join to seeing the room, over a link with simulated latency.
+
+The old flow is HTTP calls followed by a join_game event answered by
+game_state: POST /create_room for a host, and GET /room_status then POST
+/join_room for a guest. The new flow is one acknowledged create_room or join
+Socket.IO call. A local proxy delays every chunk by half the round-trip time
+in each direction. Sockets are connected and HTTP connections kept alive
+before timing starts, as in a loaded page.
+
+    python benchmarks/join_bench.py [--rtt 0 100 300] [--trials 10]
+"""
+import argparse
+import heapq
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import requests
+
+from loadtest import BotClient, start_server
+
+
+class LatencyProxy:
+    """TCP proxy that delivers each chunk `delay` seconds after reading it"""
+
+    def __init__(self, target_port, delay):
+        self.target_port = target_port
+        self.delay = delay
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self.listener.accept()
+            upstream = socket.create_connection(('127.0.0.1', self.target_port))
+            for source, sink in ((client, upstream), (upstream, client)):
+                source.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._pipe(source, sink)
+
+    def _pipe(self, source, sink):
+        pending = []  # heap of (deliver at, sequence, chunk)
+        ready = threading.Condition()
+
+        def read():
+            sequence = 0
+            while True:
+                try:
+                    chunk = source.recv(65536)
+                except OSError:
+                    chunk = b''
+                with ready:
+                    heapq.heappush(pending, (time.monotonic() + self.delay, sequence, chunk))
+                    ready.notify()
+                sequence += 1
+                if not chunk:
+                    return
+
+        def write():
+            while True:
+                with ready:
+                    while not pending or pending[0][0] > time.monotonic():
+                        ready.wait(pending[0][0] - time.monotonic() if pending else None)
+                    _, _, chunk = heapq.heappop(pending)
+                try:
+                    if not chunk:
+                        sink.shutdown(socket.SHUT_WR)
+                        return
+                    sink.sendall(chunk)
+                except OSError:
+                    return
+
+        threading.Thread(target=read, daemon=True).start()
+        threading.Thread(target=write, daemon=True).start()
+
+
+def connected_client(url):
+    client = BotClient()
+    client.connect(url, transports=['websocket'])
+    return client
+
+
+def old_join(url, http, room_code, name):
+    """HTTP checks, then join_game answered by game_state. Returns seconds."""
+    client = connected_client(url)
+    arrived = threading.Event()
+    client.on('game_state', lambda state: arrived.set())
+    started = time.perf_counter()
+    if room_code is None:
+        room_code = http.post(url + '/create_room', json={'name': name}, timeout=10).json()['room_code']
+    else:
+        http.get(f'{url}/room_status/{room_code}', timeout=10)
+        http.post(f'{url}/join_room/{room_code}', json={'name': name}, timeout=10)
+    client.emit('join_game', {'room_code': room_code, 'name': name})
+    arrived.wait(10)
+    elapsed = time.perf_counter() - started
+    client.disconnect()
+    return elapsed, room_code
+
+
+def new_join(url, http, room_code, name):
+    """One acknowledged create_room or join call. Returns seconds."""
+    client = connected_client(url)
+    started = time.perf_counter()
+    if room_code is None:
+        reply = client.call('create_room', {'name': name}, timeout=10)
+    else:
+        reply = client.call('join', {'room_code': room_code, 'name': name}, timeout=10)
+    elapsed = time.perf_counter() - started
+    client.disconnect()
+    return elapsed, reply['room_code']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt', type=float, nargs='+', default=[0, 100, 300], help='round-trip times in ms')
+    parser.add_argument('--trials', type=int, default=10)
+    parser.add_argument('--port', type=int, default=7098)
+    args = parser.parse_args()
+
+    proxies = {}
+    for rtt in args.rtt:
+        proxies[rtt] = LatencyProxy(args.port, rtt / 2000)
+    # Clients send the proxy's URL as the WebSocket Origin
+    os.environ['ALLOWED_ORIGINS'] = ','.join(f'http://127.0.0.1:{proxy.port}' for proxy in proxies.values())
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        server, _ = start_server(args.port, snapshot_dir, -1)
+        try:
+            print(f"{'rtt ms':>6} {'flow':>5} {'create p50 ms':>14} {'join p50 ms':>12} {'join max ms':>12}")
+            for rtt, proxy in proxies.items():
+                url = f'http://127.0.0.1:{proxy.port}'
+                http = requests.Session()
+                http.get(url + '/', timeout=10)  # keep-alive connection, as after loading the page
+                for label, join in (('old', old_join), ('new', new_join)):
+                    creates, joins = [], []
+                    for trial in range(args.trials):
+                        elapsed, room_code = join(url, http, None, f'host{trial}')
+                        creates.append(elapsed)
+                        elapsed, _ = join(url, http, room_code, f'guest{trial}')
+                        joins.append(elapsed)
+                    print(f"{rtt:>6.0f} {label:>5} {statistics.median(creates) * 1000:>14.1f} "
+                          f"{statistics.median(joins) * 1000:>12.1f} {max(joins) * 1000:>12.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
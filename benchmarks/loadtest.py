@@ -0,0 +1,404 @@
+"""Load generator: simulated rooms of bot players driving a local server over Socket.IO.
+
+Each room's bots create the room, join, start, then play full games (guess,
+end turn early, skip questions) and restart when a game ends, until the run
+time is up. Reports events per second, p50/p99 round-trip latency per event
+type, Socket.IO frames per event and server memory and CPU per room, and fails
+if throughput drops more than `--tolerance` below the stored baseline for the
+same room shape.
+
+    python benchmarks/loadtest.py --rooms 50 --players 4 --duration 30
+    python benchmarks/loadtest.py --rooms 50 --players 4 --save-baseline
+
+Without `--url` the app is started on `--port` in a single gevent process, with
+the round result delay set to zero and emits batched every `--batch-interval`
+seconds (negative sends each emit on its own). Use `--processes` to spread
+bots over several generator processes for thousands of rooms.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import engineio
+import requests
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The bots act as fast as replies arrive, well past a human's pace, so the rate limits are lifted
+_UNLIMITED = 'create_room=1e6/1e6,join=1e6/1e6,join_game=1e6/1e6,start_game=1e6/1e6,make_guess=1e6/1e6,end_turn=1e6/1e6,' \
+             'skip_question=1e6/1e6,restart_game=1e6/1e6,connect=1e6/1e6'
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loadtest_baseline.json')
+
+# Event a client sends -> the reply that completes its round trip
+REPLIES = {
+    'join_game': 'game_state',
+    'start_game': 'state_overlay',
+    'make_guess': 'guess_result',
+    'end_turn': 'turn_ended_early',
+    'skip_question': 'question_skipped',
+    'restart_game': 'game_restarted',
+}
+
+
+class _OrderedEngineIOClient(engineio.Client):
+    """Handles each message on the read loop instead of a new thread, so a bot
+    sees its events (and binary attachments) in the order they were sent"""
+
+    def _trigger_event(self, event, *args, **kwargs):
+        kwargs['run_async'] = False
+        return super()._trigger_event(event, *args, **kwargs)
+
+
+class BotClient(socketio.Client):
+    def _engineio_client_class(self):
+        return _OrderedEngineIOClient
+
+
+class Stats:
+    """Counters and latency samples shared by the bots of one generator process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.received = 0
+        self.frames = 0
+        self.errors = 0
+        self.games = 0
+        self.latencies = {event: [] for event in REPLIES}
+
+    def as_dict(self):
+        with self.lock:
+            return {'sent': self.sent, 'received': self.received, 'frames': self.frames, 'errors': self.errors,
+                    'games': self.games, 'latencies': {k: list(v) for k, v in self.latencies.items()}}
+
+
+class Room:
+    def __init__(self, size):
+        self.size = size
+        self.code = None
+        self.joined = 0
+        self.lock = threading.Lock()
+
+
+class Bot:
+    """One simulated player. The first bot in a room is its host."""
+
+    def __init__(self, url, room, name, is_host, stats, deadline, codec):
+        self.url = url
+        self.room = room
+        self.name = name
+        self.is_host = is_host
+        self.stats = stats
+        self.deadline = deadline
+        self.codec = codec
+        self.player_id = None
+        self.players = []     # ids of everyone in the room
+        self.guessed = set()  # ids guessed this round
+        self.pending = {}     # reply event -> (sent event, send time)
+        self.skipping = False
+        self.sio = BotClient(reconnection=False)
+        self.sio.on('*', self.on_frame)
+
+    def connect(self):
+        auth = {'codecs': [self.codec]} if self.codec != 'json' else None
+        self.sio.connect(self.url, transports=['websocket'], auth=auth, wait_timeout=10)
+
+    def send(self, event, data):
+        if time.monotonic() >= self.deadline:
+            return
+        if event in REPLIES:
+            self.pending[REPLIES[event]] = (event, time.perf_counter())
+        with self.stats.lock:
+            self.stats.sent += 1
+        try:
+            self.sio.emit(event, data)
+        except socketio.exceptions.SocketIOError:
+            with self.stats.lock:
+                self.stats.errors += 1
+
+    def on_frame(self, event, data=None):
+        """One Socket.IO message, which may be a batch of several events"""
+        with self.stats.lock:
+            self.stats.frames += 1
+        if isinstance(data, bytes):
+            import msgpack
+            data = msgpack.unpackb(data, strict_map_key=False)
+        if event == 'batch':
+            for batched_event, batched_data in data:
+                self.on_event(batched_event, batched_data)
+        else:
+            self.on_event(event, data)
+
+    def on_event(self, event, data=None):
+        received = time.perf_counter()
+        with self.stats.lock:
+            self.stats.received += 1
+            sent = self.pending.pop(event, None)
+            if sent is not None:
+                self.stats.latencies[sent[0]].append((received - sent[1]) * 1000)
+            if event == 'error':
+                self.stats.errors += 1
+        handler = getattr(self, 'on_' + event, None)
+        if handler is not None:
+            handler(data or {})
+
+    def on_game_state(self, state):
+        self.player_id = state.get('player_id', self.player_id)
+        with self.room.lock:
+            self.room.joined += 1
+            ready = self.room.joined == self.room.size
+        if ready:
+            self.room.host.send('start_game', {'room_code': self.room.code})
+
+    def on_state_base(self, base):
+        self.players = [int(pid) for pid in base['state']['players']]
+
+    def on_state_overlay(self, overlay):
+        self.guessed = set()
+        if overlay['role'] == 'guesser':
+            self.take_turn()
+
+    def on_guess_result(self, result):
+        # Only the guesser has guessed anyone this round
+        if self.guessed and not result.get('round_ended'):
+            self.take_turn()
+
+    def on_question_skipped(self, result):
+        if self.skipping:
+            self.skipping = False
+            self.take_turn(allow_skip=False)
+
+    def on_game_over(self, results):
+        if self.is_host:
+            with self.stats.lock:
+                self.stats.games += 1
+            self.send('restart_game', {'room_code': self.room.code})
+
+    def on_game_restarted(self, _):
+        if self.is_host:
+            self.send('start_game', {'room_code': self.room.code})
+
+    def take_turn(self, allow_skip=True):
+        """Act as the guesser: mostly guess, sometimes skip or end the turn early"""
+        roll = random.random()
+        if allow_skip and not self.guessed and roll < 0.1:
+            self.skipping = True
+            self.send('skip_question', {'room_code': self.room.code})
+            return
+        if self.guessed and roll < 0.25:
+            self.send('end_turn', {'room_code': self.room.code})
+            return
+        candidates = [pid for pid in self.players if pid != self.player_id and pid not in self.guessed]
+        if not candidates:
+            return
+        target = random.choice(candidates)
+        self.guessed.add(target)
+        self.send('make_guess', {'room_code': self.room.code, 'guessed_player_id': target})
+
+
+def run_rooms(url, rooms, players, duration, codec, results):
+    """Run `rooms` rooms of `players` bots each and put this process's stats on `results`"""
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    bots = []
+    for index in range(rooms):
+        room = Room(players)
+        room_bots = [Bot(url, room, f'bot{index}-{n}', n == 0, stats, deadline, codec) for n in range(players)]
+        room.host = room_bots[0]
+        try:
+            room.code = requests.post(url + '/create_room', json={'name': room.host.name}, timeout=10).json()['room_code']
+            for bot in room_bots:
+                bot.connect()
+                bot.send('join_game', {'room_code': room.code, 'name': bot.name})
+        except (requests.RequestException, socketio.exceptions.ConnectionError, KeyError, ValueError):
+            with stats.lock:
+                stats.errors += 1
+            continue
+        bots.extend(room_bots)
+
+    time.sleep(max(0.0, deadline - time.monotonic()))
+    # Disconnecting races with events still arriving for that bot; those are dropped quietly
+    logging.getLogger('engineio.client').setLevel(logging.CRITICAL)
+    for bot in bots:
+        bot.sio.disconnect()
+    results.put(stats.as_dict())
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def rss_kb(pid):
+    """Resident memory of a process in KB (Linux only; None elsewhere)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time a process has used (Linux only; None elsewhere)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def start_server(port, snapshot_dir, batch_interval):
+    url = f'http://127.0.0.1:{port}'
+    # Bots send their own URL as the WebSocket Origin
+    origins = ','.join(filter(None, [os.environ.get('ALLOWED_ORIGINS'), url]))
+    env = dict(os.environ, PORT=str(port), ALLOWED_ORIGINS=origins, ROUND_RESULT_DELAY='0', FLASK_DEBUG='false',
+               SNAPSHOT_DB=os.path.join(snapshot_dir, 'snapshots.sqlite3'), ASSET_PIPELINE='false',
+               EMIT_BATCH_INTERVAL=str(batch_interval), RATE_LIMITS=_UNLIMITED)
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            requests.get(url + '/', timeout=1)
+            return server, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit('Server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate rooms of bot players against a Something Fishy server')
+    parser.add_argument('--rooms', type=int, default=20)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20, help='seconds of play')
+    parser.add_argument('--processes', type=int, default=1, help='bot generator processes')
+    parser.add_argument('--codec', choices=('json', 'msgpack'), default='json')
+    parser.add_argument('--batch-interval', type=float, default=0,
+                        help='seconds the started server holds emits to batch them (negative disables)')
+    parser.add_argument('--url', help='use an already running server instead of starting one')
+    parser.add_argument('--port', type=int, default=7099)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed fractional throughput drop')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    snapshot_dir = tempfile.mkdtemp()  # a fresh snapshot file, so no rooms are restored
+    if url is None:
+        server, url = start_server(args.port, snapshot_dir, args.batch_interval)
+    pid = server.pid if server else None
+    rss_before = rss_kb(pid) if pid else None
+    cpu_before = cpu_seconds(pid) if pid else None
+
+    try:
+        results = multiprocessing.Queue()
+        shares = [args.rooms // args.processes + (1 if i < args.rooms % args.processes else 0)
+                  for i in range(args.processes)]
+        procs = [multiprocessing.Process(target=run_rooms,
+                                         args=(url, share, args.players, args.duration, args.codec, results))
+                 for share in shares if share]
+        started = time.monotonic()
+        for proc in procs:
+            proc.start()
+        parts = [results.get(timeout=args.duration + 120) for _ in procs]
+        elapsed = time.monotonic() - started
+        rss_after = rss_kb(pid) if pid else None
+        cpu_after = cpu_seconds(pid) if pid else None
+        for proc in procs:
+            proc.join()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(snapshot_dir)
+
+    latencies = {event: [] for event in REPLIES}
+    for part in parts:
+        for event, samples in part['latencies'].items():
+            latencies[event].extend(samples)
+    received = sum(p['received'] for p in parts)
+    sent = sum(p['sent'] for p in parts)
+    frames = sum(p['frames'] for p in parts)
+    report = {
+        'rooms': args.rooms,
+        'players': args.players,
+        'codec': args.codec,
+        'seconds': round(elapsed, 2),
+        'events_per_sec': round((sent + received) / elapsed, 1),
+        'sent': sent,
+        'received': received,
+        'frames_received': frames,
+        'events_per_frame': round(received / frames, 2) if frames else None,
+        'server_cpu_ms_per_1k_events': (round((cpu_after - cpu_before) * 1e6 / (sent + received), 1)
+                                        if cpu_before is not None and cpu_after is not None and sent + received
+                                        else None),
+        'errors': sum(p['errors'] for p in parts),
+        'games_finished': sum(p['games'] for p in parts),
+        'memory_per_room_kb': (round((rss_after - rss_before) / args.rooms, 1)
+                               if rss_before is not None and rss_after is not None else None),
+        'latency_ms': {event: {'count': len(samples),
+                               'p50': round(percentile(samples, 50), 2) if samples else None,
+                               'p99': round(percentile(samples, 99), 2) if samples else None}
+                       for event, samples in latencies.items()},
+    }
+
+    print(f"{args.rooms} rooms x {args.players} players ({args.codec}) for {report['seconds']}s")
+    print(f"  events/sec {report['events_per_sec']}  (sent {sent}, received {received}, "
+          f"errors {report['errors']}, games finished {report['games_finished']})")
+    print(f"  frames received {frames} ({report['events_per_frame']} events per frame)")
+    if report['server_cpu_ms_per_1k_events'] is not None:
+        print(f"  server CPU per 1000 events {report['server_cpu_ms_per_1k_events']} ms")
+    if report['memory_per_room_kb'] is not None:
+        print(f"  server memory per room {report['memory_per_room_kb']} KB")
+    print(f"  {'event':<14} {'count':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for event, row in report['latency_ms'].items():
+        if row['count']:
+            print(f"  {event:<14} {row['count']:>7} {row['p50']:>8} {row['p99']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    key = f"{args.rooms}x{args.players}:{args.codec}"
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines[key] = {'events_per_sec': report['events_per_sec']}
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline for {key}")
+        return 0
+
+    if key in baselines:
+        floor = baselines[key]['events_per_sec'] * (1 - args.tolerance)
+        if report['events_per_sec'] < floor:
+            print(f"FAIL: {report['events_per_sec']} events/sec is below the baseline floor of {floor:.1f}")
+            return 1
+        print(f"OK: within {args.tolerance:.0%} of the baseline ({baselines[key]['events_per_sec']} events/sec)")
+    else:
+        print(f"No baseline for {key}; run with --save-baseline to record one")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
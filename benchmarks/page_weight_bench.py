@@ -0,0 +1,83 @@
+"""What loading the page costs, with and without the asset pipeline.
+
+Fetches the page through Flask's test client, once with ASSET_PIPELINE=false
+(scripts from /static as-is, Tailwind and Socket.IO from CDNs) and once with
+it on. Reports:
+- bytes on the wire for the page's own files, accepting gzip and brotli;
+- requests to other origins that block the first paint (stylesheets and
+  scripts in <head>), which cannot be measured here;
+- requests a repeat visit makes for files the browser must revalidate.
+Render timing itself needs a real browser and is not measured. Run
+build_assets.py first: with the pipeline on the app does not start without
+its outputs.
+
+    python benchmarks/page_weight_bench.py
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAG = re.compile(r'<(script|link)\b([^>]*)>', re.I)
+ATTR = re.compile(r'([\w-]+)="([^"]*)"')
+
+
+def measure():
+    """Load the page in this process and report its weight as a dict"""
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('SNAPSHOT_DB', '')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    client = app.app.test_client()
+    html = client.get('/').get_data(as_text=True)
+    head_end = html.index('</head>')
+
+    report = {'html_bytes': len(html.encode()), 'local_bytes': 0, 'local_files': 0,
+              'blocking_external': [], 'revalidated_on_repeat': 0}
+    for match in TAG.finditer(html):
+        attrs = dict(ATTR.findall(match.group(2)))
+        url = attrs.get('src') if match.group(1).lower() == 'script' else attrs.get('href')
+        if not url or (match.group(1).lower() == 'link' and attrs.get('rel') != 'stylesheet'):
+            continue
+        if url.startswith('http'):
+            if match.start() < head_end:
+                report['blocking_external'].append(url)
+            continue
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+        report['local_bytes'] += len(response.get_data())
+        report['local_files'] += 1
+        if 'immutable' not in response.headers.get('Cache-Control', ''):
+            report['revalidated_on_repeat'] += 1
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(measure()))
+        return
+
+    print(f"{'pipeline':>8} {'html B':>7} {'own files':>9} {'own B on wire':>13} "
+          f"{'blocking 3rd-party':>18} {'repeat-visit revalidations':>26}")
+    for pipeline in ('false', 'true'):
+        env = dict(os.environ, ASSET_PIPELINE=pipeline, SNAPSHOT_DB='')
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure'], env=env, cwd=ROOT,
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise SystemExit(result.stderr.strip().splitlines()[-1])
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{pipeline:>8} {report['html_bytes']:>7} {report['local_files']:>9} {report['local_bytes']:>13} "
+              f"{len(report['blocking_external']):>18} {report['revalidated_on_repeat']:>26}")
+        for url in report['blocking_external']:
+            print(f"{'':>8}   blocking: {url}")
+
+
+if __name__ == '__main__':
+    main()
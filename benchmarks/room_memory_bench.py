@@ -0,0 +1,53 @@
+"""Memory held per room and per player, measured with tracemalloc.
+
+Builds rooms mid-game (one guess made) and reports the bytes allocated for
+them, so changes to the Player and GameRoom layout show up directly.
+
+    python benchmarks/room_memory_bench.py [--rooms 1000]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import GameRoom, Player, question_bank  # noqa: E402
+
+PLAYER_COUNTS = (4, 12, 50)
+
+
+def build_room(index, players):
+    room = GameRoom(f'R{index:05d}', seed=index)
+    for player_id in range(1, players + 1):
+        room.add_player(Player(player_id, f'Player {player_id}'))
+    room.start_game()
+    liar = next(p for p in room.players.values() if p.is_liar())
+    room.process_guess(room.game_state['current_guesser'], liar.id)
+    room.get_public_state()
+    return room
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=1000)
+    args = parser.parse_args()
+
+    len(question_bank)  # loaded at import, outside the measurement
+    print(f"{'players':>8} {'bytes/room':>11} {'bytes/player':>13}")
+    previous = None
+    for players in PLAYER_COUNTS:
+        tracemalloc.start()
+        rooms = [build_room(index, players) for index in range(args.rooms)]
+        allocated, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        per_room = allocated / len(rooms)
+        # Marginal cost of one more player, including their entries in the room's dicts
+        per_player = f"{(per_room - previous[1]) / (players - previous[0]):.0f}" if previous else '-'
+        print(f"{players:>8} {per_room:>11.0f} {per_player:>13}")
+        previous = (players, per_room)
+        del rooms
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Server cost of keeping waiting-room player lists in sync, per-player events vs the roster.
+
+Before the roster, a newcomer got one player_joined per seated player and the
+room got another for the newcomer, and a restart sent the room one
+player_rejoined per player. Now the room gets one roster_delta and the
+newcomer one roster snapshot, and a restart sends one roster. This fills a
+room seat by seat and restarts it both ways, with the socket writes stubbed
+out, for rooms of 10, 50 and 200 players.
+
+    python benchmarks/roster_bench.py [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SNAPSHOT_DB', '')  # keep the benchmark from writing snapshots
+os.environ.setdefault('ASSET_PIPELINE', 'false')  # runs without the built page assets
+os.environ.setdefault('EMIT_BATCH_INTERVAL', '-1')  # time the emits themselves, not queueing them
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app  # noqa: E402
+from main import Player  # noqa: E402
+
+ROOM_SIZES = (10, 50, 200)
+
+
+def per_player_join(game_room, player, sid):
+    """The events a join used to send"""
+    for existing in game_room.players.values():
+        if existing.id != player.id:
+            app.send_event('player_joined', {'player': existing.to_dict(),
+                                             'message': f'{existing.name} is in the room'}, to=sid)
+    app.send_event('player_joined', {'player': player.to_dict(),
+                                     'message': f'{player.name} has joined the game'}, to=game_room.room_code)
+
+
+def roster_join(game_room, player, sid):
+    app.send_roster_delta(game_room.room_code)
+    app.send_event('roster', game_room.get_roster(), to=sid)
+
+
+def per_player_restart(game_room):
+    for player in game_room.players.values():
+        app.send_event('player_rejoined', {'player': {'id': player.id, 'name': player.name}},
+                       to=game_room.room_code)
+
+
+def roster_restart(game_room):
+    app.send_event('roster', game_room.get_roster(), to=game_room.room_code)
+
+
+def fill_and_restart(players, join, restart, label):
+    """Seat `players` players one by one, then restart. Returns the seconds spent in
+    join and restart emits."""
+    room_code = f'{label}{players}'
+    game_room = app.GameRoom(room_code, seed=players)
+    app.game_rooms[room_code] = game_room
+    manager = app.socketio.server.manager
+    join_seconds = 0
+    for player_id in range(1, players + 1):
+        player = Player(player_id, f'Player {player_id}')
+        game_room.add_player(player)
+        sid = manager.connect(f'eio-{room_code}-{player_id}', '/')
+        app.client_codecs[sid] = app.JSON
+        app.enter_room(sid, room_code)
+        started = time.perf_counter()
+        join(game_room, player, sid)
+        join_seconds += time.perf_counter() - started
+
+    started = time.perf_counter()
+    restart(game_room)
+    restart_seconds = time.perf_counter() - started
+
+    for sid in list(manager.get_participants('/', room_code)):
+        manager.disconnect(sid[0], '/')
+    del app.game_rooms[room_code]
+    return join_seconds, restart_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    sent = {'packets': 0, 'bytes': 0}
+
+    def count_packet(eio_sid, pkt):
+        sent['packets'] += 1
+        encoded = pkt.encode()
+        sent['bytes'] += len(encoded) if isinstance(encoded, (bytes, str)) else sum(map(len, encoded))
+    app.socketio.server._send_eio_packet = count_packet
+
+    print(f"{'players':>7} {'protocol':>10} {'fill ms':>8} {'restart ms':>11} {'packets':>9} "
+          f"{'KB':>9} {'newcomer msgs':>14}")
+    for players in ROOM_SIZES:
+        for label, join, restart, newcomer_msgs in (
+                ('per-player', per_player_join, per_player_restart, players),
+                ('roster', roster_join, roster_restart, 2)):
+            sent['packets'] = sent['bytes'] = 0
+            join_total = restart_total = 0
+            for _ in range(args.repeat):
+                join_seconds, restart_seconds = fill_and_restart(players, join, restart, label)
+                join_total += join_seconds
+                restart_total += restart_seconds
+            print(f"{players:>7} {label:>10} {join_total / args.repeat * 1000:>8.2f} "
+                  f"{restart_total / args.repeat * 1000:>11.2f} {sent['packets'] // args.repeat:>9} "
+                  f"{sent['bytes'] / args.repeat / 1024:>9.1f} {newcomer_msgs:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Cost of a round transition and of role lookups as lobbies grow.
+
+Rotation, role swaps and the guesser/truth-teller lookups touch only the
+players whose role changes, so their cost should stay flat from 10 to 5000
+players. A round where a tenth of the room has disconnected is timed too.
+
+    python benchmarks/rotation_bench.py [--rounds 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import GameRoom, Player  # noqa: E402
+
+LOBBY_SIZES = (10, 100, 1000, 5000)
+
+
+def build_room(players, disconnected_share=0.0):
+    room = GameRoom(f'L{players}', seed=players)
+    for player_id in range(1, players + 1):
+        room.add_player(Player(player_id, f'Player {player_id}'))
+    room.start_game()
+    for player_id in range(2, players + 1, int(1 / disconnected_share) if disconnected_share else players + 1):
+        room.set_player_connected(player_id, False)
+    return room
+
+
+def per_call_us(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'players':>8} {'new round us':>13} {'10% away us':>12} {'next guesser us':>16} {'guesser us':>11}")
+    for players in LOBBY_SIZES:
+        room = build_room(players)
+        new_round = per_call_us(room.start_new_round, args.rounds)
+        next_guesser = per_call_us(room.get_next_guesser, args.rounds)
+        guesser = per_call_us(lambda: room.guesser, args.rounds)
+        away = build_room(players, disconnected_share=0.1)
+        new_round_away = per_call_us(away.start_new_round, args.rounds)
+        print(f"{players:>8} {new_round:>13.2f} {new_round_away:>12.2f} {next_guesser:>16.2f} {guesser:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
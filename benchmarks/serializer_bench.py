@@ -0,0 +1,73 @@
+"""Encode time and bytes on the wire for the JSON and msgpack payload codecs.
+
+Builds rooms of typical sizes, plays them to the end and encodes the big
+payloads (round snapshot, per-player state, final results) with each codec.
+JSON is measured with the same `json.dumps` call Socket.IO makes.
+
+    python benchmarks/serializer_bench.py [--rounds 2000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import GameRoom, Player  # noqa: E402
+import codec  # noqa: E402
+
+ROOM_SIZES = (3, 6, 12, 30)
+
+
+def build_room(size):
+    random.seed(size)
+    room = GameRoom('BENCH' + str(size))
+    for player_id in range(1, size + 1):
+        room.add_player(Player(player_id, f'Player {player_id}'))
+    room.start_game()
+    return room
+
+
+def payloads(room):
+    """The largest events a room sends: round snapshot, player state and final results"""
+    guesser = room.game_state['current_guesser']
+    return {
+        'state_base': {'event': 'new_round', 'state': room.get_public_state()},
+        'game_started': room.get_player_state(guesser),
+        'game_over': room.get_final_results(),
+    }
+
+
+def measure(encoder, data, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        out = encoder(data)
+    elapsed_us = (time.perf_counter() - started) / rounds * 1e6
+    return len(out), elapsed_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    encoders = {'json': lambda data: json.dumps(data, separators=(',', ':')).encode('utf-8')}
+    if codec.msgpack is not None:
+        encoders['msgpack'] = lambda data: codec.encode(codec.MSGPACK, data)
+    else:
+        print('msgpack is not installed; measuring JSON only')
+
+    print(f"{'players':>7} {'event':<13}" + ''.join(f" {name + ' B':>11} {name + ' us':>11}" for name in encoders))
+    for size in ROOM_SIZES:
+        for event, data in payloads(build_room(size)).items():
+            row = f"{size:>7} {event:<13}"
+            for encoder in encoders.values():
+                size_bytes, elapsed_us = measure(encoder, data, args.rounds)
+                row += f" {size_bytes:>11} {elapsed_us:>11.1f}"
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
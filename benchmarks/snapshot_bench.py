@@ -0,0 +1,74 @@
+"""Cost of snapshotting rooms to SQLite, per flush and per room.
+
+Changes only set a dirty flag, so the per-event cost is constant; the work
+happens once per flush for each dirty room however many events it saw. This
+measures a flush with every room dirty and with 10% dirty.
+
+    python benchmarks/snapshot_bench.py [--players 6]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import GameRoom, Player  # noqa: E402
+from snapshots import SnapshotStore  # noqa: E402
+
+ROOM_COUNTS = (10, 100, 1000)
+
+
+def build_rooms(count, players):
+    random.seed(count)
+    rooms = []
+    for index in range(count):
+        room = GameRoom(f'R{index:05d}')
+        for player_id in range(1, players + 1):
+            room.add_player(Player(player_id, f'Player {player_id}'))
+        room.start_game()
+        rooms.append(room)
+    return rooms
+
+
+def flush(store, rooms):
+    started = time.perf_counter()
+    snapshots = []
+    for room in rooms:
+        if room.dirty:
+            snapshots.append(room.to_snapshot())
+            room.dirty = False
+    store.write(snapshots)
+    return (time.perf_counter() - started) * 1000, len(snapshots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=6)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        print(f"{'rooms':>6} {'dirty':>6} {'flush ms':>9} {'ms/room':>8} {'bytes/room':>11}")
+        for count in ROOM_COUNTS:
+            store = SnapshotStore(os.path.join(tmpdir, f'bench{count}.sqlite3'))
+            rooms = build_rooms(count, args.players)
+            flush(store, rooms)  # first write inserts every row
+
+            for share in (1.0, 0.1):
+                for room in rooms[:max(1, int(count * share))]:
+                    room.skip_question()
+                bytes_before = store.stats['bytes_written']
+                elapsed_ms, written = flush(store, rooms)
+                per_room_bytes = (store.stats['bytes_written'] - bytes_before) / written
+                print(f"{count:>6} {written:>6} {elapsed_ms:>9.2f} {elapsed_ms / written:>8.3f} {per_room_bytes:>11.0f}")
+            store.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
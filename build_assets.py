@@ -0,0 +1,106 @@
+"""Build the generated static assets the page loads instead of CDN copies.
+
+    python build_assets.py            # compile Tailwind CSS and vendor the Socket.IO client
+    python build_assets.py --check    # fail unless both outputs exist
+    python build_assets.py --report   # size of each served asset: raw, gzip, brotli
+
+Tailwind: runs the Tailwind v3 CLI (a standalone `tailwindcss` binary on PATH
+or in $TAILWINDCSS, else `npx tailwindcss@3`) with tailwind.config.js. It
+writes static/css/tailwind.min.css with just the classes used in templates/
+and static/js/. Run it again after using new classes.
+
+Socket.IO: downloads the client the page pins and checks it against the
+pinned Subresource Integrity hash before writing static/vendor/.
+
+Run it in every deploy before the app starts, or commit both outputs. Once
+they exist the app serves them under hashed names (see assets.py) instead of
+from CDNs. Until then it falls back to the CDNs, unless ASSET_PIPELINE=true
+asks it to refuse to start.
+"""
+import argparse
+import base64
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import urllib.request
+
+from assets import ASSETS, AssetStore, unbuilt
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(ROOT, 'static')
+TAILWIND_OUTPUT = os.path.join(STATIC, 'css', 'tailwind.min.css')
+# Keep in step with the CDN fallback in templates/index.html
+SOCKETIO_URL = 'https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.2/socket.io.min.js'
+SOCKETIO_INTEGRITY = 'sha512-Xm9qbB6Pu06k3PUwPj785dyTl6oHxgsv9nHp7ej7nCpAqGZT3OZpsELuCYX05DdonFpTlBpXMOxjavIAIUwr0w=='
+SOCKETIO_OUTPUT = os.path.join(STATIC, 'vendor', 'socket.io.min.js')
+
+
+def tailwind_command():
+    cli = os.environ.get('TAILWINDCSS') or shutil.which('tailwindcss')
+    if cli:
+        return [cli]
+    if shutil.which('npx'):
+        return ['npx', '--yes', 'tailwindcss@3']
+    raise SystemExit('Tailwind CLI not found: install the standalone binary or Node.js (npx)')
+
+
+def build_tailwind():
+    subprocess.run(tailwind_command() + ['-c', os.path.join(ROOT, 'tailwind.config.js'),
+                                         '-o', TAILWIND_OUTPUT, '--minify'], cwd=ROOT, check=True)
+    print(f"Wrote {os.path.relpath(TAILWIND_OUTPUT, ROOT)} ({os.path.getsize(TAILWIND_OUTPUT)} bytes)")
+
+
+def vendor_socketio():
+    with urllib.request.urlopen(SOCKETIO_URL, timeout=30) as response:
+        content = response.read()
+    algorithm, _, expected = SOCKETIO_INTEGRITY.partition('-')
+    actual = base64.b64encode(hashlib.new(algorithm, content).digest()).decode()
+    if actual != expected:
+        raise SystemExit(f'{SOCKETIO_URL} does not match its pinned integrity hash')
+    os.makedirs(os.path.dirname(SOCKETIO_OUTPUT), exist_ok=True)
+    with open(SOCKETIO_OUTPUT, 'wb') as f:
+        f.write(content)
+    print(f"Wrote {os.path.relpath(SOCKETIO_OUTPUT, ROOT)} ({len(content)} bytes)")
+
+
+def report():
+    store = AssetStore(STATIC)
+    print(f"{'asset':<28} {'served as':<36} {'raw':>8} {'gzip':>8} {'br':>8}")
+    for name in ASSETS:
+        if name not in store:
+            print(f"{name:<28} (missing)")
+            continue
+        hashed = store.urls[name]
+        sizes = []
+        for encoding in ('identity', 'gzip', 'br'):
+            _, served, body = store.get(hashed, encoding)
+            sizes.append(len(body) if served == encoding or encoding == 'identity' else '-')
+        print(f"{name:<28} {hashed:<36} {sizes[0]:>8} {sizes[1]:>8} {sizes[2]:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--no-tailwind', action='store_true', help='skip compiling Tailwind CSS')
+    parser.add_argument('--no-socketio', action='store_true', help='skip vendoring the Socket.IO client')
+    parser.add_argument('--check', action='store_true', help='only check that the outputs exist')
+    parser.add_argument('--report', action='store_true', help='only print asset sizes')
+    args = parser.parse_args()
+
+    if args.check:
+        missing = unbuilt(STATIC)
+        if missing:
+            raise SystemExit(f"Not built: {', '.join(missing)}. Run python build_assets.py")
+        return
+
+    if not args.report:
+        if not args.no_tailwind:
+            build_tailwind()
+        if not args.no_socketio:
+            vendor_socketio()
+    report()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,374 @@
+"""Multi-process mode: run several app workers on one machine.
+
+Rooms are sharded to workers by room code. A small router in front of the
+workers sends every request that names a room (the `/room_status` and
+`/join_room` routes, or Socket.IO traffic carrying a `room` query parameter)
+to the worker that owns it, so a room's players always land on the same
+process. Socket.IO requests that carry an Engine.IO session id instead go to
+the worker that opened that session. Emits that cross workers go through Flask-SocketIO's `message_queue`;
+any Redis server works, and `MessageBroker` below is a tiny pure-Python
+stand-in that speaks enough of the Redis protocol for local use and tests.
+
+Run with:
+
+    python cluster.py --workers 4 --port 5003
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+import zlib
+from collections import OrderedDict, defaultdict
+
+WORKER_COUNT = max(1, int(os.environ.get('WORKER_COUNT', 1)))
+WORKER_INDEX = int(os.environ.get('WORKER_INDEX', 0))
+# Comma-separated base URLs of every worker, in worker index order
+WORKER_URLS = [u.strip() for u in os.environ.get('WORKER_URLS', '').split(',') if u.strip()]
+
+_ROOM_IN_PATH = re.compile(rb'^/(?:room_status|join_room)/([A-Za-z]{6})\b')
+_ROOM_IN_QUERY = re.compile(rb'[?&]room=([A-Za-z]{6})\b')
+_SID_IN_QUERY = re.compile(rb'[?&]sid=([A-Za-z0-9_-]+)')
+_SID_IN_HANDSHAKE = re.compile(rb'"sid":"([A-Za-z0-9_-]+)"')
+# Engine.IO sessions the router remembers; the least recently used are forgotten first
+ROUTER_SESSIONS = 100000
+
+
+def room_shard(room_code, worker_count=None):
+    """Get the index of the worker that owns a room"""
+    worker_count = worker_count or WORKER_COUNT
+    return zlib.crc32(room_code.upper().encode('ascii')) % worker_count
+
+
+def owns_room(room_code):
+    """Check whether this worker is the owner of a room code"""
+    return WORKER_COUNT == 1 or room_shard(room_code) == WORKER_INDEX
+
+
+def fetch_from_owner(room_code, method, path, payload=None):
+    """Forward an HTTP request for a room to the worker that owns it.
+
+    Returns a (json_body, status_code) tuple.
+    """
+    index = room_shard(room_code)
+    if index >= len(WORKER_URLS):
+        return {'error': 'Room not found'}, 404
+
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(WORKER_URLS[index] + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return json.loads(resp.read()), resp.status
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b'{}'), e.code
+    except (OSError, ValueError):
+        return {'error': 'Room server unavailable'}, 503
+
+
+# --- RESP (Redis protocol) helpers ---
+
+def _read_command(rfile):
+    """Read one RESP command (an array of bulk strings). Returns None on EOF."""
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        # Inline command, e.g. typed into telnet
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:])):
+        size = int(rfile.readline()[1:])
+        args.append(rfile.read(size + 2)[:-2])
+    return args
+
+
+def _encode(items, kind=b'*'):
+    """Encode a RESP array (or a RESP3 push when kind is b'>')"""
+    out = [kind + b'%d\r\n' % len(items)]
+    for item in items:
+        if isinstance(item, int):
+            out.append(b':%d\r\n' % item)
+        else:
+            out.append(b'$%d\r\n%s\r\n' % (len(item), item))
+    return b''.join(out)
+
+
+class MessageBroker:
+    """Minimal pub/sub server speaking the subset of Redis that Socket.IO uses.
+
+    Handles SUBSCRIBE, UNSUBSCRIBE, PUBLISH, PING and HELLO (RESP2 or RESP3);
+    any other command is acknowledged with +OK so client handshakes succeed.
+    """
+
+    def __init__(self, host='127.0.0.1', port=6399):
+        from gevent.server import StreamServer
+        self.server = StreamServer((host, port), self._handle)
+        self._subscribers = defaultdict(set)  # channel -> {connection, ...}
+
+    @property
+    def address(self):
+        return self.server.address
+
+    def start(self):
+        self.server.start()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.stop()
+
+    def _handle(self, sock, address):
+        from gevent.lock import Semaphore
+        conn = _BrokerConnection(sock, Semaphore())
+        rfile = sock.makefile('rb')
+        try:
+            while True:
+                command = _read_command(rfile)
+                if command is None:
+                    break
+                if not command:
+                    continue
+                name = command[0].upper()
+                if name == b'SUBSCRIBE':
+                    for channel in command[1:]:
+                        conn.channels.add(channel)
+                        self._subscribers[channel].add(conn)
+                        conn.send(_encode([b'subscribe', channel, len(conn.channels)], conn.push_kind))
+                elif name == b'UNSUBSCRIBE':
+                    for channel in command[1:] or list(conn.channels):
+                        conn.channels.discard(channel)
+                        self._subscribers[channel].discard(conn)
+                        conn.send(_encode([b'unsubscribe', channel, len(conn.channels)], conn.push_kind))
+                elif name == b'PUBLISH' and len(command) == 3:
+                    conn.send(b':%d\r\n' % self.publish(command[1], command[2]))
+                elif name == b'PING':
+                    if conn.channels and conn.push_kind == b'*':
+                        conn.send(_encode([b'pong', b'']))
+                    else:
+                        conn.send(b'+PONG\r\n')
+                elif name == b'HELLO':
+                    protocol = int(command[1]) if len(command) > 1 else 2
+                    conn.push_kind = b'>' if protocol == 3 else b'*'
+                    reply = _encode([b'server', b'redis', b'version', b'7.0.0', b'proto', protocol])
+                    if protocol == 3:
+                        # A RESP3 map header counts key/value pairs, not items
+                        reply = b'%3' + reply[2:]
+                    conn.send(reply)
+                else:
+                    conn.send(b'+OK\r\n')
+        except (OSError, ValueError):
+            pass
+        finally:
+            for channel in conn.channels:
+                self._subscribers[channel].discard(conn)
+            sock.close()
+
+    def publish(self, channel, message):
+        """Deliver a message to every subscriber of a channel"""
+        frames = {}
+        receivers = list(self._subscribers.get(channel, ()))
+        for receiver in receivers:
+            if receiver.push_kind not in frames:
+                frames[receiver.push_kind] = _encode([b'message', channel, message], receiver.push_kind)
+            try:
+                receiver.send(frames[receiver.push_kind])
+            except OSError:
+                self._subscribers[channel].discard(receiver)
+        return len(receivers)
+
+
+class _BrokerConnection:
+    __slots__ = ('sock', 'lock', 'channels', 'push_kind')
+
+    def __init__(self, sock, lock):
+        self.sock = sock
+        self.lock = lock
+        self.channels = set()
+        self.push_kind = b'*'  # b'>' once the client switches to RESP3
+
+    def send(self, data):
+        # Publishers on other connections write here too
+        with self.lock:
+            self.sock.sendall(data)
+
+
+# --- Sticky router ---
+
+def _force_close(head):
+    """Ask the backend to close after this request so the next one is routed again"""
+    lines = [line for line in head.split(b'\r\n')
+             if line and not line.lower().startswith(b'connection:')]
+    return b'\r\n'.join(lines) + b'\r\nConnection: close\r\n\r\n'
+
+
+def _add_forwarded_for(head, address):
+    """Append the client's address to X-Forwarded-For, so workers can rate limit by client"""
+    lines = head.split(b'\r\n')
+    for index, line in enumerate(lines):
+        if line.lower().startswith(b'x-forwarded-for:'):
+            lines[index] = line + b', ' + address
+            return b'\r\n'.join(lines)
+    return head + b'\r\nX-Forwarded-For: ' + address
+
+
+class RoomRouter:
+    """TCP front end that routes each HTTP request to the worker owning its room.
+
+    Engine.IO polling and upgrade requests name only their session (`sid`), so
+    the router learns each session's worker from the handshake response and
+    sends the session's later requests there. Requests without a session or a
+    room code are spread round-robin. WebSocket upgrades are piped through
+    untouched once routed.
+    """
+
+    def __init__(self, backends, host='0.0.0.0', port=5003, max_sessions=ROUTER_SESSIONS):
+        from gevent.server import StreamServer
+        self.backends = backends  # [(host, port), ...] in worker index order
+        self._round_robin = itertools.cycle(range(len(backends)))
+        self._sessions = OrderedDict()  # Engine.IO sid -> backend index, oldest first
+        self.max_sessions = max_sessions
+        self.server = StreamServer((host, port), self._handle)
+
+    def pick_backend(self, target):
+        match = _SID_IN_QUERY.search(target)
+        if match and match.group(1) in self._sessions:
+            self._sessions.move_to_end(match.group(1))
+            return self._sessions[match.group(1)]
+        match = _ROOM_IN_PATH.match(target) or _ROOM_IN_QUERY.search(target)
+        if match:
+            return room_shard(match.group(1).decode('ascii'), len(self.backends))
+        return next(self._round_robin)
+
+    def learn_session(self, response, backend):
+        """Remember the worker that answered an Engine.IO handshake. Returns
+        whether `response` (the start of the reply) carried the session id."""
+        match = _SID_IN_HANDSHAKE.search(response)
+        if not match:
+            return False
+        self._sessions[match.group(1)] = backend
+        self._sessions.move_to_end(match.group(1))
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return True
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def _handle(self, client, address):
+        import gevent
+        from gevent import socket
+
+        head = b''
+        while b'\r\n\r\n' not in head:
+            chunk = client.recv(65536)
+            if not chunk or len(head) > 65536:
+                client.close()
+                return
+            head += chunk
+        head, rest = head.split(b'\r\n\r\n', 1)
+
+        try:
+            target = head.split(b'\r\n', 1)[0].split(b' ')[1]
+        except IndexError:
+            client.close()
+            return
+
+        head = _add_forwarded_for(head, address[0].encode('ascii'))
+        if b'upgrade: websocket' not in head.lower():
+            head = _force_close(head)
+        else:
+            head += b'\r\n\r\n'
+
+        index = self.pick_backend(target)
+        # An Engine.IO handshake: its reply names the session to route on from now on
+        handshake = target.startswith(b'/socket.io/') and not _SID_IN_QUERY.search(target)
+        try:
+            backend = socket.create_connection(self.backends[index])
+        except OSError:
+            client.sendall(b'HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n'
+                           b'Connection: close\r\n\r\n')
+            client.close()
+            return
+
+        backend.sendall(head + rest)
+
+        def pipe(src, dst, learn=False):
+            seen = b''
+            try:
+                while True:
+                    data = src.recv(65536)
+                    if not data:
+                        break
+                    if learn and len(seen) < 65536:
+                        seen += data
+                        learn = not self.learn_session(seen, index)
+                    dst.sendall(data)
+            except OSError:
+                pass
+            finally:
+                for s in (src, dst):
+                    try:
+                        s.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+
+        gevent.joinall([gevent.spawn(pipe, client, backend), gevent.spawn(pipe, backend, client, handshake)])
+        client.close()
+        backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run Something Fishy across several worker processes')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5003)))
+    parser.add_argument('--worker-base-port', type=int, default=7100)
+    parser.add_argument('--broker-port', type=int, default=6399)
+    args = parser.parse_args()
+
+    from gevent import monkey
+    monkey.patch_all()
+
+    message_queue = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    broker = None
+    if not message_queue:
+        broker = MessageBroker(port=args.broker_port)
+        broker.start()
+        message_queue = f'redis://127.0.0.1:{args.broker_port}'
+        print(f"Started local message broker on {message_queue}")
+
+    backends = [('127.0.0.1', args.worker_base_port + i) for i in range(args.workers)]
+    worker_urls = ','.join(f'http://{host}:{port}' for host, port in backends)
+    workers = []
+    for index, (host, port) in enumerate(backends):
+        env = dict(os.environ,
+                   WORKER_COUNT=str(args.workers),
+                   WORKER_INDEX=str(index),
+                   WORKER_URLS=worker_urls,
+                   SOCKETIO_MESSAGE_QUEUE=message_queue,
+                   # The router adds one X-Forwarded-For hop in front of whatever proxies were there
+                   TRUSTED_PROXY_HOPS=str(int(os.environ.get('TRUSTED_PROXY_HOPS', 0)) + 1))
+        workers.append(subprocess.Popen([
+            sys.executable, '-m', 'gunicorn',
+            '--worker-class', 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker',
+            '-w', '1', '--bind', f'{host}:{port}', 'app:app'
+        ], env=env))
+        print(f"Started worker {index} on {host}:{port}")
+
+    print(f"Routing on port {args.port} to {args.workers} workers")
+    try:
+        RoomRouter(backends, port=args.port).serve_forever()
+    finally:
+        for worker in workers:
+            worker.terminate()
+        if broker:
+            broker.stop()
+
+
+if __name__ == '__main__':
+    main()
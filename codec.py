@@ -0,0 +1,42 @@
+"""Payload codecs for outbound Socket.IO events, negotiated per client.
+
+Clients list the codecs they can decode when they connect; the server picks
+the first one it supports and falls back to JSON. Non-JSON payloads are sent
+as a single binary argument, which Socket.IO carries as a binary attachment.
+MessagePack needs the optional `msgpack` package; without it every client
+gets JSON.
+"""
+import os
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+_available = [MSGPACK] if msgpack is not None else []
+# Binary codecs the server may hand out, in order of preference (SOCKETIO_CODECS=json disables them)
+BINARY_CODECS = tuple(name.strip() for name in os.environ.get('SOCKETIO_CODECS', MSGPACK).split(',')
+                      if name.strip() in _available)
+
+
+def negotiate(offered):
+    """Pick the codec for a client from the list it offered"""
+    for name in offered or ():
+        if name in BINARY_CODECS:
+            return name
+    return JSON
+
+
+def encode(codec, data):
+    """Encode an event payload for a codec. JSON payloads are left for Socket.IO to encode."""
+    if codec == MSGPACK and data is not None:
+        return msgpack.packb(data)
+    return data
+
+
+def codec_room(room, codec):
+    """Socket.IO room for the members of `room` that use `codec`"""
+    return room if codec == JSON else f"{room}#{codec}"
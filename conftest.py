@@ -0,0 +1,131 @@
+"""Fixtures shared by the test modules.
+
+The tests are unittest classes, so a fixture they need is requested with
+@pytest.mark.usefixtures and lands on the test case as an attribute
+(self.clock, self.server) before setUp runs.
+"""
+import os
+import time
+
+import pytest
+
+
+class FakeClock:
+    """A clock the test moves by hand: clock.now = 120"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(request):
+    clock = FakeClock()
+    if request.instance is not None:
+        request.instance.clock = clock
+    return clock
+
+
+class Server:
+    """The app module driven through Socket.IO test clients. Timers and room
+    timestamps follow the fake clock, and nothing runs until the test says so."""
+
+    def __init__(self, app, clock):
+        self.app = app
+        self.clock = clock
+        self.clients = []
+        self.tokens = {}  # player name -> session token from their join
+
+    def connect(self, **kwargs):
+        client = self.app.socketio.test_client(self.app.app, **kwargs)
+        self.clients.append(client)
+        return client
+
+    def seat(self, *names):
+        """Create a room hosted by the first name and join the others, each on
+        their own client. Returns (room_code, clients) with nothing left unread."""
+        host = self.connect()
+        reply = host.emit('create_room', {'name': names[0]}, callback=True)
+        room_code = reply['room_code']
+        self.tokens[names[0]] = reply['token']
+        clients = [host]
+        for name in names[1:]:
+            clients.append(self.join(room_code, name)[0])
+        for client in clients:
+            self.frames(client)
+        return room_code, clients
+
+    def join(self, room_code, name):
+        """Join a room on a new client. Returns (client, join reply)."""
+        client = self.connect()
+        reply = client.emit('join', {'room_code': room_code, 'name': name}, callback=True)
+        if 'token' in reply:
+            self.tokens[name] = reply['token']
+        return client, reply
+
+    def flush(self):
+        """Send every queued emit, as the outbox flusher would on the next loop turn"""
+        for room in list(self.app.outbox):
+            self.app.flush_emits(room)
+
+    def frames(self, client):
+        """Frames the client received since the last call, as (event, *args)"""
+        self.flush()
+        return [(frame['name'], *frame['args']) for frame in client.get_received()]
+
+    def events(self, client):
+        """Events the client received since the last call, batches unpacked, as (event, data)"""
+        events = []
+        for event, *args in self.frames(client):
+            if event == 'batch':
+                events.extend(tuple(item) for item in args[0])
+            else:
+                events.append((event, args[0] if args else None))
+        return events
+
+    def advance(self, seconds):
+        """Move the clock on and run the timers that came due"""
+        self.clock.now += seconds
+        return self.app.scheduler.run_due()
+
+
+@pytest.fixture
+def server(request, clock, monkeypatch):
+    os.environ.setdefault('SNAPSHOT_DB', '')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('ASSET_PIPELINE', 'false')  # the built CSS and Socket.IO client may be absent
+    import app
+    from audience import Audience
+    from eventbuffer import EventBuffer
+    from sequencing import RoomSequencer
+    from sessions import SessionRegistry, TokenStore
+    from timers import Scheduler
+
+    # Fresh state per test, on the fake clock
+    fresh = {
+        'game_rooms': {},
+        'player_sessions': SessionRegistry(),
+        'player_tokens': TokenStore(clock=clock),
+        'client_codecs': {},
+        'audience': Audience(),
+        'event_buffer': EventBuffer(clock=clock),
+        'outbox': {},
+        'sequencer': RoomSequencer(),
+        'scheduler': Scheduler(lambda task: None, lambda seconds: None, clock=clock),
+        'held_rounds': {},
+    }
+    for name, value in fresh.items():
+        monkeypatch.setattr(app, name, value)
+    monkeypatch.setattr(app, 'admit', lambda event: True)  # the rate limits have their own tests
+    monkeypatch.setattr(time, 'time', clock)  # rooms stamp wall-clock times for the reaper
+
+    server = Server(app, clock)
+    if request.instance is not None:
+        request.instance.server = server
+    yield server
+    for client in server.clients:
+        if client.is_connected():
+            client.disconnect()
+    server.flush()
@@ -0,0 +1,71 @@
+import collections
+import time
+
+
+class EventBuffer:
+    """The last `size` events sent to each room, numbered, so a client that
+    comes back after a dropped connection can be sent just the ones it missed.
+
+    Each event's payload carries its number as `seq`. Events that went to only
+    part of the room (a role) cannot be replayed to everyone, so they are kept
+    as gaps: a client whose missed events include a gap needs a full snapshot.
+    A room's numbers start at the clock in milliseconds when its buffer is
+    created, so numbers a client saw before a server restart are older than
+    anything the new buffer holds.
+    """
+
+    def __init__(self, size=64, clock=time.time):
+        self.size = size
+        self._clock = clock
+        self._events = {}  # room_code -> deque of (seq, event, data); event is None for a gap
+        self._last_seq = {}  # room_code -> number of the last event recorded
+
+    def __len__(self):
+        return len(self._events)
+
+    def _next(self, room_code, event, data):
+        seq = self._last_seq.get(room_code)
+        if seq is None:
+            self._events[room_code] = collections.deque(maxlen=self.size)
+            seq = int(self._clock() * 1000)
+        seq += 1
+        self._last_seq[room_code] = seq
+        self._events[room_code].append((seq, event, data))
+        return seq
+
+    def record(self, room_code, event, data):
+        """Number an event sent to the whole room and keep it. Returns the payload
+        to send: a copy of `data` (a dict or None) with `seq` added."""
+        if not self.size:
+            return data
+        data = dict(data or {})
+        data['seq'] = self._next(room_code, event, data)
+        return data
+
+    def gap(self, room_code):
+        """Note an event that went to only part of the room"""
+        if self.size:
+            self._next(room_code, None, None)
+
+    def last_seq(self, room_code):
+        """Number of the room's last event, or None before the first"""
+        return self._last_seq.get(room_code)
+
+    def since(self, room_code, seq):
+        """The events after `seq` as [[event, data], ...], or None if any of them
+        is no longer kept or is a gap"""
+        last = self._last_seq.get(room_code)
+        if seq is None or last is None or not last - len(self._events[room_code]) <= seq <= last:
+            return None
+        missed = []
+        for event_seq, event, data in self._events[room_code]:
+            if event_seq > seq:
+                if event is None:
+                    return None
+                missed.append([event, data])
+        return missed
+
+    def forget(self, room_code):
+        """Drop a deleted room's events"""
+        self._events.pop(room_code, None)
+        self._last_seq.pop(room_code, None)
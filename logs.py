@@ -0,0 +1,165 @@
+"""Leveled, structured logging that never writes from a request handler.
+
+Records are formatted where they are logged and queued; a native OS thread
+writes them out in batches, so a slow stdout never stalls the gevent loop.
+Routine records (below WARNING) are rate limited per message template, and
+records logged while handling a Socket.IO event get its SID and event name.
+"""
+import atexit
+import collections
+import json
+import logging
+import os
+import sys
+import time
+
+from flask import has_request_context, request
+from gevent import monkey
+
+# Extra fields rendered after the message, in this order
+FIELDS = ('event', 'room', 'sid', 'player', 'suppressed')
+
+
+class QueueHandler(logging.Handler):
+    """Queues formatted records for a background writer thread. When more
+    than `capacity` lines are waiting, new records are dropped and counted."""
+
+    def __init__(self, stream=None, capacity=10000, interval=0.05):
+        super().__init__()
+        self.stream = stream
+        self.capacity = capacity
+        self.interval = interval
+        self.dropped = 0
+        self._pending = collections.deque()
+        self._writer_started = False
+
+    def emit(self, record):
+        if len(self._pending) >= self.capacity:
+            self.dropped += 1
+            return
+        try:
+            self._pending.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if not self._writer_started:
+            self._writer_started = True
+            # The original thread functions, so the writer is a real thread even under gevent
+            monkey.get_original('_thread', 'start_new_thread')(self._run, ())
+
+    def handle(self, record):
+        # Skip the handler lock: the deque is thread-safe and the writer never locks
+        if self.filter(record):
+            self.emit(record)
+        return record
+
+    def flush(self):
+        """Write every queued line now"""
+        lines = []
+        try:
+            while True:
+                lines.append(self._pending.popleft())
+        except IndexError:
+            pass
+        if lines:
+            stream = self.stream or sys.stdout
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+
+    def _run(self):
+        sleep = monkey.get_original('time', 'sleep')
+        while True:
+            try:
+                self.flush()
+            except Exception:
+                pass  # a closed stream at shutdown; nothing useful to do
+            sleep(self.interval)
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `burst` records below WARNING through per `per` seconds for
+    each message template. The next record let through carries the number
+    suppressed in between."""
+
+    def __init__(self, burst=20, per=10.0, clock=time.monotonic):
+        super().__init__()
+        self.burst = burst
+        self.per = per
+        self._clock = clock
+        self._windows = {}  # template -> [window start, records let through, suppressed]
+        self.suppressed = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        now = self._clock()
+        window = self._windows.get(record.msg)
+        if window is None and len(self._windows) >= 1000:
+            self._windows.clear()  # messages built with f-strings would grow this forever
+        if window is None or now - window[0] >= self.per:
+            suppressed = window[2] if window else 0
+            window = self._windows[record.msg] = [now, 0, 0]
+            if suppressed:
+                record.suppressed = suppressed
+        if window[1] >= self.burst:
+            window[2] += 1
+            self.suppressed += 1
+            return False
+        window[1] += 1
+        return True
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds the SID and event name of the Socket.IO event being handled"""
+
+    def filter(self, record):
+        if has_request_context():
+            if not hasattr(record, 'sid'):
+                record.sid = getattr(request, 'sid', None)
+            if not hasattr(record, 'event'):
+                event = getattr(request, 'event', None)
+                record.event = event['message'] if event else None
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """`time LEVEL logger message key=value ...`, or one JSON object per line"""
+
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = {name: getattr(record, name) for name in FIELDS if getattr(record, name, None) is not None}
+        if record.exc_info:
+            fields['exc'] = self.formatException(record.exc_info)
+        timestamp = self.formatTime(record, '%Y-%m-%dT%H:%M:%S')
+        if self.as_json:
+            return json.dumps({'time': timestamp, 'level': record.levelname, 'logger': record.name,
+                               'message': record.getMessage(), **fields}, default=str)
+        line = f"{timestamp} {record.levelname:<7} {record.name} {record.getMessage()}"
+        if fields:
+            line += ' | ' + ' '.join(f'{name}={value}' for name, value in fields.items())
+        return line
+
+
+def setup_logging(level=None, as_json=None, burst=None, per=None):
+    """Send the root logger through one queue-backed handler. Settings default to
+    the LOG_LEVEL, LOG_FORMAT (text or json), LOG_BURST and LOG_BURST_WINDOW env vars.
+    Returns the handler and the rate limiter, for their dropped and suppressed counts."""
+    level = level or os.environ.get('LOG_LEVEL', 'INFO').upper()
+    as_json = as_json if as_json is not None else os.environ.get('LOG_FORMAT', 'text') == 'json'
+    handler = QueueHandler()
+    handler.setFormatter(StructuredFormatter(as_json))
+    limiter = RateLimitFilter(burst or int(os.environ.get('LOG_BURST', 20)),
+                              per or float(os.environ.get('LOG_BURST_WINDOW', 10)))
+    handler.addFilter(limiter)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, QueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    atexit.register(handler.flush)
+    return handler, limiter
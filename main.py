@@ -1,6 +1,105 @@
+import copy
+import functools
+from array import array
+import logging
+import os
 import random
+import time
+
+log = logging.getLogger(__name__)
+
+QUESTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Questions.txt')
+# Actions a room's log holds before it starts over from a checkpoint, so a long game stays bounded too
+CHECKPOINT_INTERVAL = 200
+
+
+class QuestionBank:
+    """Process-wide store of question/answer pairs, loaded and validated once.
+
+    Lines are kept in an integer-indexed list so rooms can draw by index. The
+    file's mtime is checked at most every `check_interval` seconds and the bank
+    is reloaded in place when it changes, bumping `version`.
+    """
+
+    def __init__(self, path=QUESTIONS_FILE, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.lines = []  # raw "question;answer" lines, indexed by question id
+        self.pairs = []  # (question, answer) tuples, same indexes as lines
+        self.version = 0
+        self._mtime = None
+        self._next_check = 0.0
+        self.load()
+
+    def load(self):
+        """(Re)load the question file, skipping blank, malformed and duplicate lines"""
+        with open(self.path, 'r', encoding='utf-8') as file:
+            mtime = os.fstat(file.fileno()).st_mtime
+            raw_lines = file.readlines()
+
+        lines = []
+        pairs = []
+        seen = set()
+        for line_no, line in enumerate(raw_lines, 1):
+            line = line.strip()
+            if not line or line in seen:
+                continue
+            parts = line.split(';')
+            if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():
+                log.warning("Skipping malformed question on line %d: %r", line_no, line)
+                continue
+            seen.add(line)
+            lines.append(line)
+            pairs.append((parts[0].strip(), parts[1].strip()))
+
+        if not lines:
+            raise ValueError(f"No valid questions found in {self.path}")
+
+        self.lines = lines
+        self.pairs = pairs
+        self._mtime = mtime
+        self.version += 1
+
+    def reload_if_changed(self):
+        """Reload the bank if the file changed on disk. Returns True if reloaded."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            self.load()
+        except (OSError, ValueError) as e:
+            # Keep serving the previous questions if the new file is unusable
+            log.warning("Question bank reload failed, keeping version %d: %s", self.version, e)
+            self._mtime = mtime
+            return False
+        log.info("Reloaded question bank: %d questions (version %d)", len(self.lines), self.version)
+        return True
+
+    def __len__(self):
+        return len(self.lines)
+
+
+# Shared by every room in the process
+question_bank = QuestionBank()
+
 
 class Player:
+    # Fixed fields instead of a per-instance __dict__; big lobbies hold many players
+    __slots__ = (
+        'id', 'name', 'points', 'role', 'temp_points', 'has_been_guessed',
+        'times_as_guesser', 'times_as_truth_teller',
+        'correct_guesses', 'total_guesses', 'times_caught_as_liar',
+        'times_survived_as_liar', 'rounds_connected', 'connected_since_round',
+        'is_disconnected', 'disconnect_time',
+    )
+
     def __init__(self, id, name, is_guesser=False):
         self.id = id
         self.name = name
@@ -11,12 +110,14 @@ class Player:
         # Stats tracking
         self.times_as_guesser = 0
         self.times_as_truth_teller = 0
-        self.times_as_liar = 0
         self.correct_guesses = 0
         self.total_guesses = 0
         self.times_caught_as_liar = 0
         self.times_survived_as_liar = 0
-        self.rounds_played = 0
+        # Rounds started while connected, counted up to connected_since_round
+        # (rounds played and times as liar follow from these, see GameRoom.rounds_played)
+        self.rounds_connected = 0
+        self.connected_since_round = 0
         # Disconnection tracking
         self.is_disconnected = False
         self.disconnect_time = None
@@ -52,6 +153,18 @@ class Player:
         self.has_been_guessed = False
         self.temp_points = 0
 
+    def to_snapshot(self):
+        """Every field, as plain data for persistence"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        player = cls(data['id'], data['name'])
+        for field in cls.__slots__:
+            if field in data:  # fields added since the snapshot was written keep their defaults
+                setattr(player, field, data[field])
+        return player
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -63,11 +176,74 @@ class Player:
             'disconnect_time': self.disconnect_time
         }
 
+def _failed(result):
+    """Whether an action's result says it was refused"""
+    return result is False or isinstance(result, dict) and 'error' in result
+
+
+def _action(kind, encode=None, checkpoint=False, unchanged=None):
+    """Record each call of a GameRoom method as an event in the room's log.
+    Calls made while another action runs are part of that action and are not
+    recorded separately, and neither are calls that fail or that
+    `unchanged(room, *args)` says change nothing. `encode` turns the call's
+    arguments into event data. With `checkpoint`, and every
+    CHECKPOINT_INTERVAL actions, the log starts over from the room's state
+    after the call."""
+    def decorate(method):
+        @functools.wraps(method)
+        def record(self, *args):
+            if self._in_action:
+                return method(self, *args)
+            self._in_action = True
+            # Reseed per action, so a room's RNG state is implied by its seed and action count
+            self.rng.seed(f"{self.seed}:{self.log_start + len(self.log)}")
+            try:
+                noop = unchanged is not None and unchanged(self, *args)
+                result = method(self, *args)
+            finally:
+                self._in_action = False
+            self.dirty = True
+            if noop or _failed(result):
+                return result
+            self.log.append([kind, *(encode(*args) if encode else args)])
+            if checkpoint or len(self.log) >= CHECKPOINT_INTERVAL:
+                self._checkpoint()
+            return result
+        return record
+    return decorate
+
+
 class GameRoom:
-    def __init__(self, room_code):
+    def __init__(self, room_code, seed=None):
         self.room_code = room_code
+        # All randomness comes from this room's RNG, so a room is reproducible from its seed and log
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.log = []  # Every action since the checkpoint that changed the room, in order: [kind, *args] (see replay.py)
+        self.log_start = 0  # Actions taken before log[0]
+        self.checkpoint = None  # Snapshot of the room as log[0] was taken, None back to its creation
+        self._in_action = False
         self.players = {}
+        # Kept up to date as players change, so handlers never scan the room to count
+        self.unguessed_count = 0
+        self._connected = []  # Ids of connected players; swap_round draws by position, so snapshots keep the order
+        self._connected_index = {}  # player id -> position in _connected
+        # Rotation ring over connected players in seat (join) order: id -> next / previous id
+        self._ring_next = {}
+        self._ring_prev = {}
+        self.empty_since = time.time()  # When the last connected player left, None while occupied
         self.used_questions = set()  # Track used questions
+        # State version seen by clients; changes between versions are sent as deltas
+        self.version = 0
+        self._delta_ops = []
+        # Roster version seen by clients; joins, leaves and connection changes are sent as roster deltas
+        self.roster_version = 0
+        self._roster_ops = []
+        self._public_state = None  # Cached get_public_state(), cleared on any change
+        self.dirty = True  # Changed since the last snapshot was written
+        self._question_deck = array('I')  # Shuffled ids of unused questions, drawn from the end
+        self._deck_version = None
+        self._deck_generation = 0  # Bumped each time every question has been used
         self.game_state = {
             'status': 'waiting',  # waiting, playing, finished
             'current_round': 0,
@@ -79,30 +255,164 @@ class GameRoom:
             'scores': {}
         }
     
+    @_action('add', lambda player: (player.id, player.name))
     def add_player(self, player):
         """Add a player to the room"""
         self.players[player.id] = player
         self.game_state['scores'][player.id] = 0
+        if not player.is_disconnected:
+            self._add_connected(player.id)
+        self.unguessed_count += not player.has_been_guessed
+        self._roster_ops.append(['add', self.roster_entry(player)])
+        self._resync()
     
+    @_action('remove', unchanged=lambda room, player_id: player_id not in room.players)
     def remove_player(self, player_id):
         """Remove a player from the room"""
         if player_id in self.players:
+            player = self.players[player_id]
+            if not player.is_disconnected:
+                self._remove_connected(player_id)
             del self.players[player_id]
             del self.game_state['scores'][player_id]
+            self.unguessed_count -= not player.has_been_guessed
+            self._roster_ops.append(['remove', player_id])
+            self._resync()
+
+    @_action('connect', unchanged=lambda room, player_id, connected:
+             room.players[player_id].is_disconnected != connected)
+    def set_player_connected(self, player_id, connected):
+        """Mark a player as connected or disconnected"""
+        player = self.players[player_id]
+        changed = player.is_disconnected == connected
+        if changed:
+            current_round = self.game_state['current_round']
+            if connected:
+                player.connected_since_round = current_round
+                self._add_connected(player_id)
+            else:
+                player.rounds_connected += current_round - player.connected_since_round
+                self._remove_connected(player_id)
+        player.is_disconnected = not connected
+        player.disconnect_time = None if connected else time.time()
+        self._record('d', player_id, not connected)
+        if changed:
+            self._roster_ops.append(['update', self.roster_entry(player)])
+
+    @property
+    def connected_count(self):
+        return len(self._connected)
+
+    @property
+    def guesser(self):
+        """The current guesser, or None before the game starts"""
+        return self.players.get(self.game_state['current_guesser'])
+
+    @property
+    def truth_teller(self):
+        """The current truth-teller, or None before the game starts"""
+        return self.players.get(self.game_state['truth_teller'])
+
+    def _add_connected(self, player_id):
+        """Count a player as connected and link them into the rotation ring at their seat"""
+        self._connected_index[player_id] = len(self._connected)
+        self._connected.append(player_id)
+        if len(self._connected) == 1:
+            self._ring_next[player_id] = self._ring_prev[player_id] = player_id
+            return
+        # Link in after the nearest connected seat before this one, wrapping around.
+        # New players take the last seat, so the search usually stops at once.
+        seats = reversed(self.players)
+        for pid in seats:
+            if pid == player_id:
+                break
+        prev_id = next((pid for pid in seats if pid in self._ring_next), None)
+        if prev_id is None:
+            prev_id = next(pid for pid in reversed(self.players) if pid in self._ring_next)
+        next_id = self._ring_next[prev_id]
+        self._ring_next[prev_id] = self._ring_prev[next_id] = player_id
+        self._ring_prev[player_id] = prev_id
+        self._ring_next[player_id] = next_id
+
+    def _remove_connected(self, player_id):
+        """Stop counting a player as connected and unlink them from the rotation ring"""
+        index = self._connected_index.pop(player_id)
+        last_id = self._connected.pop()
+        if last_id != player_id:
+            self._connected[index] = last_id
+            self._connected_index[last_id] = index
+        prev_id = self._ring_prev.pop(player_id)
+        next_id = self._ring_next.pop(player_id)
+        if prev_id != player_id:
+            self._ring_next[prev_id] = next_id
+            self._ring_prev[next_id] = prev_id
+
+    def _next_in_rotation(self, player_id):
+        """Id of the next connected player after `player_id` in seat order. If nobody
+        is connected, the next seat regardless."""
+        if player_id in self._ring_next:
+            return self._ring_next[player_id]
+        # Only a disconnected player is missing from the ring, so walk the seats
+        seats = list(self.players)
+        start = seats.index(player_id) + 1
+        following = seats[start:] + seats[:start]
+        return next((pid for pid in following if pid in self._ring_next), following[0])
+
+    def rounds_played(self, player):
+        """Rounds this game in which the player was truth-teller or liar"""
+        return self.game_state['current_round'] - player.times_as_guesser
+
+    def times_as_liar(self, player):
+        """Rounds this game that started with the player connected and a liar"""
+        rounds_connected = player.rounds_connected
+        if not player.is_disconnected:
+            rounds_connected += self.game_state['current_round'] - player.connected_since_round
+        return rounds_connected - player.times_as_guesser - player.times_as_truth_teller
+
+    @_action('status', unchanged=lambda room, status: room.game_state['status'] == status)
+    def set_status(self, status):
+        """Change the game status (waiting, playing, paused, finished)"""
+        self.game_state['status'] = status
+        self._record('st', status)
+
+    def _record(self, *op):
+        """Queue a change for the next delta sent to clients"""
+        self._delta_ops.append(list(op))
+        self._public_state = None
+        self.dirty = True
+
+    def _resync(self):
+        """Start a new version that clients receive as a full snapshot"""
+        self.version += 1
+        self._delta_ops = []
+        self._public_state = None
+        self.dirty = True
+
+    def drain_delta(self):
+        """Get the changes since the last version as {'base', 'version', 'ops'},
+        or None if nothing changed. Ops are idempotent:
+          ['g', player_id]          player was guessed
+          ['s', {player_id: pts}]   scores changed
+          ['t', points]             guesser's pending temp_points
+          ['d', player_id, bool]    player disconnected / reconnected
+          ['st', status]            game status changed
+        """
+        if not self._delta_ops:
+            return None
+        delta = {'base': self.version, 'version': self.version + 1, 'ops': self._delta_ops}
+        self.version += 1
+        self._delta_ops = []
+        return delta
     
+    @_action('start')
     def start_game(self):
         """Initialize and start the game"""
         if len(self.players) >= 3:
-            self.game_state['status'] = 'playing'
+            self.set_status('playing')
             # Make the last player the initial guesser so first player becomes guesser after swap
-            player_ids = list(self.players.keys())
-            self.players[player_ids[-1]].role = "guesser"
-            
-            # Set initial truth-teller (only from connected players)
-            non_guessers = [p for p in self.players.values()
-                            if not p.is_guesser() and not getattr(p, 'is_disconnected', False)]
-            truth_teller = random.choice(non_guessers)
-            truth_teller.role = "truth-teller"
+            last_player = self.players[next(reversed(self.players))]
+            last_player.role = "guesser"
+            self.game_state['current_guesser'] = last_player.id
             
             self.start_new_round()
             return True
@@ -117,59 +427,49 @@ class GameRoom:
         self.game_state['question'] = question
         self.game_state['answer'] = answer
         
-        # Reset all players' round state
-        for player in self.players.values():
-            player.reset_round()
+        # Reset round state; only the guesser and the guessed players have any
+        guesser = self.guesser
+        if guesser is not None:
+            guesser.reset_round()
+        for player_id in self.game_state['guessed_players']:
+            if player_id in self.players:
+                self.players[player_id].reset_round()
+        self.game_state['guessed_players'] = []
+        self.unguessed_count = len(self.players)
         
         # Swap roles
         self.swap_round()
-        
-        # Update game state
-        self.game_state['guessed_players'] = []
-        current_guesser = next(p for p in self.players.values() if p.is_guesser())
-        self.game_state['current_guesser'] = current_guesser.id
-        truth_teller = next(p for p in self.players.values() if p.is_truth_teller())
-        self.game_state['truth_teller'] = truth_teller.id
+        self._resync()
     
     def swap_round(self):
-        """Swap roles for the next round"""
-        player_ids = list(self.players.keys())
-        # Find current guesser and their index
-        current_guesser = next(p for p in self.players.values() if p.is_guesser())
-        current_index = player_ids.index(current_guesser.id)
-
-        # Reset current guesser to liar
+        """Swap roles for the next round. Only the old and new guesser and
+        truth-teller change; everyone else stays a liar. Rounds played and
+        times as liar are derived from the round count (see rounds_played)."""
+        current_guesser = self.guesser
+        old_truth_teller = self.truth_teller
+        if old_truth_teller is not None:
+            old_truth_teller.role = "liar"
         current_guesser.role = "liar"
 
-        # Set next *connected* player as guesser, skipping disconnected ones
-        next_index = (current_index + 1) % len(player_ids)
-        for _ in range(len(player_ids)):
-            candidate = self.players[player_ids[next_index]]
-            if not getattr(candidate, 'is_disconnected', False):
-                break
-            next_index = (next_index + 1) % len(player_ids)
-        next_guesser = self.players[player_ids[next_index]]
+        # Next *connected* player in seat order becomes guesser
+        next_guesser = self.players[self._next_in_rotation(current_guesser.id)]
         next_guesser.role = "guesser"
         next_guesser.times_as_guesser += 1
-
-        # Reset all non-guessers to liars
-        for player in self.players.values():
-            if not player.is_guesser():
-                player.role = "liar"
-                player.rounds_played += 1
+        self.game_state['current_guesser'] = next_guesser.id
 
         # Pick random *connected* non-guesser to be truth-teller
-        connected_non_guessers = [p for p in self.players.values()
-                                  if not p.is_guesser() and not getattr(p, 'is_disconnected', False)]
-        truth_teller = random.choice(connected_non_guessers)
+        candidates = self._connected
+        if len(candidates) < 2:
+            candidates = [pid for pid in self.players if pid != next_guesser.id]
+        truth_teller_id = next_guesser.id
+        while truth_teller_id == next_guesser.id:
+            truth_teller_id = candidates[self.rng.randrange(len(candidates))]
+        truth_teller = self.players[truth_teller_id]
         truth_teller.role = "truth-teller"
         truth_teller.times_as_truth_teller += 1
-
-        # Update liar count for remaining connected players
-        for player in connected_non_guessers:
-            if player.is_liar():
-                player.times_as_liar += 1
+        self.game_state['truth_teller'] = truth_teller_id
     
+    @_action('guess')
     def process_guess(self, guesser_id, guessed_player_id):
         """Process a guess from the guesser"""
         if self.game_state['status'] != 'playing':
@@ -189,12 +489,12 @@ class GameRoom:
         
         # Mark player as guessed
         guessed_player.has_been_guessed = True
+        self.unguessed_count -= 1
         self.game_state['guessed_players'].append(guessed_player_id)
+        self._record('g', guessed_player_id)
         
-        # Count remaining unguessed players
-        unguessed_players = [p for p in self.players.values() 
-                           if not p.has_been_guessed and p.id != guesser_id]
-        remaining_count = len(unguessed_players)
+        # Count remaining unguessed players (the guesser is never guessed)
+        remaining_count = self.unguessed_count - 1
         
         result = {
             'guessed_player': guessed_player.name,
@@ -215,8 +515,7 @@ class GameRoom:
             result['round_ended'] = True
             
             # Start new round since guessing truth-teller ends the round
-            next_guesser = self.get_next_guesser()
-            result['next_guesser'] = next_guesser.name
+            result['next_guesser'] = self.get_next_guesser().name
             self.end_round()
         else:
             # Guessed a liar correctly
@@ -225,9 +524,11 @@ class GameRoom:
             guesser.total_guesses += 1
             guessed_player.times_caught_as_liar += 1
             result['points_earned'] = 1
+            self._record('t', guesser.temp_points)
             
             # Check if only truth-teller remains
-            if remaining_count == 1 and unguessed_players[0].is_truth_teller():
+            truth_teller = self.truth_teller
+            if remaining_count == 1 and truth_teller is not None and not truth_teller.has_been_guessed:
                 guesser.add_points(guesser.temp_points + 1)  # Bonus point
                 result['points_earned'] = guesser.temp_points + 1
                 result['round_ended'] = True
@@ -242,7 +543,7 @@ class GameRoom:
     
     def end_round(self):
         """End the current round and handle point distribution"""
-        guesser = next(p for p in self.players.values() if p.is_guesser())
+        guesser = self.guesser
         
         # Add accumulated points to guesser
         guesser.add_points(guesser.temp_points)
@@ -256,17 +557,18 @@ class GameRoom:
         # Update scores and check if game is over
         self.update_scores()
         if any(p.get_points() >= 20 for p in self.players.values()):
-            self.game_state['status'] = 'finished'
+            self.set_status('finished')
             return self.get_final_results()
         
         # Start new round
         self.start_new_round()
         return None
     
+    @_action('end_turn')
     def end_turn_early(self):
         """Guesser ends their turn early, keeping accumulated points.
         Remaining unguessed liars each get 1 point."""
-        guesser = next(p for p in self.players.values() if p.is_guesser())
+        guesser = self.guesser
 
         # Guesser keeps their accumulated temp points
         guesser.add_points(guesser.temp_points)
@@ -279,7 +581,7 @@ class GameRoom:
 
         self.update_scores()
         if any(p.get_points() >= 20 for p in self.players.values()):
-            self.game_state['status'] = 'finished'
+            self.set_status('finished')
             return self.get_final_results()
 
         self.start_new_round()
@@ -287,38 +589,51 @@ class GameRoom:
 
     def get_new_qa(self):
         """Get a new question-answer pair, ensuring no repeats in the same game"""
-        with open('Questions.txt', 'r', encoding='utf-8') as file:
-            # Read all lines and remove empty ones
-            lines = [line.strip() for line in file.readlines() if line.strip()]
-            
-            # Filter out previously used questions
-            available_lines = [line for line in lines if line not in self.used_questions]
-            
-            # If we've used all questions, reset the used questions set
-            if not available_lines:
-                self.used_questions.clear()
-                available_lines = lines
-            
-            # Pick a random line
-            qa_line = random.choice(available_lines)
-            self.used_questions.add(qa_line)  # Mark as used
-            
-            # Split by semicolon into question and answer
-            question, answer = qa_line.split(';')
-            return question.strip(), answer.strip()
-    
+        question_bank.reload_if_changed()
+        if self._deck_version != question_bank.version:
+            self._rebuild_deck()
+
+        # If we've used all questions, reset the used questions set
+        if not self._question_deck:
+            self.used_questions.clear()
+            self._deck_generation += 1
+            self._rebuild_deck()
+
+        # Draw from the end of the shuffled deck
+        question_id = self._question_deck.pop()
+        self.used_questions.add(question_bank.lines[question_id])  # Mark as used
+        return question_bank.pairs[question_id]
+
+    def _rebuild_deck(self):
+        """Shuffle the ids of all questions not yet used in this game.
+        The order depends only on the seed and generation, so rebuilding after
+        some draws gives back the same remaining deck."""
+        lines = question_bank.lines
+        order = list(range(len(lines)))
+        random.Random(f"{self.seed}:deck:{self._deck_generation}").shuffle(order)
+        self._question_deck = array('I', [i for i in order if lines[i] not in self.used_questions])
+        self._deck_version = question_bank.version
+
     def update_scores(self):
         """Update scores in game state"""
+        changed = {}
         for player_id, player in self.players.items():
-            self.game_state['scores'][player_id] = player.get_points()
+            if self.game_state['scores'].get(player_id) != player.get_points():
+                self.game_state['scores'][player_id] = player.get_points()
+                changed[player_id] = player.get_points()
+        if changed:
+            self._record('s', changed)
     
     def get_final_results(self):
         """Get final game results with rankings and stats"""
+        # Ties are broken at random, but the same way every time for this game
+        tiebreak = random.Random(f"{self.seed}:{self.game_state['current_round']}")
+        liar_rounds = {p.id: self.times_as_liar(p) for p in self.players.values()}
         sorted_players = sorted(self.players.values(), 
                               key=lambda p: (p.points, 
                                            p.correct_guesses / p.total_guesses if p.total_guesses > 0 else 0,
-                                           p.times_survived_as_liar / p.times_as_liar if p.times_as_liar > 0 else 0,
-                                           random.random()),
+                                           p.times_survived_as_liar / liar_rounds[p.id] if liar_rounds[p.id] > 0 else 0,
+                                           tiebreak.random()),
                               reverse=True)
         
         results = {
@@ -331,7 +646,8 @@ class GameRoom:
         # Add rankings with stats
         for i, player in enumerate(sorted_players, 1):
             accuracy = (player.correct_guesses / player.total_guesses * 100) if player.total_guesses > 0 else 0
-            survival = (player.times_survived_as_liar / player.times_as_liar * 100) if player.times_as_liar > 0 else 0
+            times_as_liar = liar_rounds[player.id]
+            survival = (player.times_survived_as_liar / times_as_liar * 100) if times_as_liar > 0 else 0
             
             results['rankings'].append({
                 'rank': i,
@@ -343,10 +659,10 @@ class GameRoom:
             
             # Add detailed stats
             results['stats'][player.id] = {
-                'rounds_played': player.rounds_played,
+                'rounds_played': self.rounds_played(player),
                 'times_as_guesser': player.times_as_guesser,
                 'times_as_truth_teller': player.times_as_truth_teller,
-                'times_as_liar': player.times_as_liar,
+                'times_as_liar': times_as_liar,
                 'correct_guesses': player.correct_guesses,
                 'total_guesses': player.total_guesses,
                 'times_caught': player.times_caught_as_liar,
@@ -357,7 +673,7 @@ class GameRoom:
         best_guesser = max(self.players.values(), 
                           key=lambda p: p.correct_guesses if p.total_guesses > 0 else -1)
         best_survivor = max(self.players.values(), 
-                          key=lambda p: p.times_survived_as_liar if p.times_as_liar > 0 else -1)
+                          key=lambda p: p.times_survived_as_liar if liar_rounds[p.id] > 0 else -1)
         
         results['awards'] = {
             'best_guesser': {
@@ -372,44 +688,133 @@ class GameRoom:
         
         return results
     
+    def to_snapshot(self):
+        """Everything needed to rebuild the room after a restart, as JSON-safe data"""
+        return {
+            'room_code': self.room_code,
+            'version': self.version,
+            'game_state': dict(self.game_state, scores=list(self.game_state['scores'].items())),
+            'players': [player.to_snapshot() for player in self.players.values()],
+            'used_questions': sorted(self.used_questions),
+            'deck_generation': self._deck_generation,
+            'seed': self.seed,
+            'log': self.log,
+            'log_start': self.log_start,
+            'checkpoint': self.checkpoint,
+            'connected': list(self._connected),  # The truth-teller draw depends on this order
+        }
+
+    def _checkpoint(self):
+        """Start the log over from the room as it is now, so the log and snapshots
+        only ever cover the latest stretch of the current game"""
+        self.log_start += len(self.log)
+        self.log = []
+        self.checkpoint = None
+        self.checkpoint = copy.deepcopy(self.to_snapshot())
+
+    @classmethod
+    def from_snapshot(cls, data):
+        """Rebuild a room written by to_snapshot()"""
+        room = cls(data['room_code'], seed=data['seed'])
+        room.log = data['log']
+        room.log_start = data.get('log_start', 0)
+        room.checkpoint = data.get('checkpoint')
+        room.version = data['version']
+        room.game_state = dict(data['game_state'],
+                               scores={pid: points for pid, points in data['game_state']['scores']})
+        for player_data in data['players']:
+            player = Player.from_snapshot(player_data)
+            room.players[player.id] = player  # seat by seat, so linking into the ring stays cheap
+            if not player.is_disconnected:
+                room._add_connected(player.id)
+        if 'connected' in data:
+            # Reconnects reorder _connected, so seat order alone would draw other truth-tellers
+            room._connected = list(data['connected'])
+            room._connected_index = {pid: index for index, pid in enumerate(room._connected)}
+        room.unguessed_count = sum(not p.has_been_guessed for p in room.players.values())
+        room.used_questions = set(data['used_questions'])
+        room._deck_generation = data['deck_generation']  # The deck itself is rebuilt on the next draw
+        room.dirty = False
+        return room
+
+    @staticmethod
+    def roster_entry(player):
+        """What the waiting room list shows of a player"""
+        return {'id': player.id, 'name': player.name, 'is_disconnected': player.is_disconnected}
+
+    def get_roster(self):
+        """The full roster as {'version', 'players'}, players in seat order"""
+        return {'version': self.roster_version,
+                'players': [self.roster_entry(player) for player in self.players.values()]}
+
+    def drain_roster_delta(self):
+        """Get the roster changes since the last version as {'base', 'version', 'ops'},
+        or None if nothing changed. Ops are applied in order:
+          ['add', entry]          player took a seat
+          ['remove', player_id]   player left the room
+          ['update', entry]       player's name or connection changed
+        """
+        if not self._roster_ops:
+            return None
+        delta = {'base': self.roster_version, 'version': self.roster_version + 1, 'ops': self._roster_ops}
+        self.roster_version += 1
+        self._roster_ops = []
+        return delta
+
+    def get_public_state(self):
+        """Get the state every viewer shares, players and spectators alike: no
+        question, answer or roles. Built once and reused until the room changes."""
+        if self._public_state is None:
+            state = {key: value for key, value in self.game_state.items()
+                     if key not in ('question', 'answer', 'truth_teller')}
+            state['guessed_players'] = list(self.game_state['guessed_players'])
+            state['scores'] = dict(self.game_state['scores'])
+            state['players'] = {
+                pid: {
+                    'id': p.id,
+                    'name': p.name,
+                    'points': p.points,
+                    'has_been_guessed': p.has_been_guessed,
+                    'is_disconnected': p.is_disconnected
+                } for pid, p in self.players.items()
+            }
+            state['version'] = self.version
+            self._public_state = state
+        return self._public_state
+
+    def get_role_overlay(self, role):
+        """Get the part of the state only players with `role` may see"""
+        overlay = {'version': self.version, 'role': role, 'temp_points': 0}
+        if role == 'guesser':
+            # Only guesser sees the question
+            overlay['question'] = self.game_state['question']
+            guesser = self.players.get(self.game_state['current_guesser'])
+            if guesser is not None:
+                overlay['temp_points'] = guesser.temp_points
+        else:
+            # Only non-guessers see the answer
+            overlay['answer'] = self.game_state['answer']
+        return overlay
+
     def get_player_state(self, player_id):
         """Get game state from a specific player's perspective"""
-        state = self.game_state.copy()
         player = self.players[player_id]
-        
-        # Remove question and answer from state first
-        if 'answer' in state:
-            del state['answer']
-        if 'question' in state:
-            del state['question']
-        
-        # Only guesser sees the question
-        if player.is_guesser():
-            state['question'] = self.game_state['question']
-        
-        # Only non-guessers see the answer
-        if not player.is_guesser():
-            state['answer'] = self.game_state['answer']
-        
-        # Everyone sees basic player info
-        state['players'] = {
-            pid: {
-                'id': p.id,
-                'name': p.name,
-                'points': p.points,
-                'has_been_guessed': p.has_been_guessed,
-                'is_disconnected': getattr(p, 'is_disconnected', False)
-            } for pid, p in self.players.items()
-        }
-        
+        state = dict(self.get_public_state())
+        overlay = self.get_role_overlay(player.role)
+        if 'question' in overlay:
+            state['question'] = overlay['question']
+        if 'answer' in overlay:
+            state['answer'] = overlay['answer']
+
         # Add the player's own role
-        state['players'][player_id]['role'] = player.role
+        state['players'] = dict(state['players'])
+        state['players'][player_id] = dict(state['players'][player_id], role=player.role)
 
         # Expose accumulated temp_points so the guesser can see their pending score
         state['temp_points'] = player.temp_points
-
         return state
     
+    @_action('skip')
     def skip_question(self):
         """Skip the current question and get a new one"""
         question, answer = self.get_new_qa()
@@ -421,16 +826,16 @@ class GameRoom:
         }
     
     def get_next_guesser(self):
-        """Get the player who will be the next guesser"""
-        player_ids = list(self.players.keys())
-        current_guesser = next(p for p in self.players.values() if p.is_guesser())
-        current_index = player_ids.index(current_guesser.id)
-        next_index = (current_index + 1) % len(player_ids)
-        return self.players[player_ids[next_index]]
+        """Get the player who will be the next guesser, skipping disconnected players like swap_round"""
+        return self.players[self._next_in_rotation(self.game_state['current_guesser'])]
     
+    @_action('restart', checkpoint=True)
     def reset_for_restart(self):
         """Reset the room state but keep players"""
         self.used_questions = set()
+        self._question_deck = array('I')
+        self._deck_version = None
+        self._deck_generation += 1  # A new game gets a new question order
         self.game_state = {
             'status': 'waiting',
             'current_round': 0,
@@ -447,12 +852,14 @@ class GameRoom:
             player.has_been_guessed = False
             player.times_as_guesser = 0
             player.times_as_truth_teller = 0
-            player.times_as_liar = 0
             player.correct_guesses = 0
             player.total_guesses = 0
             player.times_caught_as_liar = 0
             player.times_survived_as_liar = 0
-            player.rounds_played = 0
+            player.rounds_connected = 0
+            player.connected_since_round = 0
             player.role = 'liar'
             self.game_state['scores'][player.id] = 0
+        self.unguessed_count = len(self.players)
+        self._resync()
 
@@ -0,0 +1,60 @@
+import time
+
+
+def parse_limits(spec):
+    """Parse 'event=rate/burst,...' (e.g. 'make_guess=2/5,skip_question=0.2/2')
+    into {event: (tokens per second, burst)}"""
+    limits = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        event, _, budget = item.partition('=')
+        rate, _, burst = budget.partition('/')
+        limits[event.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+class RateLimiter:
+    """Token buckets per (event, key), for the events listed in `limits`.
+
+    A bucket holds up to `burst` tokens and refills at `rate` tokens per second;
+    each event spends one. Buckets are created on first use, and evict_idle()
+    drops those that have refilled completely, since a full bucket is the same
+    as no bucket.
+    """
+
+    def __init__(self, limits, clock=time.monotonic):
+        self.limits = limits
+        self._clock = clock
+        self._buckets = {}  # (event, key) -> [tokens, last refill]
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def allow(self, event, key):
+        """Spend a token from key's bucket for this event. Returns False if the
+        bucket is empty. Events without a limit always pass."""
+        limit = self.limits.get(event)
+        if limit is None:
+            return True
+        rate, burst = limit
+        now = self._clock()
+        bucket = self._buckets.get((event, key))
+        if bucket is None:
+            bucket = self._buckets[(event, key)] = [burst, now]
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def evict_idle(self):
+        """Drop buckets that have refilled to their burst. Returns how many were dropped."""
+        now = self._clock()
+        idle = [bucket_key for bucket_key, (tokens, last) in self._buckets.items()
+                if tokens + (now - last) * self.limits[bucket_key[0]][0] >= self.limits[bucket_key[0]][1]]
+        for bucket_key in idle:
+            del self._buckets[bucket_key]
+        return len(idle)
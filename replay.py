@@ -0,0 +1,142 @@
+"""Rebuild rooms from their event logs, and simulate games in bulk.
+
+Every GameRoom records its actions in `room.log` and draws all randomness
+from an RNG seeded with `room.seed`, so replaying the log against a fresh
+room with the same seed reproduces it exactly. A restart, and every
+CHECKPOINT_INTERVAL actions, starts the log over from `room.checkpoint`, a
+snapshot of the room at that point, so the log and any replay only cover
+the latest stretch of the current game. Replays need the same
+Questions.txt the game was played with.
+
+    python replay.py show snapshots.sqlite3 ABCDEF --round 3
+    python replay.py simulate --games 1000 --players 5
+"""
+import argparse
+import json
+import random
+from collections import Counter
+
+from main import GameRoom, Player
+
+# Event kind -> GameRoom method, for every kind except 'add'
+_METHODS = {
+    'remove': 'remove_player',
+    'connect': 'set_player_connected',
+    'status': 'set_status',
+    'start': 'start_game',
+    'guess': 'process_guess',
+    'end_turn': 'end_turn_early',
+    'skip': 'skip_question',
+    'restart': 'reset_for_restart',
+}
+
+
+def apply_event(room, event):
+    """Apply one logged event to a room"""
+    kind, *args = event
+    if kind == 'add':
+        player_id, name = args
+        return room.add_player(Player(player_id, name))
+    return getattr(room, _METHODS[kind])(*args)
+
+
+def replay(seed, log, until_round=None, until_event=None, room_code='REPLAY', checkpoint=None):
+    """Rebuild a room from its seed and log, applied to `checkpoint` if the
+    log starts from one.
+
+    Stops after `until_event` events, or as soon as round `until_round` has
+    started, whichever comes first.
+    """
+    room = GameRoom.from_snapshot(checkpoint) if checkpoint else GameRoom(room_code, seed=seed)
+    for index, event in enumerate(log):
+        if until_event is not None and index >= until_event:
+            break
+        if until_round is not None and room.game_state['current_round'] >= until_round:
+            break
+        apply_event(room, event)
+    return room
+
+
+def simulate_game(seed, players=4, skip_rate=0.05, end_turn_rate=0.2, max_events=10000):
+    """Play one game to the end with random guessers. Returns the finished room."""
+    policy = random.Random(seed ^ 0x5EED)  # separate from the room's RNG, so the log alone replays it
+    room = GameRoom(f'SIM{seed}', seed=seed)
+    for player_id in range(1, players + 1):
+        room.add_player(Player(player_id, f'Player {player_id}'))
+    return play_game(room, policy, skip_rate, end_turn_rate, max_events)
+
+
+def play_game(room, policy, skip_rate=0.05, end_turn_rate=0.2, max_events=10000):
+    """Start a game in a seated room and play it to the end, choosing moves with `policy`"""
+    room.start_game()
+    first_event = room.log_start + len(room.log)
+    while room.game_state['status'] == 'playing' and room.log_start + len(room.log) - first_event < max_events:
+        guesser_id = room.game_state['current_guesser']
+        guessed = room.game_state['guessed_players']
+        roll = policy.random()
+        if not guessed and roll < skip_rate:
+            room.skip_question()
+        elif guessed and roll < end_turn_rate:
+            room.end_turn_early()
+        else:
+            candidates = [pid for pid in room.players if pid != guesser_id and pid not in guessed]
+            room.process_guess(guesser_id, policy.choice(candidates))
+    return room
+
+
+def _summary(room):
+    return {
+        'room_code': room.room_code,
+        'status': room.game_state['status'],
+        'current_round': room.game_state['current_round'],
+        'current_guesser': room.game_state['current_guesser'],
+        'truth_teller': room.game_state['truth_teller'],
+        'question': room.game_state['question'],
+        'players': {p.name: {'points': p.points, 'role': p.role} for p in room.players.values()},
+        'events': room.log_start + len(room.log),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay or simulate Something Fishy games')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show = commands.add_parser('show', help='replay a saved room and print its state')
+    show.add_argument('snapshot_db')
+    show.add_argument('room_code')
+    show.add_argument('--round', type=int, help='stop when this round starts')
+    show.add_argument('--event', type=int, help='stop after this many events')
+
+    simulate = commands.add_parser('simulate', help='play many games and report balance stats')
+    simulate.add_argument('--games', type=int, default=1000)
+    simulate.add_argument('--players', type=int, default=4)
+    simulate.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        from snapshots import SnapshotStore
+        store = SnapshotStore(args.snapshot_db)
+        data = next((room for room in store.load_rooms() if room['room_code'] == args.room_code), None)
+        store.close()
+        if data is None:
+            raise SystemExit(f"No snapshot for room {args.room_code}")
+        room = replay(data['seed'], data['log'], until_round=args.round, until_event=args.event,
+                      room_code=args.room_code, checkpoint=data.get('checkpoint'))
+        print(json.dumps(_summary(room), indent=2))
+        return
+
+    wins_by_seat = Counter()
+    rounds = []
+    for seed in range(args.seed, args.seed + args.games):
+        room = simulate_game(seed, players=args.players)
+        rounds.append(room.game_state['current_round'])
+        winner = max(room.players.values(), key=lambda p: p.points)
+        wins_by_seat[winner.id] += 1
+    print(f"{args.games} games with {args.players} players")
+    print(f"  rounds per game: mean {sum(rounds) / len(rounds):.1f}, min {min(rounds)}, max {max(rounds)}")
+    for seat in range(1, args.players + 1):
+        print(f"  seat {seat} wins {wins_by_seat[seat] / args.games:.1%}")
+
+
+if __name__ == '__main__':
+    main()
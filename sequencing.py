@@ -0,0 +1,50 @@
+import collections
+import threading
+
+
+class RoomSequencer:
+    """A lock per room, and the action IDs each room has recently seen.
+
+    Holding a room's lock while handling its events means an event that
+    yields (an emit, a message-queue publish) cannot interleave with another
+    event for the same room, while other rooms carry on. Locks are reentrant
+    so a handler can call helpers that lock the room again. Under gevent's
+    monkey patching they are greenlet locks.
+    """
+
+    def __init__(self, remember=256, lock_factory=None):
+        self.remember = remember
+        self._lock_factory = lock_factory or threading.RLock
+        self._locks = {}
+        self._seen = {}  # room_code -> (set of action IDs, deque of the same in arrival order)
+
+    def __len__(self):
+        return len(self._locks)
+
+    def lock(self, room_code):
+        lock = self._locks.get(room_code)
+        if lock is None:
+            lock = self._locks[room_code] = self._lock_factory()
+        return lock
+
+    def seen(self, room_code, action_id):
+        """Record an action ID for a room. Returns True if it was already recorded.
+        A missing action ID is never a repeat."""
+        if action_id is None:
+            return False
+        seen = self._seen.get(room_code)
+        if seen is None:
+            seen = self._seen[room_code] = (set(), collections.deque())
+        ids, order = seen
+        if action_id in ids:
+            return True
+        ids.add(action_id)
+        order.append(action_id)
+        if len(order) > self.remember:
+            ids.discard(order.popleft())
+        return False
+
+    def forget(self, room_code):
+        """Drop a deleted room's lock and action IDs"""
+        self._locks.pop(room_code, None)
+        self._seen.pop(room_code, None)
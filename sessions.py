@@ -0,0 +1,217 @@
+import secrets
+import sys
+import time
+from collections import OrderedDict
+
+
+class SessionRegistry:
+    """Socket sessions indexed both ways so lookups never scan every connection.
+
+    Keeps SID -> session, (room_code, player_id) -> SID and room_code -> set of
+    SIDs in step. Supports `sid in registry` and `registry[sid]` like the plain
+    dict it replaces.
+    """
+
+    def __init__(self):
+        self._by_sid = {}     # sid -> {player_id, room_code, name}
+        self._by_player = {}  # (room_code, player_id) -> sid
+        self._by_room = {}    # room_code -> {sid, ...}
+
+    def __contains__(self, sid):
+        return sid in self._by_sid
+
+    def __getitem__(self, sid):
+        return self._by_sid[sid]
+
+    def __len__(self):
+        return len(self._by_sid)
+
+    def get(self, sid, default=None):
+        return self._by_sid.get(sid, default)
+
+    def add(self, sid, player_id, room_code, name):
+        """Register a SID for a player, replacing any stale SID they had"""
+        self.remove(sid)
+        stale_sid = self._by_player.get((room_code, player_id))
+        if stale_sid is not None:
+            self.remove(stale_sid)
+
+        session = {'player_id': player_id, 'room_code': room_code, 'name': name}
+        self._by_sid[sid] = session
+        self._by_player[(room_code, player_id)] = sid
+        self._by_room.setdefault(room_code, set()).add(sid)
+        return session
+
+    def remove(self, sid):
+        """Forget a SID. Returns its session, or None if it was unknown."""
+        session = self._by_sid.pop(sid, None)
+        if session is None:
+            return None
+
+        key = (session['room_code'], session['player_id'])
+        if self._by_player.get(key) == sid:
+            del self._by_player[key]
+
+        room_sids = self._by_room.get(session['room_code'])
+        if room_sids is not None:
+            room_sids.discard(sid)
+            if not room_sids:
+                del self._by_room[session['room_code']]
+        return session
+
+    def get_sid(self, room_code, player_id):
+        """Get the current SID for a player, or None if they have no session"""
+        return self._by_player.get((room_code, player_id))
+
+    def room_sids(self, room_code):
+        """Get the set of SIDs currently registered in a room"""
+        return self._by_room.get(room_code, set())
+
+    def remove_room(self, room_code):
+        """Forget every session in a room"""
+        for sid in list(self._by_room.get(room_code, ())):
+            self.remove(sid)
+
+
+class TokenStore:
+    """Bounded store of rejoin tokens: token -> {player_id, room_code, name}.
+
+    Tokens expire `ttl` seconds after they were last used, the least recently
+    used token is evicted once `max_tokens` is reached, and each player keeps
+    at most `max_per_player` tokens. Tokens are indexed by room so deleting a
+    room invalidates all of its tokens at once. Tokens touched since the last
+    drain_changes() are tracked so they can be persisted in batches.
+    """
+
+    def __init__(self, ttl=24 * 3600, max_tokens=100000, max_per_player=3, clock=time.time):
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self.max_per_player = max_per_player
+        self._clock = clock
+        self._tokens = OrderedDict()  # token -> (session, last_used), least recently used first
+        self._by_player = {}          # (room_code, player_id) -> [token, ...] oldest first
+        self._by_room = {}            # room_code -> {token, ...}
+        self.evictions = {'expired': 0, 'lru': 0, 'player_cap': 0, 'invalidated': 0}
+        self._changed = set()         # tokens issued, used or removed since drain_changes()
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def issue(self, player_id, room_code, name):
+        """Create a new token for a player, evicting old ones if over a limit"""
+        token = secrets.token_hex(16)
+        self._add(token, {'player_id': player_id, 'room_code': room_code, 'name': name}, self._clock())
+        self._changed.add(token)
+
+        player_tokens = self._by_player[(room_code, player_id)]
+        while len(player_tokens) > self.max_per_player:
+            self._remove(player_tokens[0], 'player_cap')
+        while len(self._tokens) > self.max_tokens:
+            self._remove(next(iter(self._tokens)), 'lru')
+        return token
+
+    def get(self, token):
+        """Get the session for a live token and mark it as recently used"""
+        entry = self._tokens.get(token)
+        if entry is None:
+            return None
+        session, last_used = entry
+        now = self._clock()
+        if now - last_used >= self.ttl:
+            self._remove(token, 'expired')
+            return None
+        self._tokens[token] = (session, now)
+        self._tokens.move_to_end(token)
+        self._changed.add(token)
+        return session
+
+    def revoke(self, token):
+        """Forget a single token"""
+        if token in self._tokens:
+            self._remove(token, None)
+
+    def invalidate_player(self, room_code, player_id):
+        """Forget every token belonging to a player. Returns how many were removed."""
+        tokens = list(self._by_player.get((room_code, player_id), ()))
+        for token in tokens:
+            self._remove(token, 'invalidated')
+        return len(tokens)
+
+    def invalidate_room(self, room_code):
+        """Forget every token for a room. Returns how many were removed."""
+        tokens = list(self._by_room.get(room_code, ()))
+        for token in tokens:
+            self._remove(token, 'invalidated')
+        return len(tokens)
+
+    def expire(self):
+        """Drop tokens past their TTL. Returns how many were removed."""
+        cutoff = self._clock() - self.ttl
+        removed = 0
+        # Ordered by last use, so expired tokens are all at the front
+        while self._tokens:
+            token, (_, last_used) = next(iter(self._tokens.items()))
+            if last_used > cutoff:
+                break
+            self._remove(token, 'expired')
+            removed += 1
+        return removed
+
+    def restore(self, token, session, last_used):
+        """Put back a token loaded from a snapshot, without marking it changed"""
+        if token not in self._tokens:
+            self._add(token, session, last_used)
+
+    def drain_changes(self):
+        """Get what changed since the last call: ([(token, session, last_used), ...], [removed_token, ...])"""
+        saved, removed = [], []
+        for token in self._changed:
+            entry = self._tokens.get(token)
+            if entry is None:
+                removed.append(token)
+            else:
+                saved.append((token, entry[0], entry[1]))
+        self._changed = set()
+        return saved, removed
+
+    def stats(self):
+        """Sizes and eviction counts, with a rough estimate of memory held"""
+        approx_bytes = sys.getsizeof(self._tokens) + sys.getsizeof(self._by_player) + sys.getsizeof(self._by_room)
+        if self._tokens:
+            token, (session, _) = next(iter(self._tokens.items()))
+            # token string, session dict and its values, plus one slot in each index
+            per_token = (sys.getsizeof(token) * 3 + sys.getsizeof(session)
+                         + sum(sys.getsizeof(v) for v in session.values()) + 64)
+            approx_bytes += per_token * len(self._tokens)
+        return {
+            'tokens': len(self._tokens),
+            'players': len(self._by_player),
+            'rooms': len(self._by_room),
+            'approx_bytes': approx_bytes,
+            'evictions': dict(self.evictions),
+        }
+
+    def _add(self, token, session, last_used):
+        self._tokens[token] = (session, last_used)
+        self._by_player.setdefault((session['room_code'], session['player_id']), []).append(token)
+        self._by_room.setdefault(session['room_code'], set()).add(token)
+
+    def _remove(self, token, reason):
+        session, _ = self._tokens.pop(token)
+        self._changed.add(token)
+        key = (session['room_code'], session['player_id'])
+        player_tokens = self._by_player.get(key)
+        if player_tokens is not None:
+            player_tokens.remove(token)
+            if not player_tokens:
+                del self._by_player[key]
+        room_tokens = self._by_room.get(session['room_code'])
+        if room_tokens is not None:
+            room_tokens.discard(token)
+            if not room_tokens:
+                del self._by_room[session['room_code']]
+        if reason:
+            self.evictions[reason] += 1
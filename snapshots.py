@@ -0,0 +1,79 @@
+import json
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    room_code TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    saved_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT PRIMARY KEY,
+    session TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+class SnapshotStore:
+    """Room snapshots and rejoin tokens kept in SQLite (WAL mode) so a restarted
+    worker can pick its games back up.
+
+    Callers collect everything that changed since the last flush and hand it
+    to write() as one batch, which is committed in a single transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL with synchronous=NORMAL only fsyncs at checkpoints; a power cut can lose the last batch
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self.stats = {
+            'flushes': 0,
+            'rooms_written': 0,
+            'rooms_deleted': 0,
+            'tokens_written': 0,
+            'tokens_deleted': 0,
+            'bytes_written': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+        }
+
+    def write(self, rooms=(), deleted_rooms=(), tokens=(), deleted_tokens=()):
+        """Save room snapshots and (token, session, last_used) entries and drop deleted ones"""
+        started = time.perf_counter()
+        now = time.time()
+        room_rows = [(room['room_code'], json.dumps(room, separators=(',', ':')), now) for room in rooms]
+        token_rows = [(token, json.dumps(session, separators=(',', ':')), last_used)
+                      for token, session, last_used in tokens]
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO rooms VALUES (?, ?, ?)', room_rows)
+            self._conn.executemany('DELETE FROM rooms WHERE room_code = ?', [(code,) for code in deleted_rooms])
+            self._conn.executemany('INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)', token_rows)
+            self._conn.executemany('DELETE FROM tokens WHERE token = ?', [(token,) for token in deleted_tokens])
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats['flushes'] += 1
+        self.stats['rooms_written'] += len(room_rows)
+        self.stats['rooms_deleted'] += len(deleted_rooms)
+        self.stats['tokens_written'] += len(token_rows)
+        self.stats['tokens_deleted'] += len(deleted_tokens)
+        self.stats['bytes_written'] += sum(len(row[1]) for row in room_rows) + sum(len(row[1]) for row in token_rows)
+        self.stats['last_flush_ms'] = round(elapsed_ms, 3)
+        self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], self.stats['last_flush_ms'])
+        return elapsed_ms
+
+    def load_rooms(self):
+        """Get every saved room snapshot"""
+        return [json.loads(data) for (data,) in self._conn.execute('SELECT data FROM rooms')]
+
+    def load_tokens(self):
+        """Get every saved token as (token, session, last_used), least recently used first"""
+        return [(token, json.loads(session), last_used) for token, session, last_used
+                in self._conn.execute('SELECT token, session, last_used FROM tokens ORDER BY last_used')]
+
+    def close(self):
+        self._conn.close()
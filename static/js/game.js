@@ -1,18 +1,85 @@
-// Connect to the Socket.IO server
+// Connect to the Socket.IO server. In multi-worker mode the room code rides
+// along as a query parameter so the router can send us to the room's worker.
+// We offer msgpack when the decoder is loaded; the server falls back to JSON.
+const savedRoom = localStorage.getItem("fishyRoom");
 const socket = io({
+  auth: { codecs: window.decodeMsgpack ? ["msgpack", "json"] : ["json"] },
   transports: ["polling", "websocket"],
   reconnection: true,
   reconnectionAttempts: 20,
   reconnectionDelay: 1000,
   path: "/socket.io",
+  query: window.FISHY_SHARDED && savedRoom ? { room: savedRoom } : {},
 });
 
+// Reconnect to the worker that owns `code` (if needed), then run callback
+function routeSocketToRoom(code, callback) {
+  if (!window.FISHY_SHARDED || socket.io.opts.query.room === code) {
+    callback();
+    return;
+  }
+  socket.io.opts.query = { room: code };
+  socket.once("connect", callback);
+  socket.disconnect().connect();
+}
+
+// Handlers by event name, so events unpacked from a batch reach them too
+const eventHandlers = {};
+// Number (seq) of the last room-wide event handled; a rejoin asks for the ones after it
+let lastSeq = null;
+
+function decodePayload(payload) {
+  return payload instanceof ArrayBuffer || ArrayBuffer.isView(payload)
+    ? window.decodeMsgpack(payload)
+    : payload;
+}
+
+// Listen for a server event, decoding binary (msgpack) payloads first
+function onEvent(event, handler) {
+  eventHandlers[event] = handler;
+  socket.on(event, (payload) => dispatch(event, decodePayload(payload)));
+}
+
+function dispatch(event, data) {
+  if (data && typeof data.seq === "number") lastSeq = data.seq;
+  const handler = eventHandlers[event];
+  if (handler) handler(data === null ? undefined : data);
+}
+
+// Run a list of [event, payload] pairs through their handlers in order
+function dispatchAll(events) {
+  for (const [event, data] of events) dispatch(event, data);
+}
+
+// Bursts of events for the same target arrive as one "batch" frame of
+// [event, payload] pairs, handled in order
+socket.on("batch", (payload) => dispatchAll(decodePayload(payload)));
+
+// After a rejoin, the room events sent while we were away
+onEvent("missed_events", (data) => {
+  hideReconnectingBanner();
+  dispatchAll(data.events);
+});
+
+// Emit a game action with a unique ID, so the server applies it at most once
+// even if the packet is sent again after a reconnect
+const actionPrefix = Math.random().toString(36).slice(2, 10);
+let actionCounter = 0;
+function emitAction(event, data) {
+  actionCounter += 1;
+  socket.emit(event, { ...data, action_id: `${actionPrefix}-${actionCounter}` });
+}
+
 // Game state
 let playerName = "";
 let roomCode = "";
 let isHost = false;
 let myPlayerId = null;
 let bonusMessageShown = false; // Global flag to prevent duplicate bonus messages
+let currentState = null; // Last full game state, kept current by state_delta events
+let isSpectator = false; // Watching read-only: we get the shared state but no role
+let audienceState = null; // Latest audience_update: spectator count and truth-teller votes
+let myVote = null; // Player this spectator voted for this round
 
 // DOM Elements
 const landingButtons = document.getElementById("landing-buttons");
@@ -90,6 +157,8 @@ function hideReconnectingBanner() {
 socket.on("connect", () => {
   console.log("Connected to server with ID:", socket.id);
   hideReconnectingBanner();
+  // Spectators have no session token; just start watching again
+  if (isSpectator && roomCode) socket.emit("spectate", { room_code: roomCode });
 });
 
 socket.on("connect_error", (error) => {
@@ -99,32 +168,39 @@ socket.on("connect_error", (error) => {
 
 socket.on("disconnect", (reason) => {
   console.log("Disconnected from server:", reason);
-  showReconnectingBanner();
+  if (reason !== "io client disconnect") {
+    showReconnectingBanner();
+  }
 });
 
-// Auto-rejoin using stored session token when Socket.IO reconnects
-socket.on("reconnect", () => {
-  console.log("Socket.IO reconnected with new SID:", socket.id);
-  const token = localStorage.getItem("fishyToken");
-  if (token && roomCode) {
-    socket.emit("rejoin_game", { token });
-  } else {
-    hideReconnectingBanner();
-  }
+// Auto-rejoin using stored session token when Socket.IO reconnects. Reconnect
+// events fire on the Manager (socket.io), not the socket, before the socket
+// itself has connected again.
+socket.io.on("reconnect", () => {
+  socket.once("connect", () => {
+    console.log("Socket.IO reconnected with new SID:", socket.id);
+    const token = localStorage.getItem("fishyToken");
+    if (token && roomCode) {
+      socket.emit("rejoin_game", { token, last_seq: lastSeq });
+    } else {
+      hideReconnectingBanner();
+    }
+  });
 });
 
-socket.on("reconnect_failed", () => {
+socket.io.on("reconnect_failed", () => {
   localStorage.removeItem("fishyToken");
   alert("Could not reconnect after multiple attempts. Please refresh the page.");
 });
 
 // Server issued (or refreshed) a session token — persist it
-socket.on("session_token", (data) => {
+onEvent("session_token", (data) => {
   localStorage.setItem("fishyToken", data.token);
+  localStorage.setItem("fishyRoom", data.room_code);
 });
 
 // Token-based rejoin failed — clear stale token and let user rejoin manually
-socket.on("rejoin_failed", (data) => {
+onEvent("rejoin_failed", (data) => {
   console.warn("Rejoin failed:", data.message);
   localStorage.removeItem("fishyToken");
   hideReconnectingBanner();
@@ -133,7 +209,7 @@ socket.on("rejoin_failed", (data) => {
 });
 
 // Rejoined during waiting room — repopulate the player list
-socket.on("rejoined_waiting", (data) => {
+onEvent("rejoined_waiting", (data) => {
   hideReconnectingBanner();
   myPlayerId = data.player_id;
   waitingRoom.style.display = "block";
@@ -141,20 +217,11 @@ socket.on("rejoined_waiting", (data) => {
   gameOver.style.display = "none";
   landingButtons.style.display = "none";
   document.getElementById("room-code-display").textContent = data.room_code;
-
-  const playersList = document.getElementById("players-list");
-  playersList.innerHTML = "";
-  data.players.forEach((p) => {
-    const item = document.createElement("div");
-    item.className = "player-item";
-    item.setAttribute("data-player-id", p.id);
-    item.textContent = `${p.name} is in the room`;
-    playersList.appendChild(item);
-  });
+  renderRoster();
 });
 
 // Handle errors from server
-socket.on("error", (data) => {
+onEvent("error", (data) => {
   console.error("Server error:", data);
   alert(`Error: ${data.message}`);
 
@@ -171,7 +238,7 @@ socket.on("error", (data) => {
   }
 });
 
-// Create Room
+// Create Room: one acknowledged call creates the room and seats us as host
 document.getElementById("create-room").addEventListener("click", () => {
   playerName = document.getElementById("create-player-name").value.trim();
   if (!playerName) {
@@ -180,36 +247,22 @@ document.getElementById("create-room").addEventListener("click", () => {
   }
 
   console.log("Creating room for player:", playerName);
-  fetch("/create_room", {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-    },
-    body: JSON.stringify({ name: playerName }),
-  })
-    .then((response) => response.json())
-    .then((data) => {
-      if (data.error) {
-        alert(data.error);
-        return;
-      }
-      roomCode = data.room_code;
-      isHost = true;
-      console.log(
-        "Room created successfully. Room code:",
-        roomCode,
-        "Is host:",
-        isHost,
-      );
-      joinGame();
-    })
-    .catch((error) => {
-      console.error("Error creating room:", error);
-      alert("Error creating room. Please try again.");
-    });
+  // The worker we are connected to creates a room it owns. Our connection was
+  // routed without a room, though, so reconnect with the room in the query and
+  // take our seat back; later reconnects then reach the same worker.
+  socket.emit("create_room", { name: playerName }, (reply) => {
+    if (reply && !reply.error) isHost = true;
+    handleJoinReply(reply);
+    if (reply && !reply.error) {
+      routeSocketToRoom(reply.room_code, () => {
+        socket.emit("rejoin_game", { token: reply.token, last_seq: lastSeq });
+      });
+    }
+  });
 });
 
-// Join Room
+// Join Room. The server reconnects us to our old seat if our name matches a
+// disconnected player, and says who can reconnect if the game is in progress.
 document.getElementById("join-room").addEventListener("click", () => {
   playerName = document.getElementById("join-player-name").value.trim();
   roomCode = document.getElementById("room-code").value.trim().toUpperCase();
@@ -219,153 +272,151 @@ document.getElementById("join-room").addEventListener("click", () => {
     return;
   }
 
-  // First check room status to see if reconnection is possible
-  fetch(`/room_status/${roomCode}`)
-    .then((response) => response.json())
-    .then((data) => {
-      if (data.error) {
-        // Room doesn't exist, proceed with normal join
-        attemptJoinRoom();
-      } else {
-        // Room exists, show status and disconnected players
-        console.log("Room status:", data);
-
-        if (data.disconnected_players.includes(playerName)) {
-          console.log(
-            `Player ${playerName} found in disconnected players list`,
-          );
-          alert(`Reconnecting as ${playerName}...`);
-          // Skip HTTP endpoint and go directly to WebSocket for reconnection
-          joinGame();
-        } else if (data.status !== "waiting") {
-          const disconnectedList =
-            data.disconnected_players.length > 0
-              ? `\n\nDisconnected players available for reconnection:\n${data.disconnected_players.join(", ")}`
-              : "\n\nNo disconnected players available.";
-
-          if (
-            confirm(
-              `Game is in progress (Round ${data.current_round}).${disconnectedList}\n\nTry to join anyway?`,
-            )
-          ) {
-            // For non-reconnection attempts to games in progress, still try HTTP first
-            attemptJoinRoom();
-          }
-          return;
-        } else {
-          // Game is waiting, proceed normally
-          attemptJoinRoom();
-        }
-      }
-    })
-    .catch((error) => {
-      console.error("Error checking room status:", error);
-      attemptJoinRoom(); // Fallback to normal join
-    });
-});
-
-function attemptJoinRoom() {
-  fetch(`/join_room/${roomCode}`, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-    },
-    body: JSON.stringify({ name: playerName }),
-  })
-    .then((response) => response.json())
-    .then((data) => {
-      if (data.error) {
-        alert(data.error);
-        return;
-      }
-      joinGame();
-    })
-    .catch((error) => {
-      console.error("Error joining room:", error);
-      alert("Error joining room. Please try again.");
-    });
-}
-
-function joinGame() {
   console.log(`Attempting to join game: ${roomCode} as ${playerName}`);
-
-  socket.emit("join_game", {
-    room_code: roomCode,
-    name: playerName,
+  routeSocketToRoom(roomCode, () => {
+    socket.emit("join", { room_code: roomCode, name: playerName }, handleJoinReply);
   });
+});
+
+// The create_room / join acknowledgement carries everything needed to show
+// the room: {room_code, player_id, token, roster, state} or {error}
+function handleJoinReply(reply) {
+  if (!reply) return; // refused by a rate limit; an error event explains
+  if (reply.error) {
+    alert(reply.error);
+    return;
+  }
+  roomCode = reply.room_code;
+  lastSeq = reply.seq;
+  localStorage.setItem("fishyToken", reply.token);
+  localStorage.setItem("fishyRoom", reply.room_code);
 
   createRoomSection.style.display = "none";
   joinRoomSection.style.display = "none";
   waitingRoom.style.display = "block";
   document.getElementById("room-code-display").textContent = roomCode;
+
+  roster = reply.roster;
+  renderRoster();
+  // A game in progress shows the game interface, anything else the waiting room
+  const inProgress = ["playing", "paused"].includes(reply.state.status);
+  eventHandlers[inProgress ? "game_started" : "game_state"](reply.state);
 }
 
-// Handle player joined
-socket.on("player_joined", (data) => {
-  console.log("Player joined event received:", data);
-  const playersList = document.getElementById("players-list");
+// Watch a room without playing
+document.getElementById("watch-room").addEventListener("click", () => {
+  roomCode = document.getElementById("room-code").value.trim().toUpperCase();
+  if (!roomCode) {
+    alert("Please enter a room code");
+    return;
+  }
+  routeSocketToRoom(roomCode, () => {
+    socket.emit("spectate", { room_code: roomCode });
+  });
+});
 
-  // Check if this player is already in the list
-  const existingPlayer = playersList.querySelector(
-    `[data-player-id="${data.player.id}"]`,
-  );
-  if (existingPlayer) {
-    console.log("Player already in list:", data.player.name);
-    return; // Skip if player already shown
+onEvent("spectating", (data) => {
+  isSpectator = true;
+  roomCode = data.room_code;
+  audienceState = data.audience;
+  landingButtons.style.display = "none";
+  joinRoomSection.style.display = "none";
+  waitingRoom.style.display = "none";
+  gameOver.style.display = "none";
+  gameSection.style.display = "block";
+  document.getElementById("room-code-corner").textContent = roomCode;
+  document.getElementById("players-heading").textContent = "Who is the truth-teller?";
+  updateGameState(data.state);
+});
+
+// Spectator count and vote tallies, sent to the whole room at most once a batch window
+onEvent("audience_update", (update) => {
+  audienceState = update;
+  if (isSpectator) {
+    if (currentState) renderSpectatorView(currentState);
+    return;
   }
+  const counter = document.getElementById("audience-count");
+  if (counter) counter.textContent = audienceLabel();
+});
+
+function audienceLabel() {
+  const watching = audienceState ? audienceState.spectators : 0;
+  return watching > 0 ? ` · ${watching} watching` : "";
+}
 
-  const playerItem = document.createElement("div");
-  playerItem.className = "player-item";
-  playerItem.setAttribute("data-player-id", data.player.id);
-  playerItem.textContent = data.message;
-  playersList.appendChild(playerItem);
+// Waiting room roster: {version, players: [{id, name, is_disconnected}]} in
+// seat order. The server sends it whole when we join and then only changes.
+let roster = null;
+
+function renderRoster() {
+  if (!roster) return;
+  const playersList = document.getElementById("players-list");
+  const items = roster.players.map((p) => {
+    const item = document.createElement("div");
+    item.className = p.is_disconnected ? "player-item disconnected" : "player-item";
+    item.setAttribute("data-player-id", p.id);
+    item.textContent = `${p.name} is in the room${p.is_disconnected ? " (Disconnected)" : ""}`;
+    return item;
+  });
+  playersList.replaceChildren(...items);
 
   if (isHost) {
-    console.log("Current player is host, showing start button");
-    const startButton = document.getElementById("start-game");
-    if (startButton) {
-      startButton.style.display = "block";
+    document.getElementById("start-game").style.display = "block";
+  }
+}
+
+onEvent("roster", (data) => {
+  if (isSpectator) return; // spectators follow players through the game state
+  roster = data;
+  renderRoster();
+});
+
+onEvent("roster_delta", (delta) => {
+  if (isSpectator) {
+    if (currentState) {
+      for (const [op, value] of delta.ops) {
+        if (op === "remove") delete currentState.players[value];
+        else currentState.players[value.id] = { points: 0, ...currentState.players[value.id], ...value };
+      }
+      renderSpectatorView(currentState);
+    }
+    return;
+  }
+  if (!roster || delta.version <= roster.version) return; // covered by a full roster
+  if (delta.base !== roster.version) {
+    // Missed a change: ask for the whole roster again
+    socket.emit("request_roster", { room_code: roomCode });
+    return;
+  }
+  for (const [op, value] of delta.ops) {
+    const index = roster.players.findIndex(
+      (p) => p.id === (op === "remove" ? value : value.id),
+    );
+    if (op === "remove") {
+      if (index !== -1) roster.players.splice(index, 1);
+    } else if (index === -1) {
+      roster.players.push(value);
     } else {
-      console.error("Start game button not found in DOM");
+      roster.players[index] = value;
     }
-  } else {
-    console.log("Current player is not host");
   }
+  roster.version = delta.version;
+  renderRoster();
 });
 
 // Handle player disconnection
-socket.on("player_disconnected", (data) => {
+onEvent("player_disconnected", (data) => {
   addGameMessage(data.message, "system");
-
-  // Update player list to show disconnected status
-  const playerItem = document.querySelector(
-    `[data-player-id="${data.player_id}"]`,
-  );
-  if (playerItem) {
-    playerItem.classList.add("disconnected");
-    playerItem.textContent += " (Disconnected)";
-  }
 });
 
 // Handle player reconnection
-socket.on("player_reconnected", (data) => {
+onEvent("player_reconnected", (data) => {
   addGameMessage(data.message, "guesser-announcement");
-
-  // Update player list to remove disconnected status
-  const playerItem = document.querySelector(
-    `[data-player-id="${data.player_id}"]`,
-  );
-  if (playerItem) {
-    playerItem.classList.remove("disconnected");
-    playerItem.textContent = playerItem.textContent.replace(
-      " (Disconnected)",
-      "",
-    );
-  }
 });
 
 // Handle game pause
-socket.on("game_paused", (data) => {
+onEvent("game_paused", (data) => {
   addGameMessage(data.message, "system");
 
   // Show pause overlay or message
@@ -388,7 +439,7 @@ socket.on("game_paused", (data) => {
 });
 
 // Handle game resume
-socket.on("game_resumed", (data) => {
+onEvent("game_resumed", (data) => {
   addGameMessage(data.message, "guesser-announcement");
 
   // Remove pause overlay
@@ -434,7 +485,7 @@ document.addEventListener("DOMContentLoaded", () => {
       }
 
       console.log("Emitting start_game event");
-      socket.emit("start_game", { room_code: roomCode });
+      emitAction("start_game", { room_code: roomCode });
     });
   } else {
     console.error("Start game button not found during initialization");
@@ -470,8 +521,50 @@ function addGameMessage(message, type = "info") {
   }, 10);
 }
 
+// Our own player id arrives with the first state after joining
+onEvent("game_state", (state) => {
+  myPlayerId = state.player_id;
+});
+
+// Round snapshots come as one shared base plus a small overlay for our role
+let pendingBase = null;
+
+onEvent("state_base", (base) => {
+  if (isSpectator) {
+    // Spectators get no overlay; the shared state is the whole picture
+    if (base.event === "new_round") {
+      document.getElementById("game-messages").innerHTML = "";
+      addGameMessage(`The new guesser is: ${base.next_guesser}`, "guesser-announcement");
+    } else if (base.event === "game_started") {
+      addGameMessage("Game has started!", "system");
+    }
+    myVote = null;
+    updateGameState(base.state);
+    return;
+  }
+  pendingBase = base;
+});
+
+onEvent("state_overlay", (overlay) => {
+  if (!pendingBase || pendingBase.state.version !== overlay.version) return;
+  const base = pendingBase;
+  pendingBase = null;
+
+  const state = { ...base.state, player_id: myPlayerId, temp_points: overlay.temp_points };
+  if (overlay.question !== undefined) state.question = overlay.question;
+  if (overlay.answer !== undefined) state.answer = overlay.answer;
+  state.players = { ...state.players };
+  state.players[myPlayerId] = { ...state.players[myPlayerId], role: overlay.role };
+  if (base.next_guesser) state.next_guesser = base.next_guesser;
+
+  if (base.event === "game_started") onGameStarted(state);
+  else if (base.event === "new_round") onNewRound(state);
+});
+
 // Handle game started event
-socket.on("game_started", (state) => {
+onEvent("game_started", onGameStarted);
+
+function onGameStarted(state) {
   console.log("Game started event received:", state);
   hideReconnectingBanner();
   waitingRoom.style.display = "none";
@@ -487,12 +580,48 @@ socket.on("game_started", (state) => {
 
   addGameMessage("Game has started!", "system");
   updateGameState(state);
-});
+}
 
 // Update game state
-socket.on("game_state_update", updateGameState);
+onEvent("game_state_update", updateGameState);
+
+// Apply a compact change to the last snapshot; ask for a new one if we missed a version
+onEvent("state_delta", (delta) => {
+  if (!currentState || currentState.version !== delta.base) {
+    socket.emit("request_state", { room_code: roomCode });
+    return;
+  }
+  delta.ops.forEach((op) => applyStateOp(currentState, op));
+  currentState.version = delta.version;
+  updateGameState(currentState);
+});
+
+function applyStateOp(state, op) {
+  const [kind, a, b] = op;
+  if (kind === "g") {
+    state.players[a].has_been_guessed = true;
+    if (!state.guessed_players.includes(a)) state.guessed_players.push(a);
+  } else if (kind === "s") {
+    Object.entries(a).forEach(([id, points]) => {
+      state.scores[id] = points;
+      if (state.players[id]) state.players[id].points = points;
+    });
+  } else if (kind === "t") {
+    state.temp_points = a;
+  } else if (kind === "d") {
+    if (state.players[a]) state.players[a].is_disconnected = b;
+  } else if (kind === "st") {
+    state.status = a;
+  }
+}
 
 function updateGameState(state) {
+  currentState = state;
+  if (isSpectator) {
+    renderSpectatorView(state);
+    return;
+  }
+
   // Find my player info
   const myPlayer = state.players[myPlayerId];
   if (!myPlayer || !myPlayer.role) return;
@@ -547,7 +676,7 @@ function updateGameState(state) {
       skipButton.textContent = "Skip Question";
       skipButton.onclick = () => {
         skipButton.disabled = true;
-        socket.emit("skip_question", { room_code: roomCode });
+        emitAction("skip_question", { room_code: roomCode });
       };
       roleContainer.appendChild(skipButton);
     }
@@ -570,6 +699,11 @@ function updateGameState(state) {
   const roundInfo = document.createElement("div");
   roundInfo.className = "text-xl font-bold text-sky-600 mb-6";
   roundInfo.textContent = `Round ${state.current_round || 1}`;
+  const audienceCount = document.createElement("span");
+  audienceCount.id = "audience-count";
+  audienceCount.className = "text-base font-normal text-gray-500";
+  audienceCount.textContent = audienceLabel();
+  roundInfo.appendChild(audienceCount);
   playersList.appendChild(roundInfo);
 
   // Add other players
@@ -599,7 +733,7 @@ function updateGameState(state) {
             `;
       const playerId = player.id;
       guessButton.onclick = () => {
-        socket.emit("make_guess", {
+        emitAction("make_guess", {
           room_code: roomCode,
           guessed_player_id: playerId,
         });
@@ -634,7 +768,7 @@ function updateGameState(state) {
         : "End Turn Early";
     endTurnBtn.onclick = () => {
       endTurnBtn.disabled = true;
-      socket.emit("end_turn", { room_code: roomCode });
+      emitAction("end_turn", { room_code: roomCode });
     };
     playersList.appendChild(endTurnBtn);
   }
@@ -648,8 +782,69 @@ function updateGameState(state) {
   }
 }
 
+// Read-only view for spectators: scores, who is guessing, and truth-teller voting
+function renderSpectatorView(state) {
+  const playing = state.status === "playing";
+  const guesser = state.players[state.current_guesser];
+  const votes =
+    audienceState && audienceState.round === state.current_round ? audienceState.votes : {};
+
+  const info = document.getElementById("game-info");
+  info.innerHTML = "";
+  const title = document.createElement("p");
+  title.className = "text-3xl font-bold text-sky-600";
+  title.textContent = "You are watching";
+  info.appendChild(title);
+  const status = document.createElement("p");
+  status.className = "text-xl mt-4";
+  status.textContent =
+    state.status === "waiting"
+      ? "Waiting for the game to start…"
+      : guesser
+        ? `${guesser.name} is guessing. Vote for who you think is telling the truth!`
+        : `Game ${state.status}`;
+  info.appendChild(status);
+
+  const list = document.getElementById("players-game-list");
+  list.innerHTML = "";
+  const roundInfo = document.createElement("div");
+  roundInfo.className = "text-xl font-bold text-sky-600 mb-6";
+  roundInfo.textContent = `Round ${state.current_round || 0}${audienceLabel()}`;
+  list.appendChild(roundInfo);
+
+  Object.values(state.players).forEach((player) => {
+    const isGuesser = player.id === state.current_guesser;
+    const count = votes[player.id] || 0;
+    const item = document.createElement("div");
+    item.className = "bg-sky-50 rounded-lg p-4 flex items-center justify-between";
+    if (player.has_been_guessed || player.is_disconnected) item.classList.add("opacity-50");
+
+    const label = document.createElement("span");
+    label.className = "flex items-center";
+    label.innerHTML = `<span class="material-icons mr-2">${isGuesser ? "search" : "person"}</span>`;
+    label.appendChild(document.createTextNode(
+      `${player.name} · ${player.points} pts${count ? ` · ${count} vote${count !== 1 ? "s" : ""}` : ""}`,
+    ));
+    item.appendChild(label);
+
+    if (playing && !isGuesser && !player.has_been_guessed) {
+      const voteButton = document.createElement("button");
+      voteButton.className = "btn-fishy text-sm px-4 py-1";
+      voteButton.textContent = myVote === player.id ? "Voted" : "Vote";
+      voteButton.disabled = myVote === player.id;
+      voteButton.onclick = () => {
+        myVote = player.id;
+        socket.emit("audience_vote", { player_id: player.id });
+        renderSpectatorView(currentState);
+      };
+      item.appendChild(voteButton);
+    }
+    list.appendChild(item);
+  });
+}
+
 // Handle guess results
-socket.on("guess_result", (result) => {
+onEvent("guess_result", (result) => {
   const message = document.createElement("div");
 
   // Set color and text based on whether it was the truth-teller
@@ -687,7 +882,7 @@ socket.on("guess_result", (result) => {
 });
 
 // Handle guesser ending turn early
-socket.on("turn_ended_early", (data) => {
+onEvent("turn_ended_early", (data) => {
   const pts = data.points_kept;
   const ptText = pts > 0 ? ` keeping ${pts} point${pts !== 1 ? "s" : ""}` : "";
   addGameMessage(
@@ -697,7 +892,9 @@ socket.on("turn_ended_early", (data) => {
 });
 
 // Handle new round state updates
-socket.on("new_round", (state) => {
+onEvent("new_round", onNewRound);
+
+function onNewRound(state) {
   bonusMessageShown = false; // Reset bonus message flag for new round
 
   // Clear previous round's chat messages
@@ -711,20 +908,11 @@ socket.on("new_round", (state) => {
 
   // Update the game state with the new round info
   updateGameState(state);
-});
+}
 
-// Handle question skip
-socket.on("question_skipped", (result) => {
-  // Update the question text for everyone
-  const questionElem = document.getElementById("current-question-text");
-  if (questionElem) {
-    questionElem.textContent = result.question;
-  }
-  // Update the answer text (only non-guessers have this element)
-  const answerElem = document.getElementById("current-answer-text");
-  if (answerElem) {
-    answerElem.textContent = result.answer;
-  }
+// Handle question skip. The whole room hears that it happened; the new
+// question (guesser) or answer (everyone else) follows in our role's overlay.
+onEvent("question_skipped", () => {
   // Re-enable skip button for the guesser
   const skipBtn = document.getElementById("skip-question-btn");
   if (skipBtn) {
@@ -733,11 +921,24 @@ socket.on("question_skipped", (result) => {
   addGameMessage("Question skipped! New question is ready.", "system");
 });
 
+onEvent("question_overlay", (overlay) => {
+  const questionElem = document.getElementById("current-question-text");
+  if (questionElem && overlay.question !== undefined) {
+    questionElem.textContent = overlay.question;
+  }
+  // Only non-guessers have the answer element
+  const answerElem = document.getElementById("current-answer-text");
+  if (answerElem && overlay.answer !== undefined) {
+    answerElem.textContent = overlay.answer;
+  }
+});
+
 // Game over
-socket.on("game_over", (results) => {
+onEvent("game_over", (results) => {
   // Hide game section and show game over
   gameSection.style.display = "none";
   gameOver.style.display = "block";
+  document.getElementById("play-again-btn").style.display = isSpectator ? "none" : "";
 
   const resultsDiv = document.getElementById("final-results");
   const rankingsList = resultsDiv.querySelector(".rankings-list");
@@ -851,6 +1052,7 @@ socket.on("game_over", (results) => {
 // Back to home / leave buttons (all clear token and reload)
 function leaveToHome() {
   localStorage.removeItem("fishyToken");
+  localStorage.removeItem("fishyRoom");
   window.location.reload();
 }
 
@@ -863,11 +1065,11 @@ document.getElementById("play-again-btn").addEventListener("click", () => {
   const btn = document.getElementById("play-again-btn");
   btn.disabled = true;
   btn.textContent = "Restarting…";
-  socket.emit("restart_game", { room_code: roomCode });
+  emitAction("restart_game", { room_code: roomCode });
 });
 
 // Handle game restart
-socket.on("game_restarting", () => {
+onEvent("game_restarting", () => {
   // Show message in game over screen
   const resultsDiv = document.getElementById("final-results");
   const restartMessage = document.createElement("div");
@@ -876,7 +1078,15 @@ socket.on("game_restarting", () => {
   resultsDiv.appendChild(restartMessage);
 });
 
-socket.on("game_restarted", () => {
+onEvent("game_restarted", () => {
+  if (isSpectator) {
+    // Back to watching; the room's players are unchanged
+    gameOver.style.display = "none";
+    gameSection.style.display = "block";
+    document.getElementById("game-messages").innerHTML = "";
+    socket.emit("request_state", { room_code: roomCode });
+    return;
+  }
   // Reset game state
   gameOver.style.display = "none";
   waitingRoom.style.display = "block";
@@ -890,9 +1100,8 @@ socket.on("game_restarted", () => {
   // Update waiting room display
   document.getElementById("room-code-display").textContent = roomCode;
 
-  // Clear and reset players list
-  const playersList = document.getElementById("players-list");
-  playersList.innerHTML = "";
+  // The players list is unchanged; the server sends the roster right after this
+  renderRoster();
 
   // Re-enable the Play Again button for next time
   const playAgainBtn = document.getElementById("play-again-btn");
@@ -905,23 +1114,6 @@ socket.on("game_restarted", () => {
   document.getElementById("start-game").style.display = "block";
 });
 
-// Handle player rejoining for restart
-socket.on("player_rejoined", (data) => {
-  const playersList = document.getElementById("players-list");
-
-  // Check if this player is already in the list
-  const existingPlayer = playersList.querySelector(
-    `[data-player-id="${data.player.id}"]`,
-  );
-  if (!existingPlayer) {
-    const playerItem = document.createElement("div");
-    playerItem.className = "player-item";
-    playerItem.setAttribute("data-player-id", data.player.id);
-    playerItem.textContent = `${data.player.name} rejoined the game`;
-    playersList.appendChild(playerItem);
-  }
-});
-
 // Add CSS for the new color classes
 const style = document.createElement("style");
 style.textContent = `
@@ -0,0 +1,98 @@
+// Minimal MessagePack decoder for server payloads sent with the msgpack codec.
+// Handles every type msgpack-python produces for plain JSON-like data.
+(function () {
+  const textDecoder = new TextDecoder();
+
+  function decodeMsgpack(buffer) {
+    const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    let pos = 0;
+
+    function str(length) {
+      const value = textDecoder.decode(bytes.subarray(pos, pos + length));
+      pos += length;
+      return value;
+    }
+
+    function bin(length) {
+      const value = bytes.slice(pos, pos + length);
+      pos += length;
+      return value;
+    }
+
+    function array(length) {
+      const value = new Array(length);
+      for (let i = 0; i < length; i++) value[i] = read();
+      return value;
+    }
+
+    function map(length) {
+      const value = {};
+      for (let i = 0; i < length; i++) {
+        const key = read();
+        value[key] = read();
+      }
+      return value;
+    }
+
+    function uint(size) {
+      let value;
+      if (size === 1) value = view.getUint8(pos);
+      else if (size === 2) value = view.getUint16(pos);
+      else if (size === 4) value = view.getUint32(pos);
+      else value = Number(view.getBigUint64(pos));
+      pos += size;
+      return value;
+    }
+
+    function int(size) {
+      let value;
+      if (size === 1) value = view.getInt8(pos);
+      else if (size === 2) value = view.getInt16(pos);
+      else if (size === 4) value = view.getInt32(pos);
+      else value = Number(view.getBigInt64(pos));
+      pos += size;
+      return value;
+    }
+
+    function read() {
+      const type = bytes[pos++];
+      if (type <= 0x7f) return type;
+      if (type <= 0x8f) return map(type & 0x0f);
+      if (type <= 0x9f) return array(type & 0x0f);
+      if (type <= 0xbf) return str(type & 0x1f);
+      if (type >= 0xe0) return type - 0x100;
+      switch (type) {
+        case 0xc0: return null;
+        case 0xc2: return false;
+        case 0xc3: return true;
+        case 0xc4: return bin(uint(1));
+        case 0xc5: return bin(uint(2));
+        case 0xc6: return bin(uint(4));
+        case 0xca: { const v = view.getFloat32(pos); pos += 4; return v; }
+        case 0xcb: { const v = view.getFloat64(pos); pos += 8; return v; }
+        case 0xcc: return uint(1);
+        case 0xcd: return uint(2);
+        case 0xce: return uint(4);
+        case 0xcf: return uint(8);
+        case 0xd0: return int(1);
+        case 0xd1: return int(2);
+        case 0xd2: return int(4);
+        case 0xd3: return int(8);
+        case 0xd9: return str(uint(1));
+        case 0xda: return str(uint(2));
+        case 0xdb: return str(uint(4));
+        case 0xdc: return array(uint(2));
+        case 0xdd: return array(uint(4));
+        case 0xde: return map(uint(2));
+        case 0xdf: return map(uint(4));
+        default:
+          throw new Error("Unsupported msgpack type 0x" + type.toString(16));
+      }
+    }
+
+    return read();
+  }
+
+  window.decodeMsgpack = decodeMsgpack;
+})();
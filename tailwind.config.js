@@ -0,0 +1,10 @@
+// Tailwind v3 config for build_assets.py: only classes found in these files
+// end up in static/css/tailwind.min.css. Class names built at runtime must
+// appear whole somewhere in them (e.g. "text-sky-600", not "text-sky-" + n).
+module.exports = {
+  content: ["./templates/**/*.html", "./static/js/**/*.js"],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
@@ -0,0 +1,314 @@
+import unittest
+from unittest import mock
+import pytest
+
+@pytest.mark.usefixtures('server')
+class TestSessionTokens(unittest.TestCase):
+    def test_token_names_its_room(self):
+        """Test that joining and rejoining send a session token naming the room, for the router to shard on"""
+        http = self.server.app.app.test_client()
+        room_code = http.post('/create_room', json={'name': 'Ann'}).get_json()['room_code']
+        client = self.server.connect()
+        client.emit('join_game', {'room_code': room_code, 'name': 'Ann'})
+        tokens = [data for event, data in self.server.events(client) if event == 'session_token']
+        self.assertEqual(len(tokens), 1)
+        self.assertEqual(tokens[0]['room_code'], room_code)
+
+        client.emit('rejoin_game', {'token': tokens[0]['token']})
+        tokens = [data for event, data in self.server.events(client) if event == 'session_token']
+        self.assertEqual(tokens[0]['room_code'], room_code)
+
+    def test_forwards_rooms_owned_elsewhere(self):
+        """Test that a room lookup reaching the wrong worker is answered by the owner"""
+        owner_reply = ({'room_code': 'ELSEWH', 'player_count': 2}, 200)
+        with mock.patch.object(self.server.app, 'owns_room', return_value=False), \
+                mock.patch.object(self.server.app, 'fetch_from_owner', return_value=owner_reply) as fetch:
+            response = self.server.app.app.test_client().get('/room_status/ELSEWH')
+        self.assertEqual(response.get_json()['player_count'], 2)
+        fetch.assert_called_once_with('ELSEWH', 'GET', '/room_status/ELSEWH')
+
+@pytest.mark.usefixtures('server')
+class TestRoundSnapshots(unittest.TestCase):
+    def test_each_role_gets_its_overlay(self):
+        """Test that a new round sends the shared state once to the room and each player only their own role's part"""
+        room_code, clients = self.server.seat('Ann', 'Bob', 'Cat')
+        clients[0].emit('start_game', {'room_code': room_code})
+        game_room = self.server.app.game_rooms[room_code]
+
+        for player_id, client in enumerate(clients, start=1):
+            events = self.server.events(client)
+            self.assertEqual([event for event, _ in events], ['state_base', 'state_overlay'])
+            base, overlay = events[0][1], events[1][1]
+            self.assertEqual(base['event'], 'game_started')
+            self.assertNotIn('question', base['state'])
+            self.assertNotIn('answer', base['state'])
+            role = game_room.players[player_id].role
+            self.assertEqual(overlay['role'], role)
+            if role == 'guesser':
+                self.assertEqual(overlay['question'], game_room.game_state['question'])
+                self.assertNotIn('answer', overlay)
+            else:
+                self.assertEqual(overlay['answer'], game_room.game_state['answer'])
+                self.assertNotIn('question', overlay)
+
+@pytest.mark.usefixtures('server')
+class TestSpectators(unittest.TestCase):
+    def test_skipped_question_stays_hidden_from_spectators(self):
+        """Test that a skip tells the room it happened but sends the new question
+        and answer only to the players whose role may see them"""
+        room_code, clients = self.server.seat('Ann', 'Bob', 'Cat')
+        watcher = self.server.connect()
+        watcher.emit('spectate', {'room_code': room_code})
+        clients[0].emit('start_game', {'room_code': room_code})
+        game_room = self.server.app.game_rooms[room_code]
+        guesser = clients[game_room.game_state['current_guesser'] - 1]
+        for client in clients:
+            self.server.events(client)
+
+        seen = self.server.events(watcher)
+        guesser.emit('skip_question', {'room_code': room_code})
+        question, answer = game_room.game_state['question'], game_room.game_state['answer']
+        seen += self.server.events(watcher)
+        self.assertIn('question_skipped', [event for event, _ in seen])
+        self.assertNotIn(question, repr(seen))
+        self.assertNotIn(answer, repr(seen))
+
+        for player_id, client in enumerate(clients, start=1):
+            events = self.server.events(client)
+            self.assertEqual([event for event, _ in events], ['question_skipped', 'question_overlay'])
+            self.assertNotIn(answer, repr(events[0]))
+            if game_room.players[player_id].role == 'guesser':
+                self.assertEqual(events[1][1]['question'], question)
+                self.assertNotIn(answer, repr(events[1]))
+            else:
+                self.assertEqual(events[1][1]['answer'], answer)
+                self.assertNotIn(question, repr(events[1]))
+
+@pytest.mark.usefixtures('server')
+class TestPausedRoundTransition(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(self.server.app, 'DISCONNECT_GRACE', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.names = ('Ann', 'Bob', 'Cat')
+        self.room_code, self.clients = self.server.seat(*self.names)
+        self.clients[0].emit('start_game', {'room_code': self.room_code})
+        game_room = self.server.app.game_rooms[self.room_code]
+        guesser = game_room.game_state['current_guesser']
+        self.clients[guesser - 1].emit('end_turn', {'room_code': self.room_code})
+        # A non-guesser drops while the result is on screen, pausing the game
+        self.dropped = next(i for i in range(3) if i + 1 != guesser)
+        self.clients[self.dropped].disconnect()
+        self.assertEqual(game_room.game_state['status'], 'paused')
+        self.server.advance(self.server.app.ROUND_RESULT_DELAY)
+        self.watcher = self.clients[next(i for i in range(3) if i != self.dropped)]
+        self.assertNotIn('new_round', self.round_events(self.watcher))
+
+    def round_events(self, client):
+        return [data['event'] if event == 'state_base' else event
+                for event, data in self.server.events(client)
+                if event in ('state_base', 'game_resumed')]
+
+    def test_resume_on_join_sends_held_round(self):
+        """Test that a round held back by a pause is sent when a player rejoins by name"""
+        self.server.join(self.room_code, self.names[self.dropped])
+        self.assertEqual(self.round_events(self.watcher), ['game_resumed', 'new_round'])
+
+    def test_resume_on_token_rejoin_sends_held_round(self):
+        """Test that a round held back by a pause is sent when a player rejoins with their token"""
+        client = self.server.connect()
+        client.emit('rejoin_game', {'token': self.server.tokens[self.names[self.dropped]]})
+        self.assertEqual(self.round_events(self.watcher), ['game_resumed', 'new_round'])
+        self.assertEqual(self.server.advance(self.server.app.ROUND_RESULT_DELAY), 0, "The round is sent once")
+
+@pytest.mark.usefixtures('server')
+class TestReaper(unittest.TestCase):
+    def test_reaps_only_abandoned_rooms_and_seats(self):
+        """Test that a sweep drops empty rooms and long-gone players, but never a room
+        with someone connected or still inside their disconnect grace"""
+        app = self.server.app
+        abandoned, (ann,) = self.server.seat('Ann')
+        occupied, (bob, cat) = self.server.seat('Bob', 'Cat')
+        held, (dan,) = self.server.seat('Dan')
+        ann.disconnect()
+        cat.disconnect()
+        self.server.advance(app.DISCONNECT_GRACE)
+        self.server.advance(app.DISCONNECTED_PLAYER_TTL)
+        dan.disconnect()  # still inside the grace window when the sweep runs
+        self.server.events(bob)
+
+        app.reap()
+        self.assertNotIn(abandoned, app.game_rooms)
+        self.assertIsNone(app.player_tokens.get(self.server.tokens['Ann']))
+        self.assertEqual([p.name for p in app.game_rooms[occupied].players.values()], ['Bob'])
+        self.assertIsNone(app.player_tokens.get(self.server.tokens['Cat']))
+        self.assertIn(('roster_delta', mock.ANY), self.server.events(bob))
+        self.assertEqual([p.name for p in app.game_rooms[held].players.values()], ['Dan'])
+        self.assertEqual(app.reaper_stats['last_sweep']['rooms'], 1)
+        self.assertEqual(app.reaper_stats['last_sweep']['players'], 1)
+        self.assertTrue(app.scheduler.pending(('reaper',)), "The sweep reschedules itself")
+
+        # Once the grace runs out that room is empty too, and a later sweep takes it
+        for _ in range(int((app.DISCONNECT_GRACE + app.EMPTY_WAITING_ROOM_TTL) / app.REAP_INTERVAL) + 1):
+            self.server.advance(app.REAP_INTERVAL)
+        self.assertNotIn(held, app.game_rooms)
+        self.assertIn(occupied, app.game_rooms)
+
+@pytest.mark.usefixtures('server')
+class TestTokenStoreMetrics(unittest.TestCase):
+    def test_token_store_size_and_evictions_are_exported(self):
+        """Test that /metrics reports the token store's memory and its evictions by reason"""
+        app = self.server.app
+        tokens = app.player_tokens
+        for _ in range(tokens.max_per_player + 1):
+            tokens.issue(0, 'ABCDEF', 'Ann')
+        body = app.app.test_client().get('/metrics').get_data(as_text=True)
+        self.assertIn(f"fishy_session_token_bytes {tokens.stats()['approx_bytes']}\n", body)
+        self.assertIn('fishy_session_token_evictions_total{reason="player_cap"} 1\n', body)
+        self.assertIn('fishy_session_token_evictions_total{reason="lru"} 0\n', body)
+
+@pytest.mark.usefixtures('server')
+class TestEmitBatching(unittest.TestCase):
+    def test_one_frame_per_target_per_tick(self):
+        """Test that what a handler sends to one target goes out as one batch frame, in
+        order, reaching only that target"""
+        room_code, (ann, bob) = self.server.seat('Ann', 'Bob')
+        _, (cat,) = self.server.seat('Cat')
+
+        dan = self.server.connect()
+        self.server.frames(dan)
+        dan.emit('join_game', {'room_code': room_code, 'name': 'Dan'})
+        frames = self.server.frames(dan)
+        self.assertEqual([frame[0] for frame in frames], ['roster_delta', 'batch'])
+        self.assertEqual([event for event, _ in frames[1][1]], ['session_token', 'roster', 'game_state'])
+        self.assertEqual(frames[1][1][1][1]['version'], frames[0][1]['version'], "The roster follows the delta")
+        for client in (ann, bob):
+            self.assertEqual([frame[0] for frame in self.server.frames(client)], ['roster_delta'])
+
+        ann.emit('restart_game', {'room_code': room_code})
+        for client in (ann, bob, dan):
+            frames = self.server.frames(client)
+            self.assertEqual(len(frames), 1)
+            self.assertEqual(frames[0][0], 'batch')
+            self.assertEqual([event for event, _ in frames[0][1]], ['game_restarting', 'game_restarted', 'roster'])
+            seqs = [data['seq'] for _, data in frames[0][1]]
+            self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(self.server.frames(cat), [])
+
+    def test_deleted_room_leaves_nothing_queued(self):
+        """Test that deleting a room drops the emits still queued for it"""
+        room_code, _ = self.server.seat('Ann')
+        self.server.app.send_event('roster', {'version': 9, 'players': []}, to=room_code)
+        self.server.app.delete_room(room_code)
+        self.assertNotIn(room_code, self.server.app.outbox)
+
+@pytest.mark.usefixtures('server')
+class TestJoinAcks(unittest.TestCase):
+    def test_create_room_reply(self):
+        """Test that create_room answers with everything the lobby needs, or an error"""
+        client = self.server.connect()
+        reply = client.emit('create_room', {'name': 'Ann'}, callback=True)
+        self.assertEqual(set(reply), {'room_code', 'player_id', 'token', 'roster', 'state', 'seq'})
+        self.assertIn(reply['room_code'], self.server.app.game_rooms)
+        self.assertEqual(reply['player_id'], 1)
+        self.assertEqual(reply['roster']['players'], [{'id': 1, 'name': 'Ann', 'is_disconnected': False}])
+        self.assertEqual(reply['state']['status'], 'waiting')
+        self.assertEqual(self.server.app.player_tokens.get(reply['token'])['room_code'], reply['room_code'])
+
+        rooms = len(self.server.app.game_rooms)
+        self.assertEqual(self.server.connect().emit('create_room', {}, callback=True), {'error': 'Name is required'})
+        self.assertEqual(len(self.server.app.game_rooms), rooms, "No room is opened without a host")
+
+    def test_join_reply(self):
+        """Test that join answers with the seat, roster and state"""
+        room_code, _ = self.server.seat('Ann')
+        _, reply = self.server.join(room_code, 'Bob')
+        self.assertEqual(reply['room_code'], room_code)
+        self.assertEqual(reply['player_id'], 2)
+        self.assertEqual([p['name'] for p in reply['roster']['players']], ['Ann', 'Bob'])
+        self.assertEqual(reply['roster']['version'], reply['state']['version'])
+        self.assertEqual(reply['state']['players']['2']['role'], 'liar')
+        self.assertEqual(reply['seq'], self.server.app.event_buffer.last_seq(room_code))
+
+    def test_join_errors(self):
+        """Test the error replies for a bad code, a taken name and a game in progress"""
+        room_code, clients = self.server.seat('Ann', 'Bob', 'Cat')
+        self.assertEqual(self.server.join('NOROOM', 'Dan')[1], {'error': 'Room not found'})
+        self.assertEqual(self.server.join(room_code, '')[1], {'error': 'Name is required'})
+        self.assertIn('already connected', self.server.join(room_code, 'ann')[1]['error'])
+
+        clients[0].emit('start_game', {'room_code': room_code})
+        self.assertIn('Game already in progress', self.server.join(room_code, 'Dan')[1]['error'])
+        clients[2].disconnect()
+        _, reply = self.server.join(room_code, 'Cat')
+        self.assertEqual(reply['player_id'], 3, "A player who dropped gets their seat back")
+        self.assertEqual(reply['state']['status'], 'playing')
+        self.assertEqual(len(self.server.app.game_rooms[room_code].players), 3)
+
+@pytest.mark.usefixtures('server')
+class TestDisconnectGrace(unittest.TestCase):
+    ANNOUNCEMENTS = ('player_disconnected', 'game_paused', 'player_reconnected', 'game_resumed')
+
+    def setUp(self):
+        self.room_code, self.clients = self.server.seat('Ann', 'Bob', 'Cat')
+        self.clients[0].emit('start_game', {'room_code': self.room_code})
+        self.watchers = self.clients[:2]
+        for client in self.watchers:
+            self.server.frames(client)
+        self.game_room = self.server.app.game_rooms[self.room_code]
+        self.grace = self.server.app.DISCONNECT_GRACE
+
+    def announcements(self):
+        """Announcements each watcher got since the last call"""
+        return [[event for event, _ in self.server.events(client) if event in self.ANNOUNCEMENTS]
+                for client in self.watchers]
+
+    def rejoin(self):
+        client = self.server.connect()
+        client.emit('rejoin_game', {'token': self.server.tokens['Cat'],
+                                    'last_seq': self.server.app.event_buffer.last_seq(self.room_code)})
+        return client
+
+    def test_reclaim_within_grace_is_silent(self):
+        """Test that a player back within the grace window is never announced as gone"""
+        flaps = self.server.app.disconnect_flaps.value()
+        self.clients[2].disconnect()
+        self.server.advance(self.grace - 1)
+        self.rejoin()
+        self.assertEqual(self.announcements(), [[], []])
+        self.assertEqual(self.game_room.game_state['status'], 'playing')
+        self.assertEqual(self.server.app.disconnect_flaps.value(), flaps + 1)
+
+        # The same holds when the seat is taken back by name
+        self.server.clients[-1].disconnect()
+        self.server.advance(self.grace - 1)
+        self.server.join(self.room_code, 'Cat')
+        self.assertEqual(self.announcements(), [[], []])
+
+    def test_expired_grace_announces_once(self):
+        """Test that a player who stays away is announced, and the game paused, exactly once"""
+        self.clients[2].disconnect()
+        self.server.advance(self.grace)
+        self.assertEqual(self.announcements(), [['player_disconnected', 'game_paused']] * 2)
+        self.server.advance(self.server.app.REAP_INTERVAL * 3)
+        self.assertEqual(self.announcements(), [[], []])
+        self.assertTrue(self.game_room.players[3].is_disconnected)
+
+        self.rejoin()
+        self.assertEqual(self.announcements(), [['player_reconnected', 'game_resumed']] * 2)
+
+    def test_stale_timer_does_nothing(self):
+        """Test that the timer of a reclaimed seat never fires, even when the player drops again"""
+        self.clients[2].disconnect()
+        self.server.advance(self.grace - 1)
+        client = self.rejoin()
+        self.server.advance(self.grace)
+        self.assertEqual(self.announcements(), [[], []])
+        self.assertFalse(self.game_room.players[3].is_disconnected)
+
+        # Dropping again starts a new window; the first one's deadline has no say in it
+        client.disconnect()
+        self.server.advance(self.grace - 1)
+        self.assertEqual(self.announcements(), [[], []])
+        self.server.advance(1)
+        self.assertEqual(self.announcements(), [['player_disconnected', 'game_paused']] * 2)
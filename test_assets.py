@@ -0,0 +1,64 @@
+import gzip
+import brotli
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from assets import GENERATED, AssetStore, accepted_encodings, unbuilt
+
+class TestAssetStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.dir.name, 'js'))
+        self.script = b"console.log('fishy');\n" * 200
+        with open(os.path.join(self.dir.name, 'js', 'game.js'), 'wb') as f:
+            f.write(self.script)
+        self.store = AssetStore(self.dir.name, names=('js/game.js', 'css/tailwind.min.css'))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_names_follow_content(self):
+        """Test that files are served under a name that changes with their content, and missing ones are skipped"""
+        self.assertIn('js/game.js', self.store)
+        self.assertNotIn('css/tailwind.min.css', self.store, "Assets that were never built are left out")
+        self.assertEqual(unbuilt(self.dir.name), list(GENERATED))
+        hashed = self.store.urls['js/game.js']
+        self.assertRegex(hashed, r'^js/game\.[0-9a-f]{12}\.js$')
+        self.assertEqual(AssetStore(self.dir.name, names=('js/game.js',)).urls['js/game.js'], hashed)
+
+        with open(os.path.join(self.dir.name, 'js', 'game.js'), 'ab') as f:
+            f.write(b"// changed\n")
+        self.assertNotEqual(AssetStore(self.dir.name, names=('js/game.js',)).urls['js/game.js'], hashed)
+
+    def test_variant_matches_accept_encoding(self):
+        """Test that the compressed copy is served only to browsers that accept it"""
+        hashed = self.store.urls['js/game.js']
+        mimetype, encoding, body = self.store.get(hashed, 'gzip, deflate')
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(gzip.decompress(body), self.script)
+        self.assertIn('javascript', mimetype)
+        _, encoding, body = self.store.get(hashed, 'gzip, deflate, br')
+        self.assertEqual(encoding, 'br', "Brotli is preferred when accepted")
+        self.assertEqual(brotli.decompress(body), self.script)
+        self.assertLess(len(body), len(self.store.get(hashed, 'gzip')[2]))
+        self.assertEqual(self.store.get(hashed, 'gzip;q=0, deflate')[1:], (None, self.script))
+        self.assertEqual(self.store.get(hashed)[1:], (None, self.script))
+        self.assertIsNone(self.store.get('js/game.0000.js'))
+        self.assertEqual(accepted_encodings('br;q=0.5, gzip;q=0, identity'), {'br', 'identity'})
+
+class TestStartup(unittest.TestCase):
+    def test_app_starts_by_default(self):
+        """Test that the app starts with ASSET_PIPELINE unset, built assets or not"""
+        env = {key: value for key, value in os.environ.items() if key != 'ASSET_PIPELINE'}
+        env.update(SNAPSHOT_DB='', LOG_LEVEL='ERROR')
+        root = os.path.dirname(os.path.abspath(__file__))
+        script = 'import app; print(app.ASSET_PIPELINE == (not app.unbuilt(app.app.static_folder)))'
+        started = subprocess.run([sys.executable, '-c', script], cwd=root, env=env,
+                                 capture_output=True, text=True, timeout=60)
+        self.assertEqual(started.returncode, 0, started.stderr)
+        self.assertEqual(started.stdout.strip(), 'True')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
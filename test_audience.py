@@ -0,0 +1,49 @@
+import unittest
+from audience import Audience
+
+class TestAudience(unittest.TestCase):
+    def setUp(self):
+        self.audience = Audience()
+        for sid in ("s1", "s2", "s3"):
+            self.audience.add(sid, "ROOM")
+
+    def test_votes_are_tallied_per_round(self):
+        """Test that each spectator counts once and a new round starts a fresh tally"""
+        self.audience.vote("s1", 1, 2)
+        self.audience.vote("s2", 1, 2)
+        self.audience.vote("s2", 1, 3)  # changed their mind
+        self.assertEqual(self.audience.summary("ROOM"), {'spectators': 3, 'round': 1, 'votes': {2: 1, 3: 1}})
+
+        self.assertTrue(self.audience.vote("s3", 2, 4))
+        self.assertFalse(self.audience.vote("s1", 1, 2), "Votes for a finished round are ignored")
+        self.assertEqual(self.audience.summary("ROOM")['votes'], {4: 1})
+
+    def test_drain_batches_changes(self):
+        """Test that many changes come out as one update, and no update when nothing changed"""
+        self.assertEqual(self.audience.drain("ROOM")['spectators'], 3)
+        self.assertIsNone(self.audience.drain("ROOM"))
+
+        self.audience.vote("s1", 1, 2)
+        self.audience.remove("s1")
+        self.audience.add("s4", "ROOM")
+        self.assertEqual(self.audience.drain("ROOM"), {'spectators': 3, 'round': 1, 'votes': {}})
+
+    def test_last_spectator_leaving_is_published(self):
+        """Test that an emptied room still reports zero spectators once, then is forgotten"""
+        self.audience.drain("ROOM")
+        for sid in ("s1", "s2", "s3"):
+            self.assertEqual(self.audience.remove(sid), "ROOM")
+        self.assertEqual(self.audience.drain("ROOM")['spectators'], 0)
+        self.assertIsNone(self.audience.drain("ROOM"))
+        self.assertEqual(len(self.audience), 0)
+
+    def test_switching_rooms_and_removing_a_room(self):
+        """Test that watching another room leaves the first, and room removal forgets its SIDs"""
+        self.audience.add("s1", "OTHER")
+        self.assertEqual(self.audience.room_of("s1"), "OTHER")
+        self.assertEqual(self.audience.count("ROOM"), 2)
+        self.assertEqual(self.audience.remove_room("ROOM"), {"s2", "s3"})
+        self.assertNotIn("s2", self.audience)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import cluster
+from cluster import MessageBroker, RoomRouter, room_shard
+
+class TestRoomSharding(unittest.TestCase):
+    def test_shard_is_stable_and_in_range(self):
+        """Test that a room always maps to the same worker"""
+        for code in ["ABCDEF", "ZZZZZZ", "QWERTY"]:
+            self.assertEqual(room_shard(code, 4), room_shard(code.lower(), 4))
+            self.assertIn(room_shard(code, 4), range(4))
+
+    def test_router_uses_room_owner(self):
+        """Test that the router picks the owning worker from the path or query"""
+        router = RoomRouter([('127.0.0.1', 1), ('127.0.0.1', 2), ('127.0.0.1', 3)], port=0)
+        owner = room_shard("ABCDEF", 3)
+        self.assertEqual(router.pick_backend(b'/room_status/ABCDEF'), owner)
+        self.assertEqual(router.pick_backend(b'/socket.io/?EIO=4&room=ABCDEF&transport=polling'), owner)
+
+    def test_router_keeps_sessions_on_their_worker(self):
+        """Test that Engine.IO requests carrying only a sid go where the handshake went"""
+        router = RoomRouter([('127.0.0.1', 1), ('127.0.0.1', 2), ('127.0.0.1', 3)], port=0)
+        handshake = b'HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n\r\n0{"sid":"Ab-9_x","upgrades":["websocket"]}'
+        self.assertTrue(router.learn_session(handshake, 2))
+        self.assertFalse(router.learn_session(b'HTTP/1.1 200 OK\r\n\r\n', 0))
+        for transport in [b'polling', b'polling', b'websocket']:
+            self.assertEqual(router.pick_backend(b'/socket.io/?EIO=4&transport=' + transport + b'&sid=Ab-9_x'), 2)
+        # Sessions the router never saw fall back to the room, then round-robin
+        owner = room_shard("ABCDEF", 3)
+        self.assertEqual(router.pick_backend(b'/socket.io/?EIO=4&room=ABCDEF&sid=unknown'), owner)
+
+    def test_router_pipes_polling_to_the_handshake_worker(self):
+        """Test that polling requests through the router reach the worker that opened the session"""
+        from gevent import socket
+        from gevent.server import StreamServer
+
+        def worker(index):
+            def handle(sock, address):
+                head = sock.recv(65536)
+                body = b'0{"sid":"S%d"}' % index if b'sid=' not in head else b'%d' % index
+                sock.sendall(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+                sock.close()
+            server = StreamServer(('127.0.0.1', 0), handle)
+            server.start()
+            return server
+
+        def get(target):
+            client = socket.create_connection(('127.0.0.1', router.server.server_port))
+            client.sendall(b'GET ' + target + b' HTTP/1.1\r\nHost: x\r\n\r\n')
+            reply = b''
+            while True:
+                data = client.recv(65536)
+                if not data:
+                    break
+                reply += data
+            client.close()
+            return reply.split(b'\r\n\r\n', 1)[1]
+
+        workers = [worker(index) for index in range(3)]
+        router = RoomRouter([('127.0.0.1', w.server_port) for w in workers], host='127.0.0.1', port=0)
+        router.server.start()
+        try:
+            sid = get(b'/socket.io/?EIO=4&transport=polling')[len(b'0{"sid":"'):-2]
+            owner = sid[-1:]
+            for _ in range(5):
+                self.assertEqual(get(b'/socket.io/?EIO=4&transport=polling&sid=' + sid), owner)
+        finally:
+            router.server.stop()
+            for w in workers:
+                w.stop()
+
+    def test_router_forgets_oldest_sessions(self):
+        """Test that the session map stays within its bound, dropping the least recently used"""
+        router = RoomRouter([('127.0.0.1', 1), ('127.0.0.1', 2)], port=0, max_sessions=2)
+        router.learn_session(b'0{"sid":"one"}', 1)
+        router.learn_session(b'0{"sid":"two"}', 1)
+        router.pick_backend(b'/socket.io/?EIO=4&sid=one')
+        router.learn_session(b'0{"sid":"three"}', 1)
+        self.assertEqual(list(router._sessions), [b'one', b'three'])
+
+    def test_router_forwards_client_address(self):
+        """Test that the router appends the client to X-Forwarded-For, keeping earlier hops"""
+        head = b'GET / HTTP/1.1\r\nHost: x'
+        self.assertEqual(cluster._add_forwarded_for(head, b'10.0.0.1'), head + b'\r\nX-Forwarded-For: 10.0.0.1')
+        proxied = head + b'\r\nX-Forwarded-For: 1.2.3.4'
+        self.assertEqual(cluster._add_forwarded_for(proxied, b'10.0.0.1'), proxied + b', 10.0.0.1')
+
+class TestMessageBroker(unittest.TestCase):
+    def test_publish_reaches_subscribers(self):
+        """Test that a message published on a channel is pushed to subscribers"""
+        from gevent import socket
+        broker = MessageBroker(port=0)
+        broker.start()
+        try:
+            subscriber = socket.create_connection(broker.address)
+            subscriber.sendall(cluster._encode([b'SUBSCRIBE', b'fishy']))
+            self.assertIn(b'subscribe', subscriber.recv(1024))
+
+            publisher = socket.create_connection(broker.address)
+            publisher.sendall(cluster._encode([b'PUBLISH', b'fishy', b'hello']))
+            self.assertEqual(publisher.recv(1024), b':1\r\n')
+            self.assertEqual(subscriber.recv(1024),
+                             b'*3\r\n$7\r\nmessage\r\n$5\r\nfishy\r\n$5\r\nhello\r\n')
+        finally:
+            broker.stop()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,28 @@
+import unittest
+import codec
+
+class TestCodec(unittest.TestCase):
+    def test_negotiate_falls_back_to_json(self):
+        """Test that clients get the first codec they offered that the server supports"""
+        self.assertEqual(codec.negotiate(None), codec.JSON)
+        self.assertEqual(codec.negotiate(['cbor', 'json']), codec.JSON)
+        if codec.BINARY_CODECS:
+            self.assertEqual(codec.negotiate(['msgpack', 'json']), codec.MSGPACK)
+
+    @unittest.skipUnless(codec.msgpack, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        """Test that msgpack payloads decode to what JSON clients would see"""
+        state = {'players': [{'id': 1, 'name': 'Ann', 'points': 2}], 'scores': {'1': 2}, 'question': None}
+        packed = codec.encode(codec.MSGPACK, state)
+        self.assertIsInstance(packed, bytes)
+        self.assertEqual(codec.msgpack.unpackb(packed), state)
+        self.assertIsNone(codec.encode(codec.MSGPACK, None))
+        self.assertIs(codec.encode(codec.JSON, state), state)
+
+    def test_codec_rooms(self):
+        """Test that only binary codecs get their own room variant"""
+        self.assertEqual(codec.codec_room('ABCDEF', codec.JSON), 'ABCDEF')
+        self.assertEqual(codec.codec_room('ABCDEF:liar', codec.MSGPACK), 'ABCDEF:liar#msgpack')
+
+if __name__ == '__main__':
+    unittest.main()
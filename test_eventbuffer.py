@@ -0,0 +1,38 @@
+import unittest
+from eventbuffer import EventBuffer
+
+class TestEventBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = EventBuffer(size=3, clock=lambda: 1)
+
+    def test_missed_events_are_replayed_in_order(self):
+        """Test that a client gets exactly the events after the last one it saw"""
+        first = self.buffer.record("ROOM", "guess_result", {'correct': True})
+        self.assertEqual(first, {'correct': True, 'seq': 1001}, "Numbers start at the clock in ms")
+        self.buffer.record("ROOM", "game_restarting", None)
+        self.buffer.record("ROOM", "question_skipped", {'question': 'q'})
+
+        self.assertEqual(self.buffer.since("ROOM", 1001),
+                         [['game_restarting', {'seq': 1002}], ['question_skipped', {'question': 'q', 'seq': 1003}]])
+        self.assertEqual(self.buffer.since("ROOM", 1003), [], "Nothing missed")
+        self.assertEqual(self.buffer.last_seq("ROOM"), 1003)
+
+    def test_snapshot_needed_after_wrap_gap_or_restart(self):
+        """Test that since() gives up when missed events are gone, partial or unknown"""
+        for index in range(4):
+            self.buffer.record("ROOM", "state_delta", {'version': index})
+        self.assertIsNone(self.buffer.since("ROOM", 1000), "The first event has been dropped")
+        self.assertEqual(len(self.buffer.since("ROOM", 1001)), 3)
+
+        self.buffer.gap("ROOM")
+        self.assertIsNone(self.buffer.since("ROOM", 1003), "A role-only event cannot be replayed")
+        self.assertEqual(self.buffer.since("ROOM", 1005), [])
+
+        self.assertIsNone(self.buffer.since("ROOM", 2000), "Numbers from before a restart")
+        self.assertIsNone(self.buffer.since("ROOM", None))
+        self.buffer.forget("ROOM")
+        self.assertIsNone(self.buffer.last_seq("ROOM"))
+        self.assertEqual(len(self.buffer), 0)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
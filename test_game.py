@@ -1,5 +1,8 @@
+import os
+import tempfile
 import unittest
-from main import Player, GameRoom
+import main
+from main import Player, GameRoom, QuestionBank
 
 class TestSomethingFishy(unittest.TestCase):
     def setUp(self):
@@ -180,5 +183,139 @@ class TestSomethingFishy(unittest.TestCase):
         self.assertFalse('question' in non_guesser_state, "Non-guesser should not see the question")
         self.assertTrue('answer' in non_guesser_state, "Non-guesser should see the answer")
 
+    def test_state_deltas(self):
+        """Test that a guess produces a compact delta on top of the snapshot version"""
+        self.room.start_game()
+        guesser = next(p for p in self.room.players.values() if p.is_guesser())
+        liar = next(p for p in self.room.players.values() if p.is_liar())
+        version = self.room.get_player_state(guesser.id)['version']
+
+        self.room.process_guess(guesser.id, liar.id)
+        delta = self.room.drain_delta()
+        print(f"\nDelta after guessing {liar.name}: {delta}")
+        self.assertEqual(delta['base'], version)
+        self.assertEqual(delta['ops'], [['g', liar.id], ['t', 1]])
+        self.assertIsNone(self.room.drain_delta(), "Nothing changed since the last drain")
+        self.assertEqual(self.room.get_player_state(guesser.id)['version'], delta['version'])
+
+    def test_roster_deltas(self):
+        """Test that the roster is one versioned snapshot followed by small add/remove/update deltas"""
+        self.room.drain_roster_delta()
+        roster = self.room.get_roster()
+        self.assertEqual([p['name'] for p in roster['players']], ["Alice", "Bob", "Charlie", "David"])
+
+        self.room.add_player(Player(5, "Eve", False))
+        self.room.set_player_connected(2, False)
+        self.room.set_player_connected(2, False)  # no change, no op
+        self.room.remove_player(3)
+        delta = self.room.drain_roster_delta()
+        print(f"\nRoster delta: {delta}")
+        self.assertEqual(delta['base'], roster['version'])
+        self.assertEqual(delta['ops'], [['add', {'id': 5, 'name': "Eve", 'is_disconnected': False}],
+                                        ['update', {'id': 2, 'name': "Bob", 'is_disconnected': True}],
+                                        ['remove', 3]])
+        self.assertIsNone(self.room.drain_roster_delta(), "Nothing changed since the last drain")
+        self.assertEqual(self.room.get_roster()['version'], delta['version'])
+
+    def test_public_state_and_role_overlays(self):
+        """Test that the shared state hides secrets and overlays only reveal them per role"""
+        self.room.start_game()
+        public = self.room.get_public_state()
+        self.assertNotIn('question', public)
+        self.assertNotIn('answer', public)
+        self.assertNotIn('truth_teller', public)
+        self.assertFalse(any('role' in p for p in public['players'].values()))
+        self.assertIs(public, self.room.get_public_state(), "Unchanged state should be reused")
+
+        guesser_overlay = self.room.get_role_overlay('guesser')
+        liar_overlay = self.room.get_role_overlay('liar')
+        self.assertIn('question', guesser_overlay)
+        self.assertNotIn('answer', guesser_overlay)
+        self.assertIn('answer', liar_overlay)
+        self.assertNotIn('question', liar_overlay)
+
+    def test_room_counters(self):
+        """Test that connected and unguessed counts follow every change"""
+        def check():
+            players = self.room.players.values()
+            self.assertEqual(self.room.connected_count, sum(not p.is_disconnected for p in players))
+            self.assertEqual(self.room.unguessed_count, sum(not p.has_been_guessed for p in players))
+
+        check()
+        self.room.start_game()
+        self.room.set_player_connected(4, False)
+        self.room.set_player_connected(4, False)
+        check()
+        guesser_id = self.room.game_state['current_guesser']
+        liar = next(p for p in self.room.players.values() if p.is_liar())
+        self.room.process_guess(guesser_id, liar.id)
+        check()
+        self.room.end_turn_early()
+        check()
+        self.room.set_player_connected(4, True)
+        self.room.remove_player(liar.id)
+        check()
+        self.room.reset_for_restart()
+        check()
+        with self.assertRaises(AttributeError):
+            self.players[0].nickname = 'Al'
+
+    def test_rotation_skips_disconnected(self):
+        """Test that the announced next guesser is the one swap_round picks"""
+        self.room.start_game()
+        self.assertIs(self.room.guesser, self.players[0])
+        self.room.set_player_connected(2, False)
+        self.assertEqual(self.room.get_next_guesser().name, "Charlie")
+
+        self.room.end_turn_early()
+        self.assertIs(self.room.guesser, self.players[2])
+        self.assertTrue(self.room.truth_teller.is_truth_teller())
+        self.assertNotEqual(self.room.truth_teller.id, 2, "Disconnected players are never truth-teller")
+        self.room.set_player_connected(2, True)
+        self.room.end_turn_early()
+        self.assertEqual([p.role for p in self.players].count('liar'), 2)
+        self.assertEqual(self.room.get_next_guesser().name, "Alice")
+
+        stats = self.room.get_final_results()['stats']
+        self.assertEqual(stats[2]['rounds_played'], 3)
+        self.assertEqual(stats[2]['times_as_liar'] + stats[2]['times_as_truth_teller'], 2,
+                         "Bob was away when round 2 started")
+
+class TestQuestionBank(unittest.TestCase):
+    def setUp(self):
+        """Point the shared question bank at a small temporary file"""
+        fd, self.path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write("Q1?;A1\nQ2?;A2\n\nbad line\nQ3?;A3\nQ1?;A1\n")
+        self.original_bank = main.question_bank
+        main.question_bank = QuestionBank(self.path, check_interval=0)
+
+    def tearDown(self):
+        main.question_bank = self.original_bank
+        os.remove(self.path)
+
+    def test_load_skips_invalid_and_duplicate_lines(self):
+        """Test that blank, malformed and repeated lines are dropped on load"""
+        self.assertEqual(main.question_bank.lines, ["Q1?;A1", "Q2?;A2", "Q3?;A3"])
+        self.assertEqual(main.question_bank.pairs[1], ("Q2?", "A2"))
+
+    def test_no_repeats_until_exhausted(self):
+        """Test that a room draws every question once before repeating"""
+        room = GameRoom("test_room")
+        first_pass = {room.get_new_qa() for _ in range(3)}
+        self.assertEqual(len(first_pass), 3)
+        room.get_new_qa()
+        self.assertEqual(len(room.used_questions), 1)
+
+    def test_hot_reload(self):
+        """Test that rooms pick up an edited question file without restarting"""
+        room = GameRoom("test_room")
+        room.get_new_qa()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("New?;Yes\n")
+        os.utime(self.path, (0, 0))
+        self.assertEqual(room.get_new_qa(), ("New?", "Yes"))
+        self.assertEqual(main.question_bank.version, 2)
+
 if __name__ == '__main__':
     unittest.main(verbosity=2) 
\ No newline at end of file
@@ -0,0 +1,56 @@
+import io
+import logging
+import unittest
+from logs import QueueHandler, RateLimitFilter, StructuredFormatter
+
+class TestLogs(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.stream = io.StringIO()
+        self.handler = QueueHandler(self.stream, capacity=50)
+        self.handler._writer_started = True  # flushed by hand below
+        self.handler.setFormatter(StructuredFormatter())
+        self.limiter = RateLimitFilter(burst=3, per=10, clock=lambda: self.now)
+        self.handler.addFilter(self.limiter)
+        self.logger = logging.getLogger('test_logs')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_records_are_queued_with_fields(self):
+        """Test that nothing is written until the queue is flushed, and fields follow the message"""
+        self.logger.info("Player %s joined", "alice", extra={'room': 'ABCDEF', 'player': 2})
+        self.assertEqual(self.stream.getvalue(), "")
+        self.handler.flush()
+        self.assertTrue(self.stream.getvalue().rstrip().endswith(
+            "INFO    test_logs Player alice joined | room=ABCDEF player=2"))
+
+    def test_noisy_messages_are_rate_limited(self):
+        """Test that a burst per template gets through, warnings always do, and the count of dropped records is reported"""
+        for sid in range(10):
+            self.logger.info("Client connected (%s)", sid)
+        self.logger.info("Game started with %d players", 4)
+        self.logger.warning("Timer %r failed", 'x')
+        self.assertEqual(self.limiter.suppressed, 7)
+
+        self.now = 11
+        self.logger.info("Client connected (%s)", 'late')
+        self.handler.flush()
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[-1].endswith("Client connected (late) | suppressed=7"))
+
+    def test_full_queue_drops_records(self):
+        """Test that records beyond the queue capacity are counted and dropped rather than blocking"""
+        self.limiter.burst = 1000
+        for n in range(60):
+            self.logger.debug("Round %d", n)
+        self.assertEqual(self.handler.dropped, 10)
+        self.handler.flush()
+        self.assertEqual(len(self.stream.getvalue().splitlines()), 50)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
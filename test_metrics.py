@@ -0,0 +1,38 @@
+import unittest
+from metrics import Registry
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_exposition(self):
+        """Test that counters and callback gauges render one line per label set"""
+        errors = self.registry.counter('errors_total', 'Handler errors', ('event',))
+        errors.inc('join_game')
+        errors.inc('join_game')
+        errors.inc('say "hi"')
+        self.registry.gauge('rooms', 'Rooms by status', lambda: {('waiting',): 2, ('playing',): 1}, ('status',))
+        self.registry.gauge('sids', 'Connected SIDs', lambda: 7)
+
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines[:4], ['# HELP errors_total Handler errors', '# TYPE errors_total counter',
+                                     'errors_total{event="join_game"} 2', 'errors_total{event="say \\"hi\\""} 1'])
+        self.assertIn('rooms{status="playing"} 1', lines)
+        self.assertIn('sids 7', lines)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets count every sample at or below their bound"""
+        latency = self.registry.histogram('latency_seconds', 'Latency', (0.01, 0.1), ('event',))
+        for value in (0.005, 0.01, 0.05, 3):
+            latency.observe(value, 'make_guess')
+        self.assertEqual(latency.count('make_guess'), 4)
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{event="make_guess",le="0.01"} 2', text)
+        self.assertIn('latency_seconds_bucket{event="make_guess",le="0.1"} 3', text)
+        self.assertIn('latency_seconds_bucket{event="make_guess",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_sum{event="make_guess"} 3.065', text)
+        self.assertIn('latency_seconds_count{event="make_guess"} 4', text)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
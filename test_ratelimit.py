@@ -0,0 +1,38 @@
+import unittest
+from ratelimit import RateLimiter, parse_limits
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.limiter = RateLimiter({'skip_question': (0.5, 2)}, clock=lambda: self.now)
+
+    def test_burst_then_refill(self):
+        """Test that a key gets its burst, is refused once empty, and earns tokens back over time"""
+        self.assertTrue(self.limiter.allow('skip_question', 'sid1'))
+        self.assertTrue(self.limiter.allow('skip_question', 'sid1'))
+        self.assertFalse(self.limiter.allow('skip_question', 'sid1'))
+        self.assertTrue(self.limiter.allow('skip_question', 'sid2'), "Each key has its own bucket")
+        self.assertTrue(self.limiter.allow('make_guess', 'sid1'), "Events without a limit always pass")
+
+        self.now = 1.5
+        self.assertFalse(self.limiter.allow('skip_question', 'sid1'))
+        self.now = 2.5
+        self.assertTrue(self.limiter.allow('skip_question', 'sid1'))
+
+    def test_idle_buckets_are_evicted(self):
+        """Test that only buckets that have refilled completely are dropped"""
+        self.limiter.allow('skip_question', 'sid1')
+        self.now = 1
+        self.limiter.allow('skip_question', 'sid2')
+        self.assertEqual(self.limiter.evict_idle(), 0)
+        self.now = 2.5
+        self.assertEqual(self.limiter.evict_idle(), 1)
+        self.assertEqual(len(self.limiter), 1)
+
+    def test_parse_limits(self):
+        """Test the RATE_LIMITS format"""
+        self.assertEqual(parse_limits("make_guess=2/5, skip_question=0.2/2,end_turn=1"),
+                         {'make_guess': (2.0, 5.0), 'skip_question': (0.2, 2.0), 'end_turn': (1.0, 1.0)})
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
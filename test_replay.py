@@ -0,0 +1,139 @@
+import copy
+import json
+import random
+import unittest
+from main import CHECKPOINT_INTERVAL, GameRoom, Player
+from replay import play_game, replay, simulate_game
+
+def room_state(room):
+    """Everything game logic depends on (disconnect times are wall-clock)"""
+    players = {pid: {k: v for k, v in p.to_snapshot().items() if k != 'disconnect_time'} for pid, p in room.players.items()}
+    return copy.deepcopy((room.game_state, players, sorted(room.used_questions)))
+
+class TestReplay(unittest.TestCase):
+    def test_replay_reproduces_game(self):
+        """Test that replaying a finished game's log rebuilds it exactly"""
+        room = simulate_game(seed=1234, players=5)
+        self.assertEqual(room.game_state['status'], 'finished')
+
+        rebuilt = replay(room.seed, room.log)
+        self.assertEqual(room_state(rebuilt), room_state(room))
+        self.assertEqual(rebuilt.log, room.log)
+        self.assertEqual(rebuilt.get_final_results(), room.get_final_results())
+
+    def test_replay_to_round(self):
+        """Test that a replay can stop at the start of any round"""
+        room = simulate_game(seed=99, players=4)
+        for target in (1, 3, room.game_state['current_round']):
+            rebuilt = replay(room.seed, room.log, until_round=target)
+            self.assertEqual(rebuilt.game_state['current_round'], target)
+            # Replaying one event less must land in the previous round
+            previous = replay(room.seed, room.log, until_event=len(rebuilt.log) - 1)
+            self.assertLess(previous.game_state['current_round'], target)
+
+    def test_same_seed_same_game(self):
+        """Test that games are fully determined by their seed"""
+        self.assertEqual(simulate_game(seed=7).log, simulate_game(seed=7).log)
+        self.assertNotEqual(simulate_game(seed=7).log, simulate_game(seed=8).log)
+
+    def test_snapshot_resumes_same_game(self):
+        """Test that a restored room continues exactly like the original"""
+        room = simulate_game(seed=5, players=4)
+        room.reset_for_restart()
+        room.start_game()
+        restored = GameRoom.from_snapshot(json.loads(json.dumps(room.to_snapshot())))
+
+        for game_room in (room, restored):
+            game_room.skip_question()
+            game_room.end_turn_early()
+        self.assertEqual(room_state(restored), room_state(room))
+        self.assertEqual(room_state(replay(room.seed, restored.log, checkpoint=restored.checkpoint)), room_state(room))
+
+    def test_log_starts_over_each_game(self):
+        """Test that a room's snapshot stays the same size however many games it plays,
+        and still replays the current game from its checkpoint"""
+        room = simulate_game(seed=11, players=5)
+        policy = random.Random(11)
+        sizes = []
+        rounds = 0
+        for _ in range(30):
+            room.reset_for_restart()
+            sizes.append(len(json.dumps(room.to_snapshot())))
+            rounds += play_game(room, policy).game_state['current_round']
+        self.assertGreater(rounds, 200)
+        self.assertLess(max(sizes) - min(sizes), 10, "Only counters like the action count may grow")
+
+        restored = GameRoom.from_snapshot(json.loads(json.dumps(room.to_snapshot())))
+        rebuilt = replay(restored.seed, restored.log, checkpoint=restored.checkpoint)
+        self.assertEqual(room_state(rebuilt), room_state(room))
+        self.assertEqual(rebuilt.log, room.log)
+
+    def test_log_stays_bounded_within_a_game(self):
+        """Test that one long game with reconnect churn and refused moves keeps a
+        bounded log and snapshot, and still replays from its checkpoint"""
+        room = GameRoom('CHURN', seed=3)
+        for player_id in range(1, 6):
+            room.add_player(Player(player_id, f'Player {player_id}'))
+        room.start_game()
+        policy = random.Random(3)
+        sizes = []
+        for step in range(3000):
+            guesser_id = room.game_state['current_guesser']
+            logged = len(room.log)
+            # Refused and no-op actions leave no trace
+            self.assertEqual(room.process_guess(guesser_id, guesser_id), {'error': 'Cannot guess yourself'})
+            room.set_status('playing')
+            room.set_player_connected(guesser_id, True)
+            self.assertEqual(len(room.log), logged)
+
+            player_id = policy.choice([pid for pid in room.players if pid != guesser_id])
+            room.set_player_connected(player_id, False)
+            room.set_player_connected(player_id, True)
+            if step % 10 == 0:
+                room.skip_question()
+            self.assertLessEqual(len(room.log), CHECKPOINT_INTERVAL)
+            # Used questions are capped by the question bank, not the checkpoints
+            snapshot = dict(room.to_snapshot(), used_questions=[])
+            snapshot['checkpoint'] = dict(snapshot['checkpoint'] or {}, used_questions=[])
+            sizes.append(len(json.dumps(snapshot)))
+        self.assertEqual(room.game_state['status'], 'playing')
+        self.assertGreater(room.log_start, 10 * CHECKPOINT_INTERVAL)
+        self.assertLess(max(sizes[1500:]), max(sizes[:1500]) * 1.1)
+
+        restored = GameRoom.from_snapshot(json.loads(json.dumps(room.to_snapshot())))
+        rebuilt = replay(restored.seed, restored.log, checkpoint=restored.checkpoint)
+        self.assertEqual(room_state(rebuilt), room_state(room))
+        self.assertEqual(rebuilt.log, room.log)
+
+    def test_reconnects_keep_truth_tellers_deterministic(self):
+        """Test that after disconnects and reconnects, a restored room and a replay
+        from the checkpoint draw the same truth-tellers as the live room"""
+        room = GameRoom('CHURN', seed=21)
+        for player_id in range(1, 7):
+            room.add_player(Player(player_id, f'Player {player_id}'))
+        room.start_game()
+        policy = random.Random(21)
+        for _ in range(150):
+            player_id = policy.choice(list(room.players))
+            room.set_player_connected(player_id, False)
+            room.set_player_connected(player_id, True)
+        self.assertGreater(room.log_start, 0, "A checkpoint was taken during the churn")
+        restored = GameRoom.from_snapshot(json.loads(json.dumps(room.to_snapshot())))
+
+        truth_tellers = []
+        for game_room in (room, restored):
+            moves = random.Random(5)
+            drawn = []
+            while game_room.game_state['status'] == 'playing' and len(drawn) < 30:
+                guesser_id = game_room.game_state['current_guesser']
+                guessed = game_room.game_state['guessed_players']
+                candidates = [pid for pid in game_room.players if pid != guesser_id and pid not in guessed]
+                game_room.process_guess(guesser_id, moves.choice(candidates))
+                drawn.append(game_room.game_state['truth_teller'])
+            truth_tellers.append(drawn)
+        self.assertEqual(truth_tellers[1], truth_tellers[0])
+        self.assertEqual(room_state(restored), room_state(room))
+        self.assertEqual(room_state(replay(room.seed, room.log, checkpoint=room.checkpoint)), room_state(room))
+
+if __name__ == '__main__':
+    unittest.main()
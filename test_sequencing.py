@@ -0,0 +1,41 @@
+import unittest
+import gevent
+from gevent.lock import RLock
+from sequencing import RoomSequencer
+
+class TestRoomSequencer(unittest.TestCase):
+    def setUp(self):
+        self.sequencer = RoomSequencer(remember=3, lock_factory=RLock)
+
+    def test_repeated_action_ids_are_caught(self):
+        """Test that an action ID counts once per room, within the remembered window"""
+        self.assertFalse(self.sequencer.seen("ROOM", "a-1"))
+        self.assertTrue(self.sequencer.seen("ROOM", "a-1"))
+        self.assertFalse(self.sequencer.seen("OTHER", "a-1"), "IDs are tracked per room")
+        self.assertFalse(self.sequencer.seen("ROOM", None))
+        self.assertFalse(self.sequencer.seen("ROOM", None), "Actions without an ID are never repeats")
+
+        for action_id in ("a-2", "a-3", "a-4"):
+            self.sequencer.seen("ROOM", action_id)
+        self.assertFalse(self.sequencer.seen("ROOM", "a-1"), "Only the last few IDs are kept")
+
+        self.sequencer.forget("ROOM")
+        self.assertFalse(self.sequencer.seen("ROOM", "a-4"))
+
+    def test_one_room_at_a_time_but_rooms_in_parallel(self):
+        """Test that events for a room never interleave while other rooms keep running"""
+        order = []
+
+        def handle(room_code, name):
+            with self.sequencer.lock(room_code):
+                order.append(f"{name} start")
+                gevent.sleep(0.01)  # yield mid-handler, as an emit can
+                order.append(f"{name} end")
+
+        gevent.joinall([gevent.spawn(handle, "ROOM", "guess1"), gevent.spawn(handle, "ROOM", "guess2"),
+                        gevent.spawn(handle, "OTHER", "other")])
+        self.assertLess(order.index("guess1 end"), order.index("guess2 start"))
+        self.assertLess(order.index("other start"), order.index("guess1 end"), "Other rooms are not held up")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,65 @@
+import unittest
+import pytest
+from sessions import SessionRegistry, TokenStore
+
+class TestSessionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.sessions = SessionRegistry()
+        self.sessions.add("sid-a", 1, "ROOM", "Alice")
+        self.sessions.add("sid-b", 2, "ROOM", "Bob")
+
+    def test_lookup_both_ways(self):
+        """Test SID -> session and (room, player) -> SID lookups"""
+        self.assertEqual(self.sessions["sid-a"]["name"], "Alice")
+        self.assertEqual(self.sessions.get_sid("ROOM", 2), "sid-b")
+        self.assertEqual(self.sessions.room_sids("ROOM"), {"sid-a", "sid-b"})
+
+    def test_rejoin_replaces_stale_sid(self):
+        """Test that registering a new SID for a player drops the old one"""
+        self.sessions.add("sid-a2", 1, "ROOM", "Alice")
+        self.assertNotIn("sid-a", self.sessions)
+        self.assertEqual(self.sessions.get_sid("ROOM", 1), "sid-a2")
+        self.assertEqual(self.sessions.room_sids("ROOM"), {"sid-a2", "sid-b"})
+
+    def test_remove_room(self):
+        """Test that removing a room forgets all of its sessions"""
+        self.sessions.remove_room("ROOM")
+        self.assertEqual(len(self.sessions), 0)
+        self.assertIsNone(self.sessions.get_sid("ROOM", 1))
+
+@pytest.mark.usefixtures('clock')
+class TestTokenStore(unittest.TestCase):
+    def setUp(self):
+        self.tokens = TokenStore(ttl=100, max_tokens=4, max_per_player=2, clock=self.clock)
+
+    def test_ttl_expiry(self):
+        """Test that unused tokens expire and used ones stay alive"""
+        old = self.tokens.issue(1, "ROOM", "Alice")
+        self.clock.now = 50
+        fresh = self.tokens.issue(2, "ROOM", "Bob")
+        self.clock.now = 120
+        self.assertEqual(self.tokens.expire(), 1)
+        self.assertIsNone(self.tokens.get(old))
+        self.assertEqual(self.tokens.get(fresh)["name"], "Bob")
+
+    def test_limits(self):
+        """Test the per-player cap and LRU eviction"""
+        first = self.tokens.issue(1, "ROOM", "Alice")
+        self.tokens.issue(1, "ROOM", "Alice")
+        self.tokens.issue(1, "ROOM", "Alice")
+        self.assertNotIn(first, self.tokens)
+        for player_id in range(2, 5):
+            self.tokens.issue(player_id, "ROOM", "P")
+        self.assertEqual(len(self.tokens), 4)
+        self.assertEqual(self.tokens.stats()["evictions"]["lru"], 1)
+
+    def test_invalidate_room(self):
+        """Test that deleting a room drops all of its tokens"""
+        self.tokens.issue(1, "ROOM", "Alice")
+        other = self.tokens.issue(1, "OTHER", "Alice")
+        self.assertEqual(self.tokens.invalidate_room("ROOM"), 1)
+        self.assertEqual(len(self.tokens), 1)
+        self.assertIn(other, self.tokens)
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])  # the fake clock is a pytest fixture
@@ -0,0 +1,77 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from main import Player, GameRoom
+from sessions import TokenStore
+from snapshots import SnapshotStore
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = SnapshotStore(os.path.join(self.tmpdir, 'snapshots.sqlite3'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def make_game(self):
+        random.seed(7)
+        room = GameRoom('ABCDEF')
+        for player_id, name in enumerate(['Ann', 'Bob', 'Cat', 'Dan'], start=1):
+            room.add_player(Player(player_id, name))
+        room.start_game()
+        liar = next(p for p in room.players.values() if p.is_liar())
+        room.process_guess(room.game_state['current_guesser'], liar.id)
+        return room
+
+    def test_room_round_trip(self):
+        """Test that a room in the middle of a round comes back unchanged"""
+        room = self.make_game()
+        self.store.write([room.to_snapshot()])
+
+        [data] = self.store.load_rooms()
+        restored = GameRoom.from_snapshot(data)
+        self.assertEqual(restored.game_state, room.game_state)
+        self.assertEqual(restored.used_questions, room.used_questions)
+        self.assertEqual(restored.version, room.version)
+        self.assertEqual({pid: p.to_snapshot() for pid, p in restored.players.items()},
+                         {pid: p.to_snapshot() for pid, p in room.players.items()})
+        self.assertFalse(restored.dirty, "A freshly restored room has nothing new to write")
+
+    def test_dirty_tracking(self):
+        """Test that rooms are marked dirty on change and can be deleted"""
+        room = self.make_game()
+        room.dirty = False
+        room.skip_question()
+        self.assertTrue(room.dirty, "Skipping a question should mark the room dirty")
+
+        self.store.write([room.to_snapshot()])
+        self.store.write(deleted_rooms=['ABCDEF'])
+        self.assertEqual(self.store.load_rooms(), [])
+        self.assertEqual(self.store.stats['flushes'], 2)
+
+    def test_tokens_are_written_in_batches(self):
+        """Test that only changed tokens are saved and restored tokens still work"""
+        tokens = TokenStore()
+        keep = tokens.issue(1, 'ABCDEF', 'Ann')
+        drop = tokens.issue(2, 'ABCDEF', 'Bob')
+        saved, removed = tokens.drain_changes()
+        self.store.write(tokens=saved, deleted_tokens=removed)
+        self.assertEqual(tokens.drain_changes(), ([], []), "Nothing changed since the last drain")
+
+        tokens.revoke(drop)
+        saved, removed = tokens.drain_changes()
+        self.assertEqual((saved, removed), ([], [drop]))
+        self.store.write(tokens=saved, deleted_tokens=removed)
+
+        restored = TokenStore()
+        for token, session, last_used in self.store.load_tokens():
+            restored.restore(token, session, last_used)
+        self.assertEqual(restored.get(keep), {'player_id': 1, 'room_code': 'ABCDEF', 'name': 'Ann'})
+        self.assertIsNone(restored.get(drop))
+        self.assertEqual(restored.invalidate_room('ABCDEF'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import pytest
+from timers import Scheduler
+
+@pytest.mark.usefixtures('clock')
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.started = []
+        self.scheduler = Scheduler(self.start_task, lambda s: None, clock=self.clock)
+        self.calls = []
+
+    def start_task(self, target):
+        self.started.append(target)
+        return target
+
+    def test_runs_callbacks_in_deadline_order(self):
+        """Test that timers fire once their deadline passes, earliest first"""
+        self.scheduler.schedule('b', 2, self.calls.append, 'b')
+        self.scheduler.schedule('a', 1, self.calls.append, 'a')
+        self.assertEqual(len(self.started), 1, "Only one background task should be started")
+        self.assertEqual(self.scheduler.run_due(), 0)
+        self.clock.now = 5
+        self.assertEqual(self.scheduler.run_due(), 2)
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_reschedule_and_cancel(self):
+        """Test that rescheduling a key replaces it and cancelled timers never fire"""
+        self.scheduler.schedule('round', 1, self.calls.append, 'first')
+        self.scheduler.schedule('round', 3, self.calls.append, 'second')
+        self.scheduler.schedule('other', 1, self.calls.append, 'other')
+        self.assertTrue(self.scheduler.cancel('other'))
+        self.assertFalse(self.scheduler.cancel('other'))
+        self.clock.now = 2
+        self.scheduler.run_due()
+        self.assertEqual(self.calls, [])
+        self.assertTrue(self.scheduler.pending('round'))
+        self.clock.now = 3
+        self.scheduler.run_due()
+        self.assertEqual(self.calls, ['second'])
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])  # the fake clock is a pytest fixture
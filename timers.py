@@ -0,0 +1,77 @@
+import heapq
+import itertools
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Runs delayed callbacks from one shared background task.
+
+    Timers live in a deadline heap and are keyed, so scheduling a key that is
+    already pending replaces it and any timer can be cancelled. Cancelled
+    entries are dropped lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, start_background_task, sleep, tick=0.1, clock=time.monotonic):
+        self._start_background_task = start_background_task
+        self._sleep = sleep
+        self.tick = tick
+        self._clock = clock
+        self._heap = []     # [deadline, seq, key, callback, args]
+        self._entries = {}  # key -> heap entry
+        self._seq = itertools.count()
+        self._task = None
+
+    def schedule(self, key, delay, callback, *args):
+        """Run callback(*args) after `delay` seconds, replacing any timer with the same key"""
+        self.cancel(key)
+        entry = [self._clock() + delay, next(self._seq), key, callback, args]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        if self._task is None:
+            self._task = self._start_background_task(self._run)
+        return entry
+
+    def cancel(self, key):
+        """Cancel a pending timer. Returns True if one was pending."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[3] = None  # leave it in the heap, skipped when popped
+        return True
+
+    def pending(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def pending_counts(self):
+        """Pending timers per kind, the first item of each key"""
+        counts = {}
+        for key in self._entries:
+            counts[key[0]] = counts.get(key[0], 0) + 1
+        return counts
+
+    def run_due(self, now=None):
+        """Run every timer whose deadline has passed. Returns how many ran."""
+        now = self._clock() if now is None else now
+        ran = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, callback, args = heapq.heappop(self._heap)
+            if callback is None:
+                continue
+            del self._entries[key]
+            try:
+                callback(*args)
+            except Exception:
+                log.exception("Timer %r failed", key)
+            ran += 1
+        return ran
+
+    def _run(self):
+        while True:
+            self.run_due()
+            self._sleep(self.tick)